@@ -0,0 +1,161 @@
+"""Admission control for heavy Telegram handlers (uploads, imports).
+
+Responsibilities:
+- Bound the number of heavy jobs running at once (global in-flight limit) and
+  per user, so one user dumping 40 GPX files cannot starve /recommend and other
+  chats of the thread pool and the database.
+- Queue the excess with round-robin fairness across users: every user gets one
+  slot in turn, however many files each of them has queued.
+- Fail fast when the queue is full instead of letting updates time out.
+- Export queue depth, in-flight jobs and wait time as metrics.
+
+Constraints:
+- Single event loop, no locks: all state changes happen in loop callbacks.
+- State is per process: with several webhook workers the limits apply per worker.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from app.domain.ports.metrics import Metrics, NullMetrics
+
+
+class AdmissionRejected(Exception):
+    """Очередь заполнена — запрос отклоняется сразу."""
+
+
+class Ticket:
+    """Заявка на слот: position == 0 — допущена сразу, иначе ожидаемое место в очереди."""
+
+    __slots__ = ("user_id", "position", "enqueued_at", "future")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.position = 0
+        self.enqueued_at = time.perf_counter()
+        self.future: Optional[asyncio.Future] = None
+
+
+class AdmissionController:
+    """
+    Не более max_in_flight тяжёлых задач всего и per_user на пользователя; остальные ждут
+    в очередях пользователей, которые обслуживаются по кругу. Сверх max_queue ожидающих —
+    AdmissionRejected.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        per_user: int,
+        max_queue: int,
+        metrics: Optional[Metrics] = None,
+        pool: str = "heavy",
+    ):
+        self.max_in_flight = max_in_flight
+        self.per_user = per_user
+        self.max_queue = max_queue
+        self.metrics = metrics or NullMetrics()
+        self.labels = {"pool": pool}
+        self.in_flight = 0
+        self.queued = 0
+        self._running: Dict[int, int] = {}
+        # Порядок ключей — порядок обхода по кругу: обслуженный пользователь уходит в конец
+        self._waiting: "OrderedDict[int, Deque[Ticket]]" = OrderedDict()
+
+    def enqueue(self, user_id: int) -> Ticket:
+        ticket = Ticket(user_id)
+        if user_id not in self._waiting and self._can_start(user_id):
+            self._start(ticket)
+            self.metrics.observe("admission_wait_seconds", 0.0, self.labels)
+            return ticket
+        if self.queued >= self.max_queue:
+            self.metrics.increment("admission_rejected_total", labels=self.labels)
+            raise AdmissionRejected(user_id)
+
+        ticket.future = asyncio.get_running_loop().create_future()
+        queue = self._waiting.setdefault(user_id, deque())
+        queue.append(ticket)
+        self.queued += 1
+        ticket.position = self._position(user_id, len(queue))
+        self.metrics.increment("admission_queued_total", labels=self.labels)
+        self._report()
+        return ticket
+
+    async def wait(self, ticket: Ticket) -> None:
+        if ticket.future is None:
+            return
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Слот уже выдан, но ожидающий отменён — возвращаем его следующему
+                self.release(ticket)
+            else:
+                self._discard(ticket)
+            raise
+        self.metrics.observe("admission_wait_seconds", time.perf_counter() - ticket.enqueued_at, self.labels)
+
+    def release(self, ticket: Ticket) -> None:
+        self.in_flight -= 1
+        running = self._running[ticket.user_id] - 1
+        if running:
+            self._running[ticket.user_id] = running
+        else:
+            del self._running[ticket.user_id]
+        self._dispatch()
+        self._report()
+
+    @asynccontextmanager
+    async def slot(self, ticket: Ticket) -> AsyncIterator[None]:
+        """Дождаться слота по заявке и удерживать его на время блока."""
+        await self.wait(ticket)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def _can_start(self, user_id: int) -> bool:
+        return self.in_flight < self.max_in_flight and self._running.get(user_id, 0) < self.per_user
+
+    def _start(self, ticket: Ticket) -> None:
+        self.in_flight += 1
+        self._running[ticket.user_id] = self._running.get(ticket.user_id, 0) + 1
+
+    def _dispatch(self) -> None:
+        progressed = True
+        while progressed and self._waiting and self.in_flight < self.max_in_flight:
+            progressed = False
+            for user_id in list(self._waiting):
+                if self.in_flight >= self.max_in_flight:
+                    break
+                if not self._can_start(user_id):
+                    continue
+                queue = self._waiting.pop(user_id)
+                ticket = queue.popleft()
+                self.queued -= 1
+                if queue:
+                    self._waiting[user_id] = queue
+                self._start(ticket)
+                ticket.future.set_result(None)
+                progressed = True
+
+    def _discard(self, ticket: Ticket) -> None:
+        queue = self._waiting.get(ticket.user_id)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self.queued -= 1
+        if not queue:
+            del self._waiting[ticket.user_id]
+        self._report()
+
+    def _position(self, user_id: int, index: int) -> int:
+        # index-я заявка пользователя пропустит вперёд не больше index заявок каждого из остальных
+        return index + sum(min(len(queue), index) for other, queue in self._waiting.items() if other != user_id)
+
+    def _report(self) -> None:
+        self.metrics.gauge("admission_queue_depth", self.queued, self.labels)
+        self.metrics.gauge("admission_in_flight", self.in_flight, self.labels)
@@ -0,0 +1,183 @@
+"""Command-line adapter.
+
+Responsibilities:
+- Entry point for maintenance jobs run by cron or operators.
+- Take use cases from the process container; a command imports and connects
+  only what it uses, so ``--help`` and light commands start fast.
+
+Usage:
+    python -m app.adapters.cli rebuild-stats [--user-id N]
+    python -m app.adapters.cli precompute-recommendations [--batch-size N] [--top-k K]
+    python -m app.adapters.cli import-archive --tg-id N export.zip [--workers N] [--checkpoint PATH]
+    python -m app.adapters.cli drain-vector-outbox [--follow | --requeue-dead]
+    python -m app.adapters.cli reconcile-vector-index [--dry-run]
+    python -m app.adapters.cli compact-raw-storage [--older-than-days N] [--dry-run]
+    python -m app.adapters.cli backfill-features [--batch-size N] [--dry-run]
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.adapters.container import container
+from app.adapters.outbox_drainer import drain_forever, drain_once
+from app.config import settings
+
+
+def rebuild_stats(args: argparse.Namespace) -> None:
+    with container.session() as s:
+        rows = container.rebuild_volume_stats(s).execute(args.user_id)
+    print(f"volume rollups rebuilt: {rows} weekly rows")
+
+
+def precompute_recommendations(args: argparse.Namespace) -> None:
+    # Метка времени берётся до чтения признаков: трек, загруженный во время прогона,
+    # сделает рекомендации пользователя устаревшими и включит живой поиск.
+    computed_at = datetime.now(timezone.utc)
+    generation = int(time.time())
+    with container.session() as s:
+        users = container.precompute_recommendations(s, args.batch_size, args.top_k).execute(
+            generation=generation, computed_at=computed_at
+        )
+    print(f"recommendations generation {generation}: {users} users")
+
+
+def import_archive(args: argparse.Namespace) -> None:
+    from app.application.bulk_import import ImportProgress, ImportTracksCommand
+    from app.infrastructure.imports import JsonFileImportCheckpoint, iter_archive_tracks
+
+    checkpoint = JsonFileImportCheckpoint(args.checkpoint or f"{args.archive}.progress.json")
+    analyzer = container.track_analyzer(args.workers)
+    started = time.perf_counter()
+
+    def report(progress: ImportProgress) -> None:
+        rate = progress.processed / (time.perf_counter() - started)
+        print(
+            f"processed {progress.processed}: imported {progress.imported}, duplicates {progress.duplicates}, "
+            f"rejected {progress.rejected} ({rate:.1f} files/s)",
+            flush=True,
+        )
+
+    try:
+        with container.session() as s:
+            user_id = container.ensure_user(s).execute(args.tg_id)
+            progress = container.import_tracks(s, analyzer, checkpoint, args.batch_size).execute(
+                ImportTracksCommand(
+                    user_id=user_id,
+                    files=iter_archive_tracks(args.archive, settings.IMPORT_MAX_FILE_BYTES, skip=checkpoint.done()),
+                    source="import",
+                ),
+                on_progress=report,
+            )
+        # Точки импорта — в outbox; отправляем их в индекс сразу, не дожидаясь фонового дренажа
+        while settings.VECTOR_OUTBOX_ENABLED and drain_once():
+            pass
+    finally:
+        analyzer.close()
+    for name, error in progress.errors:
+        print(f"rejected {name}: {error}")
+    print(
+        f"import done in {time.perf_counter() - started:.1f}s: imported {progress.imported}, "
+        f"duplicates {progress.duplicates}, rejected {progress.rejected}"
+    )
+
+
+def drain_vector_outbox(args: argparse.Namespace) -> None:
+    if args.requeue_dead:
+        with container.session() as s:
+            print(f"vector outbox: requeued {container.vector_outbox_repo(s).requeue_dead()}")
+        return
+    if args.follow:
+        drain_forever(threading.Event())
+        return
+    delivered = 0
+    while batch := drain_once():
+        delivered += batch
+    with container.session() as s:
+        outbox = container.vector_outbox_repo(s)
+        print(f"vector outbox: delivered {delivered}, pending {outbox.pending()}, dead {outbox.dead()}")
+
+
+def reconcile_vector_index(args: argparse.Namespace) -> None:
+    with container.session() as s:
+        report = container.reconcile_vector_index(s).execute(dry_run=args.dry_run)
+    action = "would fix" if args.dry_run else "fixed"
+    print(
+        f"sql {report['sql']} tracks, index {report['index']} points: "
+        f"{action} {report['missing']} missing, {report['orphaned']} orphaned"
+    )
+
+
+def compact_raw_storage(args: argparse.Namespace) -> None:
+    report = container.raw_storage.compact(
+        older_than_seconds=args.older_than_days * 86400,
+        max_pack_bytes=settings.RAW_STORAGE_PACK_MAX_BYTES,
+        dry_run=args.dry_run,
+    )
+    action = "would pack" if args.dry_run else "packed"
+    print(
+        f"{action} {report.packed} files ({report.bytes_packed / 1024 / 1024:.1f} MB) into {report.packs} packs; "
+        f"already packed {report.already_packed}, skipped {report.skipped}"
+    )
+
+
+def backfill_features(args: argparse.Namespace) -> None:
+    with container.session() as s:
+        report = container.backfill_track_features(s, args.batch_size).execute(dry_run=args.dry_run)
+    while not args.dry_run and settings.VECTOR_OUTBOX_ENABLED and drain_once():
+        pass
+    action = "would recompute" if args.dry_run else "updated"
+    print(
+        f"checked {report['checked']} tracks: {report['up_to_date']} up to date, {report['stale']} stale; "
+        f"{action} {report['stale'] if args.dry_run else report['updated']}, "
+        f"missing raw file {report['missing']}, rejected {report['rejected']}"
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.adapters.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("rebuild-stats", help="перестроить недельные/месячные сводки из track_features")
+    cmd.add_argument("--user-id", type=int, default=None, help="только для одного пользователя")
+    cmd.set_defaults(func=rebuild_stats)
+
+    cmd = commands.add_parser("precompute-recommendations", help="предрасчёт рекомендаций для всех пользователей")
+    cmd.add_argument("--batch-size", type=int, default=settings.RECOMMENDATIONS_PRECOMPUTE_BATCH_SIZE)
+    cmd.add_argument("--top-k", type=int, default=settings.RECOMMENDATIONS_PRECOMPUTE_TOP_K)
+    cmd.set_defaults(func=precompute_recommendations)
+
+    cmd = commands.add_parser("import-archive", help="массовый импорт ZIP-экспорта (Strava/Garmin) пользователя")
+    cmd.add_argument("archive")
+    cmd.add_argument("--tg-id", type=int, required=True)
+    cmd.add_argument("--workers", type=int, default=settings.IMPORT_WORKERS, help="0 — по числу CPU")
+    cmd.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    cmd.add_argument("--checkpoint", default=None, help="по умолчанию <archive>.progress.json")
+    cmd.set_defaults(func=import_archive)
+
+    cmd = commands.add_parser("drain-vector-outbox", help="отправить накопленные операции vector_outbox в индекс")
+    cmd.add_argument("--follow", action="store_true", help="работать постоянно (отдельный процесс дренажа)")
+    cmd.add_argument("--requeue-dead", action="store_true", help="вернуть операции из dead в очередь и выйти")
+    cmd.set_defaults(func=drain_vector_outbox)
+
+    cmd = commands.add_parser("reconcile-vector-index", help="сверить индекс с track_features и исправить расхождения")
+    cmd.add_argument("--dry-run", action="store_true", help="только посчитать расхождения")
+    cmd.set_defaults(func=reconcile_vector_index)
+
+    cmd = commands.add_parser("compact-raw-storage", help="перенести старые исходные файлы в pack-файлы")
+    cmd.add_argument("--older-than-days", type=float, default=settings.RAW_STORAGE_PACK_AFTER_DAYS)
+    cmd.add_argument("--dry-run", action="store_true", help="только посчитать, что будет упаковано")
+    cmd.set_defaults(func=compact_raw_storage)
+
+    cmd = commands.add_parser("backfill-features", help="пересчитать признаки, посчитанные устаревшими версиями")
+    cmd.add_argument("--batch-size", type=int, default=200)
+    cmd.add_argument("--dry-run", action="store_true", help="только посчитать устаревшие треки")
+    cmd.set_defaults(func=backfill_features)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
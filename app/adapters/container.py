@@ -0,0 +1,379 @@
+"""Composition root shared by the Telegram bot, HTTP API, ingest worker and CLI.
+
+Responsibilities:
+- Build process-wide infrastructure (Qdrant client, vector index, vectorizer,
+  parsers, raw storage, the import process pool) on first use and reuse it
+  across handlers, requests and jobs.
+- Assemble use cases over a SQLAlchemy session. Repositories are cheap and
+  bound to one session, so they are created per unit of work.
+
+Constraints:
+- Importing this module has no side effects and pulls in no heavy dependency:
+  sqlmodel, qdrant_client, gpxpy and numpy are imported by the provider that
+  needs them, so a CLI command or a test pays only for what it uses.
+- Providers are thread-safe: handlers build use cases from a thread pool.
+- Tests and benchmarks may override a provider by assigning the attribute
+  before first use (``container.qdrant_client = QdrantClient(":memory:")``).
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from app.config import settings
+from app.domain.ports.metrics import Metrics
+from app.infrastructure.metrics import instrument
+from app.infrastructure.metrics import metrics as process_metrics
+
+
+class _lazy:
+    """cached_property под блокировкой: провайдер вызывается один раз, даже из нескольких потоков."""
+
+    def __init__(self, factory: Callable[[Any], Any]):
+        self.factory = factory
+        self.name = factory.__name__
+        self.lock = threading.Lock()
+        self.__doc__ = factory.__doc__
+
+    def __get__(self, container: Any, owner: type) -> Any:
+        if container is None:
+            return self
+        # После первого вызова значение лежит в __dict__ экземпляра и дескриптор больше не вызывается
+        with self.lock:
+            if self.name not in container.__dict__:
+                container.__dict__[self.name] = self.factory(container)
+        return container.__dict__[self.name]
+
+
+class Container:
+    def __init__(self, metrics: Metrics = process_metrics):
+        self.metrics = metrics
+
+    # --- Инфраструктура: одна на процесс ---
+
+    @_lazy
+    def qdrant_client(self):
+        from app.infrastructure.db.qdrant import get_client
+
+        return get_client()
+
+    @_lazy
+    def vector_index(self):
+        from app.infrastructure.repos.track_repo_qdrant import vector_index_from_settings
+
+        return instrument(vector_index_from_settings(self.qdrant_client), self.metrics)
+
+    @_lazy
+    def vectorizer(self):
+        from app.infrastructure.vectorize.track import HandcraftedTrackVectorizer
+
+        return HandcraftedTrackVectorizer()
+
+    @_lazy
+    def profile_builder(self):
+        from app.infrastructure.vectorize.profile import profile_builder_from_settings
+
+        return profile_builder_from_settings()
+
+    @_lazy
+    def content_id_gen(self):
+        from app.infrastructure.repos.track_repo_sql import ContentHashIdGen
+
+        return ContentHashIdGen()
+
+    @_lazy
+    def parser(self):
+        from app.infrastructure.parsers.parser_impl import TrackParserImpl
+
+        return TrackParserImpl()
+
+    @_lazy
+    def feature_extractor(self):
+        from app.infrastructure.parsers.parser_impl import TrackFeatureExtractorImpl
+
+        return TrackFeatureExtractorImpl()
+
+    @_lazy
+    def detector(self):
+        from app.infrastructure.repos.track_repo_sql import SimpleFormatDetector
+
+        return SimpleFormatDetector()
+
+    @_lazy
+    def raw_storage(self):
+        from app.infrastructure.repos.track_repo_sql import raw_storage_from_settings
+
+        return instrument(raw_storage_from_settings(), self.metrics)
+
+    @_lazy
+    def analyzer(self):
+        """Пул процессов разбора для импорта архивов; процессы стартуют при первом импорте."""
+        from app.infrastructure.parsers.pool import ProcessPoolTrackAnalyzer
+
+        return ProcessPoolTrackAnalyzer(workers=settings.IMPORT_WORKERS)
+
+    def track_analyzer(self, workers: int):
+        """Отдельный пул разбора со своим числом процессов (CLI-импорт); закрывает вызывающий."""
+        from app.infrastructure.parsers.pool import ProcessPoolTrackAnalyzer
+
+        return ProcessPoolTrackAnalyzer(workers=workers)
+
+    def init_storage(self, vector_index: bool = True) -> None:
+        """Инициализация при старте процесса: БД и (по желанию) коллекция Qdrant."""
+        from app.infrastructure.db.postgres import init_db
+
+        init_db()
+        if vector_index:
+            from app.infrastructure.db.qdrant import init_qdrant
+
+            init_qdrant(self.qdrant_client)
+
+    @contextmanager
+    def session(self) -> Iterator[Any]:
+        """Сессия БД на единицу работы (апдейт, запрос, задачу); engine создаётся при первой сессии."""
+        from app.infrastructure.db.postgres import get_session
+
+        with get_session() as s:
+            yield s
+
+    # --- Репозитории и use case'ы: на сессию ---
+
+    def vector_outbox_repo(self, s):
+        from app.infrastructure.repos.vector_outbox_repo_sql import VectorOutboxSQL
+
+        return VectorOutboxSQL(s)
+
+    def vector_outbox(self, s):
+        """Outbox в сессии репозитория признаков; None — запись в индекс напрямую (VECTOR_OUTBOX_ENABLED=false)."""
+        return self.vector_outbox_repo(s) if settings.VECTOR_OUTBOX_ENABLED else None
+
+    def ingest_job_queue(self, s):
+        from app.infrastructure.repos.ingest_job_repo_sql import IngestJobQueueSQL
+
+        return instrument(IngestJobQueueSQL(s), self.metrics)
+
+    def upsert_telegram_user(self, s):
+        from app.application.user import UpsertTelegramUserUseCase
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return UpsertTelegramUserUseCase(instrument(UserRepoSQL(s), self.metrics))
+
+    def ensure_user(self, s):
+        from app.application.user import EnsureUserUseCase
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return EnsureUserUseCase(instrument(UserRepoSQL(s), self.metrics))
+
+    def training_load(self, s):
+        from app.application.training import UpdateTrainingLoadUseCase
+        from app.infrastructure.repos.training_repo_sql import TrainingLoadRepoSQL
+
+        return UpdateTrainingLoadUseCase(
+            instrument(TrainingLoadRepoSQL(s), self.metrics),
+            threshold_speed_kilometers_per_hour=settings.TRAINING_LOAD_THRESHOLD_SPEED_KMH,
+        )
+
+    def ingest_track(self, s, metrics: Optional[Metrics] = None):
+        from app.application.track import IngestTrackUseCase
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL, TrackMetadataRepoSQL, UUIDGen
+
+        return IngestTrackUseCase(
+            storage=self.raw_storage,
+            id_gen=UUIDGen(),
+            detector=self.detector,
+            parser=self.parser,
+            meta_repo=instrument(TrackMetadataRepoSQL(s), self.metrics),
+            feature_extractor=self.feature_extractor,
+            features_repo=instrument(TrackFeaturesRepoSQL(s), self.metrics),
+            metrics=metrics or self.metrics,
+        )
+
+    def compute_track_features(self, s, metrics: Optional[Metrics] = None):
+        from app.application.track import ComputeAndIndexTrackFeaturesUseCase
+        from app.infrastructure.repos.best_effort_repo_sql import BestEffortsRepoSQL
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL
+
+        return ComputeAndIndexTrackFeaturesUseCase(
+            feature_extractor=self.feature_extractor,
+            features_repository=instrument(TrackFeaturesRepoSQL(s), self.metrics),
+            vector_index=self.vector_index,
+            track_vectorizer=self.vectorizer,
+            best_efforts_repository=instrument(BestEffortsRepoSQL(s), self.metrics),
+            training_load_use_case=self.training_load(s),
+            metrics=metrics or self.metrics,
+            vector_outbox=self.vector_outbox(s),
+        )
+
+    def enqueue_track_ingest(self, s, metrics: Optional[Metrics] = None):
+        from app.application.ingest_jobs import EnqueueTrackIngestUseCase
+        from app.infrastructure.repos.track_repo_sql import UUIDGen
+
+        return EnqueueTrackIngestUseCase(
+            storage=self.raw_storage,
+            id_gen=UUIDGen(),
+            detector=self.detector,
+            queue=self.ingest_job_queue(s),
+            max_attempts=settings.INGEST_JOB_MAX_ATTEMPTS,
+            metrics=metrics or self.metrics,
+        )
+
+    def process_ingest_jobs(self, s, handler, worker_id: str, batch_size: int):
+        from app.application.ingest_jobs import ProcessIngestJobsUseCase
+        from app.infrastructure.repos.ingest_job_repo_sql import IngestJobQueueSQL
+
+        return ProcessIngestJobsUseCase(
+            queue=IngestJobQueueSQL(s),
+            handler=handler,
+            worker_id=worker_id,
+            batch_size=batch_size,
+            visibility_timeout_seconds=settings.INGEST_JOB_VISIBILITY_TIMEOUT_SECONDS,
+            retry_base_seconds=settings.INGEST_JOB_RETRY_BASE_SECONDS,
+            retry_max_seconds=settings.INGEST_JOB_RETRY_MAX_SECONDS,
+            metrics=self.metrics,
+        )
+
+    def import_tracks(self, s, analyzer=None, checkpoint=None, batch_size: Optional[int] = None):
+        from app.application.bulk_import import ImportTracksUseCase
+        from app.infrastructure.repos.best_effort_repo_sql import BestEffortsRepoSQL
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL, TrackMetadataRepoSQL
+
+        return ImportTracksUseCase(
+            storage=self.raw_storage,
+            id_gen=self.content_id_gen,
+            analyzer=analyzer or self.analyzer,
+            meta_repo=instrument(TrackMetadataRepoSQL(s), self.metrics),
+            features_repo=instrument(TrackFeaturesRepoSQL(s), self.metrics),
+            vector_index=self.vector_index,
+            track_vectorizer=self.vectorizer,
+            best_efforts_repository=instrument(BestEffortsRepoSQL(s), self.metrics),
+            training_load_use_case=self.training_load(s),
+            checkpoint=checkpoint,
+            batch_size=batch_size or settings.IMPORT_BATCH_SIZE,
+            metrics=self.metrics,
+            vector_outbox=self.vector_outbox(s),
+        )
+
+    def backfill_track_features(self, s, batch_size: int):
+        from app.application.feature_backfill import BackfillTrackFeaturesUseCase
+        from app.infrastructure.repos.best_effort_repo_sql import BestEffortsRepoSQL
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL
+
+        return BackfillTrackFeaturesUseCase(
+            storage=self.raw_storage,
+            feature_extractor=self.feature_extractor,
+            features_repository=TrackFeaturesRepoSQL(s),
+            vector_index=self.vector_index,
+            track_vectorizer=self.vectorizer,
+            best_efforts_repository=BestEffortsRepoSQL(s),
+            training_load_use_case=self.training_load(s),
+            vector_outbox=self.vector_outbox(s),
+            batch_size=batch_size,
+            metrics=self.metrics,
+        )
+
+    def recommend_routes(self, s, metrics: Optional[Metrics] = None):
+        from app.application.track import RecommendRoutesUseCase
+        from app.infrastructure.repos.recommendation_repo_sql import RecommendationsRepoSQL
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return RecommendRoutesUseCase(
+            user_repo=instrument(UserRepoSQL(s), self.metrics),
+            features_repo=instrument(TrackFeaturesRepoSQL(s), self.metrics),
+            vectorizer=self.vectorizer,
+            vector_index=self.vector_index,
+            recommendations_repo=instrument(RecommendationsRepoSQL(s), self.metrics),
+            profile_builder=self.profile_builder,
+            metrics=metrics or self.metrics,
+        )
+
+    def precompute_recommendations(self, s, batch_size: int, top_k: int):
+        from app.application.track import PrecomputeRecommendationsUseCase
+        from app.infrastructure.repos.recommendation_repo_sql import RecommendationsRepoSQL
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return PrecomputeRecommendationsUseCase(
+            user_repo=UserRepoSQL(s),
+            features_repo=TrackFeaturesRepoSQL(s),
+            vectorizer=self.vectorizer,
+            vector_index=self.vector_index,
+            recommendations_repo=RecommendationsRepoSQL(s),
+            batch_size=batch_size,
+            top_k=top_k,
+            profile_builder=self.profile_builder,
+        )
+
+    def list_user_tracks(self, s):
+        from app.application.track import ListUserTracksUseCase
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return ListUserTracksUseCase(
+            user_repo=instrument(UserRepoSQL(s), self.metrics),
+            features_repo=instrument(TrackFeaturesRepoSQL(s), self.metrics),
+        )
+
+    def get_track_features(self, s):
+        from app.application.track import GetTrackFeaturesUseCase
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return GetTrackFeaturesUseCase(
+            user_repo=instrument(UserRepoSQL(s), self.metrics),
+            features_repo=instrument(TrackFeaturesRepoSQL(s), self.metrics),
+        )
+
+    def personal_records(self, s):
+        from app.application.track import GetPersonalRecordsUseCase
+        from app.infrastructure.repos.best_effort_repo_sql import BestEffortsRepoSQL
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return GetPersonalRecordsUseCase(user_repo=UserRepoSQL(s), best_efforts_repo=BestEffortsRepoSQL(s))
+
+    def training_form(self, s):
+        from app.application.training import GetTrainingFormUseCase
+        from app.infrastructure.repos.training_repo_sql import TrainingLoadRepoSQL
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return GetTrainingFormUseCase(user_repo=UserRepoSQL(s), training_repo=TrainingLoadRepoSQL(s))
+
+    def volume_stats(self, s):
+        from app.application.stats import GetVolumeStatsUseCase
+        from app.infrastructure.repos.stats_repo_sql import VolumeStatsRepoSQL
+        from app.infrastructure.repos.user_repo_sql import UserRepoSQL
+
+        return GetVolumeStatsUseCase(user_repo=UserRepoSQL(s), stats_repo=VolumeStatsRepoSQL(s))
+
+    def rebuild_volume_stats(self, s):
+        from app.application.stats import RebuildVolumeStatsUseCase
+        from app.infrastructure.repos.stats_repo_sql import VolumeStatsRepoSQL
+
+        return RebuildVolumeStatsUseCase(VolumeStatsRepoSQL(s))
+
+    def drain_vector_outbox(self, s):
+        from app.application.vector_outbox import DrainVectorOutboxUseCase
+
+        return DrainVectorOutboxUseCase(
+            outbox=self.vector_outbox_repo(s),
+            vector_index=self.vector_index,
+            batch_size=settings.VECTOR_OUTBOX_BATCH_SIZE,
+            retry_base_seconds=settings.VECTOR_OUTBOX_RETRY_BASE_SECONDS,
+            retry_max_seconds=settings.VECTOR_OUTBOX_RETRY_MAX_SECONDS,
+            max_attempts=settings.VECTOR_OUTBOX_MAX_ATTEMPTS,
+            metrics=self.metrics,
+        )
+
+    def reconcile_vector_index(self, s):
+        from app.application.vector_outbox import ReconcileVectorIndexUseCase
+        from app.infrastructure.repos.track_repo_sql import TrackFeaturesRepoSQL
+
+        return ReconcileVectorIndexUseCase(
+            features_repo=TrackFeaturesRepoSQL(s),
+            vector_index=self.vector_index,
+            track_vectorizer=self.vectorizer,
+        )
+
+
+# Контейнер процесса: создание ничего не подключает и не импортирует
+container = Container()
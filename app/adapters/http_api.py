@@ -0,0 +1,323 @@
+"""HTTP adapter (FastAPI).
+
+Responsibilities:
+- Translate HTTP requests into the same application commands the Telegram bot uses.
+- Stream uploads to a spooled temporary file (memory up to HTTP_SPOOL_MEMORY_BYTES,
+  disk beyond) instead of buffering request bodies in the event loop.
+- Run blocking use cases (SQLAlchemy sessions, parsing) in the threadpool.
+
+Endpoints (users are addressed by tg_id, the same key the bot uses):
+    POST /users/{tg_id}/tracks          multipart, field "file"
+    POST /users/{tg_id}/tracks/raw      raw body, ?filename=run.gpx
+    POST /users/{tg_id}/tracks/bulk     multipart, repeated field "files"
+    GET  /users/{tg_id}/tracks
+    GET  /users/{tg_id}/tracks/{track_id}
+    GET  /users/{tg_id}/recommendations
+    GET  /healthz, GET /metrics
+
+Constraints:
+- No domain logic. No direct ORM/SQL here (beyond calling init at startup).
+- Each uvicorn worker is a separate process with its own metrics registry;
+  /metrics reports the worker that served the scrape.
+
+Usage:
+    python -m app.adapters.http_api
+"""
+
+import logging
+import os
+import secrets
+import tempfile
+from contextlib import asynccontextmanager, contextmanager
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+import uvicorn
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+
+from app.adapters.container import container
+from app.adapters.outbox_drainer import start_background_drainer
+from app.application.track import IngestTrackCommand
+from app.config import settings
+from app.domain.models.track import (
+    ComputeAndIndexTrackFeaturesCommand,
+    GetTrackFeaturesCommand,
+    ListUserTracksCommand,
+    RecommendRoutesCommand,
+    TrackBytes,
+    TrackFormat,
+    TrackRejectedError,
+)
+from app.infrastructure.buffers import mapped_file
+from app.infrastructure.imports import maybe_gunzip
+from app.infrastructure.metrics import metrics
+from app.infrastructure.parsers.sniff import is_gzip
+
+logger = logging.getLogger(__name__)
+
+
+def require_token(authorization: Optional[str] = Header(default=None)) -> None:
+    """Bearer-токен из HTTP_API_TOKEN; без настройки API открыт (локальная разработка)."""
+    if not settings.HTTP_API_TOKEN:
+        return
+    if not authorization or not secrets.compare_digest(authorization, f"Bearer {settings.HTTP_API_TOKEN}"):
+        raise HTTPException(status_code=401, detail="invalid token")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Дренаж outbox — в каждом воркере uvicorn; одновременные дренажи безопасны
+    stop = start_background_drainer()
+    yield
+    if stop:
+        stop.set()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+api = Depends(require_token)
+
+
+def _check_content_length(request: Request, limit: int) -> None:
+    # Отсекаем заведомо большие тела до чтения; фактический размер проверяется при приёме
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit:
+        raise HTTPException(status_code=413, detail=f"body exceeds {limit} bytes")
+
+
+def _check_size(upload: UploadFile) -> None:
+    if upload.size is not None and upload.size > settings.HTTP_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"{upload.filename}: file exceeds {settings.HTTP_MAX_UPLOAD_BYTES} bytes"
+        )
+
+
+async def _form_uploads(request: Request, field: str, max_files: int) -> List[UploadFile]:
+    """Multipart-загрузки: Starlette пишет каждую часть в SpooledTemporaryFile по мере чтения тела."""
+    with metrics.stage("http.receive"):
+        form = await request.form(max_files=max_files)
+    uploads = [item for item in form.getlist(field) if isinstance(item, UploadFile)]
+    if not uploads:
+        raise HTTPException(status_code=422, detail=f'multipart field "{field}" with a file is required')
+    for upload in uploads:
+        _check_size(upload)
+    return uploads
+
+
+def _summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": row["id"],
+        "filename": row.get("filename"),
+        "format": row.get("format"),
+        "distance_km": row.get("distance_km"),
+        "duration_s": row.get("duration_s"),
+        "elevation_gain_m": row.get("elevation_gain_m"),
+        "created_at": row.get("created_at"),
+    }
+
+
+@contextmanager
+def _upload_buffer(stream: IO[bytes]) -> Iterator[TrackBytes]:
+    """Загрузка в памяти читается как есть; сброшенная на диск (больше HTTP_SPOOL_MEMORY_BYTES) — через mmap."""
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    if size <= settings.HTTP_SPOOL_MEMORY_BYTES:
+        yield stream.read()
+        return
+    with mapped_file(stream) as view:
+        yield view
+
+
+def _gunzip_upload(filename: str, blob: TrackBytes) -> Tuple[str, TrackBytes]:
+    """Сжатая загрузка (run.gpx.gz) распаковывается, как в массовом импорте; остальные — как есть."""
+    if not is_gzip(bytes(blob[:2])):
+        return filename, blob
+    name, unpacked = maybe_gunzip(filename, bytes(blob), settings.IMPORT_MAX_FILE_BYTES)
+    if unpacked is None:
+        raise TrackRejectedError(
+            f"файл больше {settings.IMPORT_MAX_FILE_BYTES // (1024 * 1024)} МБ после распаковки", reason="size"
+        )
+    if not unpacked:
+        raise TrackRejectedError("gzip повреждён или обрезан", reason="corrupt")
+    return name, unpacked
+
+
+def _ingest_files(tg_id: int, files: List[Tuple[str, IO[bytes]]]) -> List[Dict[str, Any]]:
+    """
+    Синхронная часть загрузки (в пуле потоков): сохранение, разбор, признаки и индексация.
+    Id трека — хэш пользователя и содержимого: трек сохраняется до расчёта признаков, и повтор
+    после сбоя дописывает тот же трек, а не создаёт дубликат.
+    """
+    results = []
+    with container.session() as s:
+        user_id = container.ensure_user(s).execute(tg_id)
+        ingest = container.ingest_track(s)
+        features = container.compute_track_features(s)
+
+        for filename, stream in files:
+            with _upload_buffer(stream) as blob:
+                try:
+                    filename, blob = _gunzip_upload(filename, blob)
+                    row = ingest.execute(
+                        IngestTrackCommand(
+                            user_id=user_id,
+                            filename=filename,
+                            blob=blob,
+                            source="http",
+                            track_id=container.content_id_gen.id_for(user_id, blob),
+                        )
+                    )
+                    features.execute(
+                        ComputeAndIndexTrackFeaturesCommand(
+                            track_id=row["id"],
+                            track_format=TrackFormat(row["format"]),
+                            file_bytes=blob,
+                            user_id=user_id,
+                        )
+                    )
+                except ValueError as e:
+                    s.rollback()
+                    results.append({"filename": filename, "error": str(e)})
+                    continue
+                except Exception as e:
+                    # БД, индекс, диск: файл можно прислать повторно, остальные файлы пачки не теряются
+                    logger.exception("ingest of %s failed", filename)
+                    s.rollback()
+                    results.append({"filename": filename, "error": type(e).__name__, "retryable": True})
+                    continue
+            results.append(_summary(row))
+    return results
+
+
+def _single_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Результат загрузки одного файла: отклонённый файл — 422, сбой инфраструктуры — 500."""
+    if "error" in result:
+        raise HTTPException(status_code=500 if result.get("retryable") else 422, detail=result["error"])
+    return result
+
+
+@app.get("/healthz")
+async def healthz() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/users/{tg_id}/tracks", status_code=201, dependencies=[api])
+async def upload_track(tg_id: int, request: Request) -> Dict[str, Any]:
+    """Один трек, multipart-поле "file"."""
+    _check_content_length(request, settings.HTTP_MAX_UPLOAD_BYTES + 64 * 1024)
+    uploads = await _form_uploads(request, "file", max_files=1)
+    try:
+        [result] = await run_in_threadpool(_ingest_files, tg_id, [(uploads[0].filename or "unknown", uploads[0].file)])
+    finally:
+        await uploads[0].close()
+    return _single_result(result)
+
+
+@app.post("/users/{tg_id}/tracks/raw", status_code=201, dependencies=[api])
+async def upload_track_raw(tg_id: int, request: Request, filename: str = Query(...)) -> Dict[str, Any]:
+    """Один трек телом запроса без multipart (меньше накладных расходов для мобильных клиентов)."""
+    _check_content_length(request, settings.HTTP_MAX_UPLOAD_BYTES)
+    upload = UploadFile(
+        file=tempfile.SpooledTemporaryFile(max_size=settings.HTTP_SPOOL_MEMORY_BYTES),
+        size=0,
+        filename=filename,
+    )
+    try:
+        with metrics.stage("http.receive"):
+            async for chunk in request.stream():
+                if upload.size + len(chunk) > settings.HTTP_MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"body exceeds {settings.HTTP_MAX_UPLOAD_BYTES} bytes")
+                # UploadFile.write уходит в пул потоков, как только буфер сброшен на диск
+                await upload.write(chunk)
+        if not upload.size:
+            raise HTTPException(status_code=422, detail="empty body")
+        [result] = await run_in_threadpool(_ingest_files, tg_id, [(filename, upload.file)])
+    finally:
+        await upload.close()
+    return _single_result(result)
+
+
+@app.post("/users/{tg_id}/tracks/bulk", dependencies=[api])
+async def upload_tracks_bulk(tg_id: int, request: Request) -> Dict[str, Any]:
+    """Пачка треков (повторяющееся поле "files"); ошибка одного файла не отменяет остальные."""
+    _check_content_length(request, settings.HTTP_MAX_UPLOAD_BYTES * settings.HTTP_MAX_BULK_FILES)
+    uploads = await _form_uploads(request, "files", max_files=settings.HTTP_MAX_BULK_FILES)
+    try:
+        results = await run_in_threadpool(
+            _ingest_files, tg_id, [(upload.filename or "unknown", upload.file) for upload in uploads]
+        )
+    finally:
+        for upload in uploads:
+            await upload.close()
+    return {
+        "accepted": sum(1 for r in results if "error" not in r),
+        "rejected": sum(1 for r in results if "error" in r),
+        "results": results,
+    }
+
+
+def _list_tracks(tg_id: int) -> List[Dict[str, Any]]:
+    with container.session() as s:
+        return container.list_user_tracks(s).execute(ListUserTracksCommand(tg_id=tg_id))
+
+
+def _get_track(tg_id: int, track_id: str) -> Optional[Dict[str, Any]]:
+    with container.session() as s:
+        return container.get_track_features(s).execute(GetTrackFeaturesCommand(tg_id=tg_id, track_id=track_id))
+
+
+def _recommend(cmd: RecommendRoutesCommand) -> List[Dict[str, Any]]:
+    with container.session() as s:
+        return container.recommend_routes(s).execute(cmd)
+
+
+@app.get("/users/{tg_id}/tracks", dependencies=[api])
+async def list_tracks(tg_id: int) -> Dict[str, Any]:
+    return {"tracks": await run_in_threadpool(_list_tracks, tg_id)}
+
+
+@app.get("/users/{tg_id}/tracks/{track_id}", dependencies=[api])
+async def get_track(tg_id: int, track_id: str) -> Dict[str, Any]:
+    features = await run_in_threadpool(_get_track, tg_id, track_id)
+    if features is None:
+        raise HTTPException(status_code=404, detail="track not found")
+    return features
+
+
+@app.get("/users/{tg_id}/recommendations", dependencies=[api])
+async def recommendations(
+    tg_id: int,
+    top_k: int = Query(3, ge=1, le=50),
+    include_other_users: bool = True,
+    mode: Optional[str] = Query(None, pattern="^(vector|hybrid)$"),
+) -> Dict[str, Any]:
+    cmd = RecommendRoutesCommand(
+        tg_id=tg_id,
+        top_k=top_k,
+        include_other_users=include_other_users,
+        mode=mode or settings.RECOMMEND_SEARCH_MODE,
+    )
+    return {"recommendations": await run_in_threadpool(_recommend, cmd)}
+
+
+def main():
+    # Инициализация один раз в родительском процессе; воркеры только импортируют app
+    container.init_storage()
+    uvicorn.run(
+        "app.adapters.http_api:app",
+        host=settings.HTTP_HOST,
+        port=settings.HTTP_PORT,
+        workers=settings.HTTP_WORKERS,
+        loop="uvloop",
+        http="httptools",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Vector outbox drainer.
+
+Responsibilities:
+- Deliver ``vector_outbox`` entries to the vector index in batches: in a
+  background thread of the bot / HTTP API / ingest worker, or as a standalone
+  process (``python -m app.adapters.cli drain-vector-outbox --follow``).
+
+Constraints:
+- Any number of drainers may run at once: entries are claimed with
+  ``FOR UPDATE SKIP LOCKED`` (Postgres), so every batch goes to the index once.
+- Delivery is at-least-once; upserts and deletes by track id are idempotent.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from app.adapters.container import container
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def drain_once() -> int:
+    with container.session() as s:
+        delivered = container.drain_vector_outbox(s).execute()
+        container.metrics.gauge("vector_outbox_pending", container.vector_outbox_repo(s).pending())
+    return delivered
+
+
+def drain_forever(stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            delivered = drain_once()
+        except Exception as e:  # БД недоступна — пробуем на следующем круге
+            logger.warning("vector outbox drainer: %s: %s", type(e).__name__, e)
+            delivered = 0
+        # Полная пачка — в outbox, скорее всего, есть ещё: забираем без паузы
+        if delivered < settings.VECTOR_OUTBOX_BATCH_SIZE:
+            stop.wait(settings.VECTOR_OUTBOX_POLL_SECONDS)
+
+
+def start_background_drainer() -> Optional[threading.Event]:
+    """Фоновый поток дренажа в текущем процессе; возвращает событие остановки (None — outbox выключен)."""
+    if not settings.VECTOR_OUTBOX_ENABLED:
+        return None
+    stop = threading.Event()
+    threading.Thread(target=drain_forever, args=(stop,), name="vector-outbox", daemon=True).start()
+    return stop
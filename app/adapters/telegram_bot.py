@@ -2,43 +2,77 @@
 
 Responsibilities:
 - Translate Telegram updates into application commands and return responses.
-- Compose and inject infrastructure implementations into use cases.
+- Take use cases from the process container (app.adapters.container): engines,
+  clients and parsers are built on the first update that needs them.
 
 Constraints:
 - No domain logic. No direct ORM/SQL here (beyond calling init at startup).
+- Updates are processed concurrently (TELEGRAM_CONCURRENT_UPDATES); blocking use
+  cases run in a thread pool so one slow upload does not stall other chats.
+- With INGEST_MODE=queue an upload is only stored and enqueued (ingest_jobs);
+  parsing and indexing run in app.adapters.worker processes.
+- Uploads and imports pass admission control (ADMISSION_*): bounded in flight,
+  per user and in the queue, round-robin across users; commands bypass it.
 """
 
+import asyncio
 import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
 
-from app.application.track import (
-    ComputeAndIndexTrackFeaturesUseCase,
-    IngestTrackCommand,
-    IngestTrackUseCase,
-    RecommendRoutesUseCase,
+from app.adapters.admission import AdmissionController, AdmissionRejected, Ticket
+from app.adapters.container import container
+from app.adapters.outbox_drainer import start_background_drainer
+from app.application.bulk_import import ImportProgress, ImportTracksCommand
+from app.application.track import IngestTrackCommand
+from app.config import settings
+from app.domain.models.stats import GetVolumeStatsCommand
+from app.domain.models.track import (
+    ComputeAndIndexTrackFeaturesCommand,
+    GetPersonalRecordsCommand,
+    RecommendRoutesCommand,
+    TrackBytes,
+    TrackFormat,
+    TrackRejectedError,
 )
-from app.application.user import UpsertTelegramUserUseCase
-from app.domain.models.track import ComputeAndIndexTrackFeaturesCommand, RecommendRoutesCommand, TrackFormat
-from app.infrastructure.db.postgres import get_session, init_db
-from app.infrastructure.db.qdrant import init_qdrant
-from app.infrastructure.parsers.parser_impl import TrackFeatureExtractorImpl, TrackParserImpl
-from app.infrastructure.repos.track_repo_qdrant import TrackVectorIndexQdrant
-from app.infrastructure.repos.track_repo_sql import (
-    LocalFSStorage,
-    SimpleFormatDetector,
-    TrackFeaturesRepoSQL,
-    TrackMetadataRepoSQL,
-    UUIDGen,
+from app.domain.models.training import GetTrainingFormCommand
+from app.infrastructure.buffers import mapped_file
+from app.infrastructure.imports import JsonFileImportCheckpoint, iter_archive_tracks, maybe_gunzip
+from app.infrastructure.metrics import metrics, start_metrics_server
+from app.infrastructure.parsers.sniff import is_gzip
+from app.infrastructure.profiling import ProfileSession, RequestProfiler
+
+profiler = RequestProfiler(
+    metrics,
+    output_dir=settings.PROFILING_OUTPUT_DIR,
+    enabled=settings.PROFILING_ENABLED,
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+)
+# Загрузки и импорт — через общий контроль допуска: одна пачка файлов не занимает весь бот
+admission = AdmissionController(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    per_user=settings.ADMISSION_PER_USER,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    metrics=metrics,
 )
-from app.infrastructure.repos.user_repo_sql import UserRepoSQL
-from app.infrastructure.vectorize.track import HandcraftedTrackVectorizer
+# Документы из одной группы (media_group_id) приходят отдельными апдейтами — копим их до паузы
+media_groups: Dict[str, List[Update]] = {}
 
-load_dotenv()
-TOKEN = os.getenv("TELEGRAM_TOKEN")
-parser = TrackParserImpl()
+
+async def _blocking(session: ProfileSession, fn, *args):
+    """
+    Синхронные use case'ы (SQL, разбор) — в пуле потоков, чтобы не держать цикл событий
+    при параллельной обработке апдейтов. У профилируемого запроса cProfile включается там же,
+    в рабочем потоке, только на время вызова.
+    """
+    return await asyncio.to_thread(session.call, fn, *args)
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -46,44 +80,134 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def handle_document(update, context):
-    doc = update.message.document
-    file = await context.bot.get_file(doc.file_id)
-    blob = await file.download_as_bytearray()
-    user = update.effective_user
+    filename = (update.message.document.file_name or "").lower()
+    if update.message.media_group_id and not filename.endswith(".zip"):
+        # Группа копится без слота и встаёт в очередь допуска целиком при сбросе
+        await _collect_media_group(update, context)
+        return
+    await _admitted(update, context, lambda: _process_document(update, context, filename))
 
-    with get_session() as s:
-        user_id = UpsertTelegramUserUseCase(UserRepoSQL(s)).execute(user)
-
-        usecase = IngestTrackUseCase(
-            storage=LocalFSStorage("./data/uploads"),
-            id_gen=UUIDGen(),
-            detector=SimpleFormatDetector(),
-            parser=parser,
-            meta_repo=TrackMetadataRepoSQL(s),
-            feature_extractor=TrackFeatureExtractorImpl(),
-            features_repo=TrackFeaturesRepoSQL(s),
-        )
-        row = usecase.execute(
+
+async def _process_document(update, context, filename: str) -> None:
+    if filename.endswith(".zip"):
+        await _handle_archive(update, context)
+    elif filename.endswith(".gz"):
+        await _handle_gzipped(update, context)
+    else:
+        with profiler.session("handle_document", update.effective_user.id) as session:
+            await _handle_document(update, context, session)
+
+
+async def _admitted(update, context, job: Callable[[], Awaitable[None]]) -> None:
+    """
+    Тяжёлая обработка через контроль допуска. Допущенная сразу выполняется в обработчике;
+    поставленная в очередь — фоновой задачей, чтобы ожидание не занимало слот concurrent_updates
+    и не задерживало апдейты других пользователей.
+    """
+    try:
+        ticket = admission.enqueue(update.effective_user.id)
+    except AdmissionRejected:
+        await update.message.reply_text("🚦 Сейчас слишком много загрузок — пришлите файл через пару минут.")
+        return
+    if not ticket.position:
+        async with admission.slot(ticket):
+            await job()
+        return
+    context.application.create_task(_run_admitted(ticket, job), update=update)
+    await update.message.reply_text(f"⏳ В очереди, позиция {ticket.position}")
+
+
+async def _run_admitted(ticket: Ticket, job: Callable[[], Awaitable[None]]) -> None:
+    async with admission.slot(ticket):
+        await job()
+
+
+def _ingest_document(tg_user, filename: Optional[str], blob: TrackBytes, session: ProfileSession) -> Dict:
+    """Синхронная часть загрузки: сохранение, разбор, признаки и индексация."""
+    with container.session() as s:
+        user_id = container.upsert_telegram_user(s).execute(tg_user)
+        row = container.ingest_track(s, session.metrics).execute(
             IngestTrackCommand(
                 user_id=user_id,
-                filename=doc.file_name or "unknown",
-                blob=bytes(blob),
+                filename=filename or "unknown",
+                blob=blob,
                 source="telegram",
             )
         )
-        features_use_case = ComputeAndIndexTrackFeaturesUseCase(
-            feature_extractor=TrackFeatureExtractorImpl(),
-            features_repository=TrackFeaturesRepoSQL(s),
-            vector_index=TrackVectorIndexQdrant(),
-            track_vectorizer=HandcraftedTrackVectorizer(),
-        )
-        features_use_case.execute(
+        session.tag(track_id=row["id"], filename=row.get("filename"))
+        container.compute_track_features(s, session.metrics).execute(
             ComputeAndIndexTrackFeaturesCommand(
                 track_id=row["id"],
                 track_format=TrackFormat(row["format"]),
-                file_bytes=bytes(blob),
+                file_bytes=blob,
+                user_id=user_id,
             )
         )
+    return row
+
+
+def _enqueue_document(
+    tg_user, chat_id: int, filename: Optional[str], blob: TrackBytes, session: ProfileSession
+) -> Dict:
+    """Режим очереди: только сохранить файл и поставить задачу; разбор — в app.adapters.worker."""
+    with container.session() as s:
+        user_id = container.upsert_telegram_user(s).execute(tg_user)
+        return container.enqueue_track_ingest(s, session.metrics).execute(
+            IngestTrackCommand(user_id=user_id, filename=filename or "unknown", blob=blob, source="telegram"),
+            notify_chat_id=chat_id,
+        )
+
+
+@asynccontextmanager
+async def _document_buffer(doc, context, session: ProfileSession) -> AsyncIterator[TrackBytes]:
+    """
+    Содержимое документа без копий: до TELEGRAM_SPOOL_MEMORY_BYTES — memoryview поверх скачанного bytearray,
+    крупнее — скачивается во временный файл и отдаётся через mmap (в куче не лежит целиком).
+    """
+    file = await context.bot.get_file(doc.file_id)
+    if (doc.file_size or 0) <= settings.TELEGRAM_SPOOL_MEMORY_BYTES:
+        with session.metrics.stage("telegram.download"):
+            blob = await file.download_as_bytearray()
+        yield memoryview(blob)
+        return
+    with tempfile.TemporaryDirectory(prefix="run366-upload-") as workdir:
+        with session.metrics.stage("telegram.download"):
+            path = await file.download_to_drive(os.path.join(workdir, "upload"))
+        with mapped_file(path) as view:
+            yield view
+
+
+async def _handle_document(update, context, session: ProfileSession):
+    doc = update.message.document
+    gunzipped = None
+    try:
+        async with _document_buffer(doc, context, session) as blob:
+            if is_gzip(bytes(blob[:2])):
+                # gzip без .gz в имени — распаковка и разбор тем же путём, что и run.fit.gz
+                gunzipped = maybe_gunzip(doc.file_name or "unknown", bytes(blob), settings.IMPORT_MAX_FILE_BYTES)
+            elif settings.INGEST_MODE == "queue":
+                job = await _blocking(
+                    session,
+                    _enqueue_document,
+                    update.effective_user,
+                    update.effective_chat.id,
+                    doc.file_name,
+                    blob,
+                    session,
+                )
+            else:
+                row = await _blocking(session, _ingest_document, update.effective_user, doc.file_name, blob, session)
+    except TrackRejectedError as e:
+        await update.message.reply_text(f"❌ Не удалось загрузить {doc.file_name or 'файл'}: {e}")
+        return
+    if gunzipped is not None:
+        await _import_with_progress(update, [gunzipped], checkpoint=None)
+        return
+    if settings.INGEST_MODE == "queue":
+        await update.message.reply_text(
+            f"📥 Принято: {job['filename']} ({job['format']}), обрабатываю — пришлю результат.\nID: {job['track_id']}"
+        )
+        return
     await update.message.reply_text(
         "✅ Сохранено: {filename} ({format})\n"
         "Дистанция: {distance} км, Длительность: {duration} c, Набор: {gain} м\n"
@@ -98,53 +222,287 @@ async def handle_document(update, context):
     )
 
 
+def _run_import(
+    tg_user,
+    files,
+    checkpoint: Optional[JsonFileImportCheckpoint],
+    on_progress,
+) -> ImportProgress:
+    """Синхронная часть массового импорта: выполняется в отдельном потоке, разбор — в пуле процессов."""
+    with container.session() as s:
+        user_id = container.upsert_telegram_user(s).execute(tg_user)
+        return container.import_tracks(s, checkpoint=checkpoint).execute(
+            ImportTracksCommand(user_id=user_id, files=files, source="telegram-import"), on_progress
+        )
+
+
+def _progress_text(progress: ImportProgress, done: bool = False) -> str:
+    text = (
+        f"{'✅ Импорт завершён' if done else '⏳ Импорт'}: обработано {progress.processed}, "
+        f"загружено {progress.imported}, повторов {progress.duplicates}, отклонено {progress.rejected}"
+    )
+    if done and progress.errors:
+        text += "\n\nНе удалось разобрать:\n" + "\n".join(f"• {name}: {error}" for name, error in progress.errors)
+    return text
+
+
+async def _import_with_progress(update, files, checkpoint: Optional[JsonFileImportCheckpoint]) -> None:
+    status = await update.message.reply_text("⏳ Импорт начат…")
+    loop = asyncio.get_running_loop()
+    last_report = [time.monotonic()]
+
+    def on_progress(progress: ImportProgress) -> None:
+        # Вызывается из потока импорта после каждой пачки; правим сообщение не чаще раза в 5 с
+        if time.monotonic() - last_report[0] >= 5.0:
+            last_report[0] = time.monotonic()
+            asyncio.run_coroutine_threadsafe(status.edit_text(_progress_text(progress)), loop)
+
+    progress = await asyncio.to_thread(_run_import, update.effective_user, files, checkpoint, on_progress)
+    await update.message.reply_text(_progress_text(progress, done=True))
+
+
+async def _handle_archive(update, context):
+    """ZIP-экспорт Strava/Garmin: записи читаются из архива по одной, без распаковки на диск."""
+    doc = update.message.document
+    # file_unique_id одинаков для одного и того же файла — повторная отправка продолжит импорт
+    checkpoint = JsonFileImportCheckpoint(os.path.join(settings.IMPORT_CHECKPOINT_DIR, f"{doc.file_unique_id}.json"))
+    with tempfile.TemporaryDirectory(prefix="run366-import-") as workdir:
+        with metrics.stage("telegram.download"):
+            file = await context.bot.get_file(doc.file_id)
+            path = await file.download_to_drive(os.path.join(workdir, "export.zip"))
+        files = iter_archive_tracks(str(path), settings.IMPORT_MAX_FILE_BYTES, skip=checkpoint.done())
+        await _import_with_progress(update, files, checkpoint)
+
+
+async def _download_track(document, context) -> Tuple[str, Optional[bytes]]:
+    file = await context.bot.get_file(document.file_id)
+    blob = bytes(await file.download_as_bytearray())
+    return maybe_gunzip(document.file_name or "unknown", blob, settings.IMPORT_MAX_FILE_BYTES)
+
+
+async def _handle_gzipped(update, context):
+    """Одиночный run.fit.gz — как в экспортах Strava; идёт тем же путём, что и импорт."""
+    with metrics.stage("telegram.download"):
+        files = [await _download_track(update.message.document, context)]
+    await _import_with_progress(update, files, checkpoint=None)
+
+
+async def _collect_media_group(update, context):
+    group_id = update.message.media_group_id
+    updates = media_groups.setdefault(group_id, [])
+    updates.append(update)
+    if len(updates) == 1:
+        context.application.create_task(_flush_media_group(group_id, context))
+
+
+async def _flush_media_group(group_id: str, context) -> None:
+    await asyncio.sleep(settings.TELEGRAM_MEDIA_GROUP_WAIT_SECONDS)
+    updates = media_groups.pop(group_id, [])
+    if not updates:
+        return
+
+    async def job() -> None:
+        with metrics.stage("telegram.download"):
+            files = await asyncio.gather(*(_download_track(update.message.document, context) for update in updates))
+        await _import_with_progress(updates[0], files, checkpoint=None)
+
+    await _admitted(updates[0], context, job)
+
+
 async def handle_recommend(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /recommend."""
-    user = update.effective_user
+    with profiler.session("handle_recommend", update.effective_user.id) as session:
+        await _handle_recommend(update, context, session)
 
-    with get_session() as s:
-        use_case = RecommendRoutesUseCase(
-            user_repo=UserRepoSQL(s),
-            features_repo=TrackFeaturesRepoSQL(s),
-            vectorizer=HandcraftedTrackVectorizer(),
-            vector_index=TrackVectorIndexQdrant(),
-        )
 
+def _recommend_routes(tg_id: int, session: ProfileSession) -> List[Dict]:
+    with container.session() as s:
         # Выполняем команду (передаём только tg_id!)
-        recommendations = use_case.execute(
+        return container.recommend_routes(s, session.metrics).execute(
             RecommendRoutesCommand(
-                tg_id=user.id,
+                tg_id=tg_id,
                 top_k=3,
                 include_other_users=True,
+                mode=settings.RECOMMEND_SEARCH_MODE,
             )
         )
 
-        if not recommendations:
-            await update.message.reply_text("🤷‍♂️ Пока нет данных для рекомендаций.\nЗагрузите больше треков!")
-            return
-        # Форматируем ответ
-        response = "🎯 **Рекомендованные маршруты:**\n\n"
-        for i, rec in enumerate(recommendations, 1):
-            response += (
-                f"**{i}. Track ID:** `{rec['track_id']}`\n"
-                f"   📊 Сходство между вашими привычками и найденным треком: {rec['score'] * 100:.1f}%\n"
-                f"   📏 Дистанция: {rec['payload'].get('distance', '?')} км\n"
-                f"   ⛰ Рельеф: {rec['payload'].get('terrain', '?')}\n"
-                f"   🛣 Маршрут: {rec['payload'].get('route', '?')}\n\n"
-            )
 
-        await update.message.reply_text(response, parse_mode="Markdown")
+async def _handle_recommend(update: Update, context: ContextTypes.DEFAULT_TYPE, session: ProfileSession):
+    recommendations = await _blocking(session, _recommend_routes, update.effective_user.id, session)
 
+    if not recommendations:
+        await update.message.reply_text("🤷‍♂️ Пока нет данных для рекомендаций.\nЗагрузите больше треков!")
+        return
+    # Форматируем ответ
+    response = "🎯 **Рекомендованные маршруты:**\n\n"
+    for i, rec in enumerate(recommendations, 1):
+        response += (
+            f"**{i}. Track ID:** `{rec['track_id']}`\n"
+            f"   📊 Сходство между вашими привычками и найденным треком: {rec['score'] * 100:.1f}%\n"
+            f"   📏 Дистанция: {rec['payload'].get('distance', '?')} км\n"
+            f"   ⛰ Рельеф: {rec['payload'].get('terrain', '?')}\n"
+            f"   🛣 Маршрут: {rec['payload'].get('route', '?')}\n\n"
+        )
 
-def main():
-    init_db()
-    init_qdrant()
-    app = Application.builder().token(TOKEN).build()
+    await update.message.reply_text(response, parse_mode="Markdown")
+
+
+BEST_EFFORT_TITLES = {
+    "1k": "1 км",
+    "5k": "5 км",
+    "10k": "10 км",
+    "half_marathon": "Полумарафон",
+}
+
+
+def _format_duration(seconds: float) -> str:
+    total = int(round(seconds))
+    hours, rest = divmod(total, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def _personal_records(tg_id: int) -> List[Dict]:
+    with container.session() as s:
+        return container.personal_records(s).execute(GetPersonalRecordsCommand(tg_id=tg_id))
+
+
+async def handle_records(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /records."""
+    records = await asyncio.to_thread(_personal_records, update.effective_user.id)
+
+    if not records:
+        await update.message.reply_text("🤷‍♂️ Пока нет личных рекордов.\nЗагрузите трек с отметками времени!")
+        return
+
+    response = "🏆 **Личные рекорды:**\n\n"
+    for rec in records:
+        pace = rec["elapsed_seconds"] / (rec["distance_meters"] / 1000.0)
+        response += (
+            f"**{BEST_EFFORT_TITLES.get(rec['distance_label'], rec['distance_label'])}:** "
+            f"{_format_duration(rec['elapsed_seconds'])} ({_format_duration(pace)}/км)\n"
+        )
+    await update.message.reply_text(response, parse_mode="Markdown")
+
+
+def _training_form(tg_id: int) -> Optional[Dict]:
+    with container.session() as s:
+        return container.training_form(s).execute(
+            GetTrainingFormCommand(tg_id=tg_id, today=datetime.now(timezone.utc).date())
+        )
+
+
+async def handle_form(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /form."""
+    form = await asyncio.to_thread(_training_form, update.effective_user.id)
+
+    if not form:
+        await update.message.reply_text("🤷‍♂️ Пока нет данных о нагрузке.\nЗагрузите трек с отметками времени!")
+        return
+
+    await update.message.reply_text(
+        "📈 **Форма на {day}:**\n\n"
+        "Острая нагрузка (ATL, 7 дн.): {atl}\n"
+        "Хроническая нагрузка (CTL, 42 дн.): {ctl}\n"
+        "Баланс (TSB = CTL − ATL): {tsb}\n"
+        "Последняя тренировка: {last}".format(
+            day=form["day"],
+            atl=form["acute_load"],
+            ctl=form["chronic_load"],
+            tsb=form["training_stress_balance"],
+            last=form["last_activity_day"],
+        ),
+        parse_mode="Markdown",
+    )
+
+
+def _volume_stats(tg_id: int) -> Dict:
+    with container.session() as s:
+        return container.volume_stats(s).execute(GetVolumeStatsCommand(tg_id=tg_id))
+
+
+async def handle_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /stats."""
+    stats = await asyncio.to_thread(_volume_stats, update.effective_user.id)
+
+    if not stats["weekly"] and not stats["monthly"]:
+        await update.message.reply_text("🤷‍♂️ Пока нет статистики.\nЗагрузите трек с отметками времени!")
+        return
+
+    def _format_rows(rows):
+        return "".join(
+            f"`{r['period']}`: {r['distance_kilometers']:.1f} км, "
+            f"{_format_duration(r['moving_duration_seconds'])} в движении, "
+            f"+{r['elevation_gain_meters']:.0f} м, тренировок: {r['activity_count']}\n"
+            for r in rows
+        )
+
+    response = "📊 **По неделям:**\n" + _format_rows(stats["weekly"])
+    response += "\n🗓 **По месяцам:**\n" + _format_rows(stats["monthly"])
+    await update.message.reply_text(response, parse_mode="Markdown")
+
+
+async def handle_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Админская команда /profile [tg_id]: профилировать следующий запрос пользователя."""
+    user = update.effective_user
+    if user.id not in settings.ADMIN_TG_IDS:
+        await update.message.reply_text("⛔ Команда доступна только администраторам.")
+        return
+
+    try:
+        target = int(context.args[0]) if context.args else user.id
+    except ValueError:
+        await update.message.reply_text("Использование: /profile [tg_id]")
+        return
+
+    profiler.arm(target)
+    await update.message.reply_text(
+        f"🔬 Следующий запрос пользователя {target} будет профилирован.\n"
+        f"Отчёт (.prof и .json) появится в {settings.PROFILING_OUTPUT_DIR}"
+    )
+
+
+async def _post_init(application: Application) -> None:
+    # asyncio.to_thread берёт пул потоков цикла по умолчанию — по потоку на одновременный апдейт
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.TELEGRAM_CONCURRENT_UPDATES, thread_name_prefix="bot-handler")
+    )
+    start_background_drainer()
+
+
+def build_application(webhook: bool = False) -> Application:
+    """Приложение с обработчиками; для webhook без Updater — апдейты подаёт ASGI-приложение."""
+    builder = (
+        Application.builder()
+        .token(settings.TELEGRAM_TOKEN)
+        .concurrent_updates(settings.TELEGRAM_CONCURRENT_UPDATES)
+        .post_init(_post_init)
+    )
+    if webhook:
+        builder = builder.updater(None)
+    app = builder.build()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("recommend", handle_recommend))
+    app.add_handler(CommandHandler("records", handle_records))
+    app.add_handler(CommandHandler("form", handle_form))
+    app.add_handler(CommandHandler("stats", handle_stats))
+    app.add_handler(CommandHandler("profile", handle_profile))
     app.add_handler(MessageHandler(filters.COMMAND, start))
     app.add_handler(MessageHandler(filters.Document.ALL, handle_document))
-    app.run_polling()
+    return app
+
+
+def main():
+    container.init_storage()
+    if settings.TELEGRAM_MODE == "webhook":
+        from app.adapters.telegram_webhook import serve
+
+        serve()
+        return
+    if settings.METRICS_PORT:
+        start_metrics_server(metrics, settings.METRICS_HOST, settings.METRICS_PORT)
+    build_application().run_polling()
 
 
 if __name__ == "__main__":
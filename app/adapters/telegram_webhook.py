@@ -0,0 +1,103 @@
+"""Telegram webhook adapter (ASGI).
+
+Responsibilities:
+- Receive updates from Telegram over HTTPS (behind a reverse proxy / load
+  balancer) and hand them to the same handlers as polling mode.
+- Register the webhook once at startup when TELEGRAM_WEBHOOK_URL is set.
+- Build the bot application in the ASGI lifespan, so importing the module
+  needs no token and has no side effects.
+
+Constraints:
+- Updates are acknowledged as soon as they are queued; handlers run
+  concurrently up to TELEGRAM_CONCURRENT_UPDATES per worker.
+- Workers (and replicas) share nothing in memory: documents of one media group
+  that land on different workers are imported as separate groups.
+
+Usage:
+    TELEGRAM_MODE=webhook python -m app.adapters.telegram_bot
+    curl -X POST http://127.0.0.1:8081/telegram/webhook \\
+        -H "Content-Type: application/json" \\
+        -H "X-Telegram-Bot-Api-Secret-Token: $TELEGRAM_WEBHOOK_SECRET" \\
+        -d @update.json
+"""
+
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from telegram import Bot, Update
+
+from app.adapters.telegram_bot import build_application
+from app.config import settings
+from app.infrastructure.metrics import metrics
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bot_app = app.state.bot_app = build_application(webhook=True)
+    async with bot_app:
+        # post_init вызывают только run_polling/run_webhook — здесь запускаем его сами
+        await bot_app.post_init(bot_app)
+        await bot_app.start()
+        yield
+        await bot_app.stop()
+
+
+app = FastAPI(lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+
+
+@app.post(settings.TELEGRAM_WEBHOOK_PATH)
+async def telegram_webhook(request: Request) -> Response:
+    if settings.TELEGRAM_WEBHOOK_SECRET and not secrets.compare_digest(
+        request.headers.get(SECRET_HEADER, ""), settings.TELEGRAM_WEBHOOK_SECRET
+    ):
+        raise HTTPException(status_code=403, detail="invalid secret token")
+    try:
+        data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid JSON")
+    bot_app = request.app.state.bot_app
+    with metrics.stage("telegram.webhook_enqueue"):
+        await bot_app.update_queue.put(Update.de_json(data, bot_app.bot))
+    return Response(status_code=200)
+
+
+@app.get("/healthz")
+async def healthz() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def _set_webhook() -> None:
+    async with Bot(settings.TELEGRAM_TOKEN) as bot:
+        await bot.set_webhook(
+            url=settings.TELEGRAM_WEBHOOK_URL,
+            secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=settings.TELEGRAM_WEBHOOK_MAX_CONNECTIONS,
+        )
+
+
+def serve() -> None:
+    # Вебхук регистрируется один раз до запуска воркеров; реплики за балансировщиком
+    # могут запускаться без TELEGRAM_WEBHOOK_URL
+    if settings.TELEGRAM_WEBHOOK_URL:
+        asyncio.run(_set_webhook())
+    uvicorn.run(
+        "app.adapters.telegram_webhook:app",
+        host=settings.TELEGRAM_WEBHOOK_HOST,
+        port=settings.TELEGRAM_WEBHOOK_PORT,
+        workers=settings.TELEGRAM_WEBHOOK_WORKERS,
+        loop="uvloop",
+        http="httptools",
+    )
@@ -0,0 +1,187 @@
+"""Ingest worker adapter.
+
+Responsibilities:
+- Claim jobs from ``ingest_jobs`` (``SELECT ... FOR UPDATE SKIP LOCKED``) and run
+  IngestTrackUseCase + ComputeAndIndexTrackFeaturesUseCase against the raw file
+  the bot has already stored.
+- Retry transient failures with exponential backoff and dead-letter the rest.
+- Report the result to the user in Telegram when the job carries a chat id.
+
+Constraints:
+- Stateless: run N workers on M hosts. They share only Postgres and the raw
+  upload storage, so RAW_STORAGE_DIR must be a shared volume across hosts.
+- Processing is at-least-once: a job not finished within
+  INGEST_JOB_VISIBILITY_TIMEOUT_SECONDS is claimed again. The track id is fixed
+  at enqueue time and all writes are upserts, so a repeat is harmless.
+
+Usage:
+    python -m app.adapters.worker [--worker-id host-1] [--batch-size 4] [--metrics-port 9101]
+    python -m app.adapters.worker --requeue-dead
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from typing import Any, Dict, List, Mapping, Optional
+
+from telegram import Bot
+from telegram.error import TelegramError
+
+from app.adapters.container import container
+from app.adapters.outbox_drainer import start_background_drainer
+from app.application.ingest_jobs import IngestJobOutcome
+from app.application.track import IngestTrackCommand
+from app.config import settings
+from app.domain.models.track import ComputeAndIndexTrackFeaturesCommand, Track, TrackFormat
+from app.infrastructure.metrics import metrics, start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+
+def process_job(job: Mapping[str, Any]) -> Dict[str, Any]:
+    """Разбор, признаки и индексация сохранённого файла; id трека — из задачи."""
+    track = Track(
+        id=job["track_id"],
+        user_id=job["user_id"],
+        filename=job["filename"],
+        format=TrackFormat(job["format"]),
+        source=job["source"],
+        created_at=job["created_at"],
+    )
+    with metrics.stage("worker.load_raw"):
+        blob = container.raw_storage.load_raw(track)
+    with container.session() as s:
+        row = container.ingest_track(s).execute(
+            IngestTrackCommand(
+                user_id=track.user_id,
+                filename=track.filename,
+                blob=blob,
+                source=track.source,
+                track_id=track.id,
+                store_raw=False,
+            )
+        )
+        container.compute_track_features(s).execute(
+            ComputeAndIndexTrackFeaturesCommand(
+                track_id=track.id,
+                track_format=track.format,
+                file_bytes=blob,
+                user_id=track.user_id,
+            )
+        )
+    return dict(row)
+
+
+def _logged_process_job(job: Mapping[str, Any]) -> Dict[str, Any]:
+    try:
+        return process_job(job)
+    except ValueError:
+        # Битый или чужой файл — ошибка пользователя, причина уходит в задачу и в уведомление
+        raise
+    except Exception:
+        logger.exception("job %s (track %s): processing failed", job["id"], job["track_id"])
+        raise
+
+
+def process_batch(worker_id: str, batch_size: int) -> List[IngestJobOutcome]:
+    with container.session() as s:
+        return container.process_ingest_jobs(s, _logged_process_job, worker_id, batch_size).execute()
+
+
+def _log_outcome(outcome: IngestJobOutcome) -> None:
+    job = outcome.job
+    if outcome.status == "done":
+        logger.info("job %s (track %s): done", job["id"], job["track_id"])
+    elif outcome.status == "dead":
+        logger.error(
+            "job %s (track %s): dead after %s attempts: %s", job["id"], job["track_id"], job["attempts"], outcome.error
+        )
+    else:
+        logger.warning("job %s (track %s): %s: %s", job["id"], job["track_id"], outcome.status, outcome.error)
+
+
+def _outcome_text(outcome: IngestJobOutcome) -> Optional[str]:
+    if outcome.status == "done":
+        row = outcome.result or {}
+        return (
+            f"✅ Сохранено: {row.get('filename')} ({row.get('format')})\n"
+            f"Дистанция: {row.get('distance_km')} км, Длительность: {row.get('duration_s')} c, "
+            f"Набор: {row.get('elevation_gain_m')} м\n"
+            f"ID: {row.get('id')}"
+        )
+    if outcome.status == "dead":
+        return f"❌ Не удалось обработать {outcome.job['filename']}: {outcome.error}"
+    # Повтор или задача у другого воркера — сообщит тот, кто завершит
+    return None
+
+
+async def _notify(bot: Optional[Bot], outcome: IngestJobOutcome) -> None:
+    chat_id = outcome.job.get("notify_chat_id")
+    text = _outcome_text(outcome)
+    if bot is None or chat_id is None or text is None:
+        return
+    try:
+        await bot.send_message(chat_id=chat_id, text=text)
+    except TelegramError:
+        logger.exception("job %s: notification failed", outcome.job["id"])
+
+
+async def run(worker_id: str, batch_size: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    bot = Bot(settings.TELEGRAM_TOKEN) if settings.TELEGRAM_TOKEN else None
+    if bot:
+        await bot.initialize()
+    logger.info("worker %s: started", worker_id)
+    try:
+        while not stop.is_set():
+            try:
+                # Текущая пачка дорабатывается до конца и после SIGTERM: захват не теряется
+                outcomes = await asyncio.to_thread(process_batch, worker_id, batch_size)
+            except Exception:  # БД недоступна — ждём и пробуем снова, воркер не падает
+                logger.exception("worker %s: batch failed", worker_id)
+                outcomes = []
+            for outcome in outcomes:
+                _log_outcome(outcome)
+                await _notify(bot, outcome)
+            if not outcomes:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.INGEST_WORKER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        if bot:
+            await bot.shutdown()
+    logger.info("worker %s: stopped", worker_id)
+
+
+def main(argv=None) -> None:
+    cli = argparse.ArgumentParser(prog="python -m app.adapters.worker")
+    cli.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+    cli.add_argument("--batch-size", type=int, default=settings.INGEST_WORKER_BATCH_SIZE)
+    cli.add_argument("--metrics-port", type=int, default=None, help="GET /metrics; у каждого воркера свой порт")
+    cli.add_argument("--requeue-dead", action="store_true", help="вернуть задачи из dead в очередь и выйти")
+    args = cli.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.requeue_dead:
+        container.init_storage(vector_index=False)
+        with container.session() as s:
+            logger.info("requeued: %s jobs", container.ingest_job_queue(s).requeue_dead())
+        return
+    container.init_storage()
+    if args.metrics_port:
+        start_metrics_server(metrics, settings.METRICS_HOST, args.metrics_port)
+    start_background_drainer()
+    asyncio.run(run(args.worker_id, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Слой аппликации: массовый импорт треков (архив экспорта Strava/Garmin, группа файлов)
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.application.track import track_index_payload, track_metadata_row, training_load_command
+from app.application.training import UpdateTrainingLoadUseCase
+from app.domain.models.track import Track, TrackFormat
+from app.domain.ports.metrics import Metrics, NullMetrics
+from app.domain.ports.track import (
+    BestEffortsRepository,
+    ImportCheckpoint,
+    TrackBatchAnalyzer,
+    TrackContentIdGenerator,
+    TrackFeaturesRepository,
+    TrackMetadataRepository,
+    TrackStorage,
+    TrackVectorIndex,
+    TrackVectorizer,
+    VectorOutbox,
+)
+
+# Сколько причин отказа сохранять в отчёте (остальные только считаются)
+MAX_REPORTED_ERRORS = 20
+
+
+def _start_timestamp(features: Mapping[str, Any]) -> float:
+    # Время из файлов бывает и с таймзоной, и без — сравниваем через timestamp
+    start = features.get("start_datetime_utc")
+    return start.timestamp() if start else 0.0
+
+
+class ImportTracksCommand:
+    def __init__(self, user_id: int, files: Iterable[Tuple[str, Optional[bytes]]], source: str = "import"):
+        self.user_id = user_id
+        # (имя, содержимое); None — файл отклонён до чтения (например, слишком большой)
+        self.files = files
+        self.source = source
+
+
+@dataclass
+class ImportProgress:
+    processed: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+
+class ImportTracksUseCase:
+    """
+    Сценарий: массовый импорт.
+    1) разбор и извлечение признаков — в TrackBatchAnalyzer (пул процессов), потоком и по порядку;
+    2) запись пачками: метаданные, признаки (и outbox) — одной транзакцией на пачку, векторы — одним upsert;
+    3) пачка отмечается в чекпоинте только после записи. id трека детерминирован по содержимому:
+       трек, уже сохранённый раньше (в этой или прошлой пачке, прошлым импортом), считается дубликатом
+       и не перезаписывается; пачка, прерванная до commit, при повторе пишется заново.
+    """
+
+    def __init__(
+        self,
+        storage: TrackStorage,
+        id_gen: TrackContentIdGenerator,
+        analyzer: TrackBatchAnalyzer,
+        meta_repo: TrackMetadataRepository,
+        features_repo: TrackFeaturesRepository,
+        vector_index: Optional[TrackVectorIndex] = None,
+        track_vectorizer: Optional[TrackVectorizer] = None,
+        best_efforts_repository: Optional[BestEffortsRepository] = None,
+        training_load_use_case: Optional[UpdateTrainingLoadUseCase] = None,
+        checkpoint: Optional[ImportCheckpoint] = None,
+        batch_size: int = 64,
+        metrics: Optional[Metrics] = None,
+        vector_outbox: Optional[VectorOutbox] = None,
+    ):
+        self.storage = storage
+        self.id_gen = id_gen
+        self.analyzer = analyzer
+        self.meta_repo = meta_repo
+        self.features_repo = features_repo
+        self.vector_index = vector_index
+        self.track_vectorizer = track_vectorizer
+        self.best_efforts_repository = best_efforts_repository
+        self.training_load_use_case = training_load_use_case
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.metrics = metrics or NullMetrics()
+        self.vector_outbox = vector_outbox
+
+    def execute(
+        self, cmd: ImportTracksCommand, on_progress: Optional[Callable[[ImportProgress], None]] = None
+    ) -> ImportProgress:
+        progress = ImportProgress()
+        done = self.checkpoint.done() if self.checkpoint else set()
+        files = ((name, blob) for name, blob in cmd.files if name not in done)
+
+        accepted: List[Tuple[str, bytes, Mapping[str, Any]]] = []
+        names: List[str] = []
+        for name, blob, result in self.analyzer.analyze_many(files):
+            names.append(name)
+            if "error" in result:
+                progress.rejected += 1
+                if len(progress.errors) < MAX_REPORTED_ERRORS:
+                    progress.errors.append((name, result["error"]))
+                self.metrics.increment("import_rejected_total")
+            else:
+                accepted.append((name, blob, result))
+            if len(names) >= self.batch_size:
+                self._flush(cmd, accepted, names, progress, on_progress)
+                accepted, names = [], []
+        if names:
+            self._flush(cmd, accepted, names, progress, on_progress)
+        return progress
+
+    def _flush(
+        self,
+        cmd: ImportTracksCommand,
+        accepted: List[Tuple[str, bytes, Mapping[str, Any]]],
+        names: List[str],
+        progress: ImportProgress,
+        on_progress: Optional[Callable[[ImportProgress], None]],
+    ) -> None:
+        with self.metrics.stage("import.write_batch"):
+            imported, duplicates = self._write_batch(cmd, accepted)
+        if self.checkpoint:
+            self.checkpoint.mark_done(names)
+        progress.processed += len(names)
+        progress.imported += imported
+        progress.duplicates += duplicates
+        if on_progress:
+            on_progress(progress)
+
+    def _write_batch(
+        self, cmd: ImportTracksCommand, accepted: List[Tuple[str, bytes, Mapping[str, Any]]]
+    ) -> Tuple[int, int]:
+        created_at = datetime.now(timezone.utc)
+        rows: List[Dict[str, Any]] = []
+        features_list: List[Dict[str, Any]] = []
+        best_efforts: Dict[str, Any] = {}
+        formats: Dict[str, str] = {}
+
+        track_ids = [self.id_gen.id_for(cmd.user_id, blob) for _, blob, _ in accepted]
+        stored = self.meta_repo.existing_ids(list(dict.fromkeys(track_ids)))
+        for track_id, (name, blob, result) in zip(track_ids, accepted):
+            if track_id in formats or track_id in stored:
+                continue
+            track = Track(
+                id=track_id,
+                user_id=cmd.user_id,
+                filename=name.rsplit("/", 1)[-1],
+                format=TrackFormat(result["format"]),
+                source=cmd.source,
+                created_at=created_at,
+            )
+            formats[track_id] = track.format.value
+            self.storage.save_raw(track, blob)
+            rows.append(track_metadata_row(track, result["meta"]))
+
+            features = dict(result["features"])
+            if not features:
+                continue
+            best_efforts[track_id] = features.pop("best_efforts", None)
+            features.update({"id": track_id, "user_id": cmd.user_id})
+            features_list.append(features)
+
+        points = []
+        if self.track_vectorizer and features_list and (self.vector_index or self.vector_outbox):
+            vectors = self.track_vectorizer.vectorize_many(features_list)
+            points = [
+                (f["id"], vector, track_index_payload(formats[f["id"]], f)) for f, vector in zip(features_list, vectors)
+            ]
+
+        self.meta_repo.save_many(rows)
+        if self.vector_outbox:
+            # Точки пачки фиксируются вместе с её признаками
+            self.vector_outbox.add_upserts(points)
+        self.features_repo.upsert_many(features_list)
+
+        if self.best_efforts_repository:
+            for track_id, efforts in best_efforts.items():
+                if efforts is not None:
+                    self.best_efforts_repository.replace_for_track(track_id, cmd.user_id, efforts)
+
+        if self.training_load_use_case:
+            # В хронологическом порядке каждый трек дописывается в конец ряда ATL/CTL за O(1),
+            # без переигрывания окна, как при загрузке задним числом
+            for features in sorted(features_list, key=_start_timestamp):
+                self.training_load_use_case.execute(training_load_command(cmd.user_id, features["id"], features))
+
+        if self.vector_index and points and not self.vector_outbox:
+            self.vector_index.upsert_many(points)
+
+        for track_format in formats.values():
+            self.metrics.increment("tracks_imported_total", labels={"format": track_format})
+        return len(rows), len(accepted) - len(rows)
@@ -0,0 +1,112 @@
+"""
+Слой аппликации: инкрементальный пересчёт признаков после смены версий провайдеров
+"""
+
+from typing import Any, Dict, List, Optional
+
+from app.application.track import track_index_payload, training_load_command
+from app.application.training import UpdateTrainingLoadUseCase
+from app.domain.models.track import Track, TrackFormat, TrackRejectedError
+from app.domain.ports.metrics import Metrics, NullMetrics
+from app.domain.ports.track import (
+    BestEffortsRepository,
+    TrackFeatureExtractor,
+    TrackFeaturesRepository,
+    TrackStorage,
+    TrackVectorIndex,
+    TrackVectorizer,
+    VectorOutbox,
+)
+
+
+class BackfillTrackFeaturesUseCase:
+    """
+    Сценарий: пересчитать только устаревшие признаки сохранённых треков.
+    Для каждого трека сравниваются сохранённые версии провайдеров с текущими; исходный файл
+    читается потоком из хранилища, и считаются лишь устаревшие провайдеры (и то, от чего они зависят).
+    Строка признаков обновляется частично, точка индекса — по объединённой строке.
+    """
+
+    def __init__(
+        self,
+        storage: TrackStorage,
+        feature_extractor: TrackFeatureExtractor,
+        features_repository: TrackFeaturesRepository,
+        vector_index: Optional[TrackVectorIndex] = None,
+        track_vectorizer: Optional[TrackVectorizer] = None,
+        best_efforts_repository: Optional[BestEffortsRepository] = None,
+        training_load_use_case: Optional[UpdateTrainingLoadUseCase] = None,
+        vector_outbox: Optional[VectorOutbox] = None,
+        batch_size: int = 200,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.storage = storage
+        self.feature_extractor = feature_extractor
+        self.features_repository = features_repository
+        self.vector_index = vector_index
+        self.track_vectorizer = track_vectorizer
+        self.best_efforts_repository = best_efforts_repository
+        self.training_load_use_case = training_load_use_case
+        self.vector_outbox = vector_outbox
+        self.batch_size = batch_size
+        self.metrics = metrics or NullMetrics()
+
+    def execute(self, dry_run: bool = False) -> Dict[str, int]:
+        report = {"checked": 0, "up_to_date": 0, "stale": 0, "updated": 0, "missing": 0, "rejected": 0}
+        after_id = None
+        while page := self.features_repository.page_feature_versions(after_id, self.batch_size):
+            after_id = page[-1]["id"]
+            for row in page:
+                report["checked"] += 1
+                track_format = TrackFormat(row["format"])
+                stale = self.feature_extractor.stale_features(track_format, row["feature_versions"])
+                if not stale:
+                    report["up_to_date"] += 1
+                    continue
+                report["stale"] += 1
+                if not dry_run:
+                    outcome = self._backfill(row, track_format, stale)
+                    report[outcome] += 1
+                    self.metrics.increment("features_backfilled_total", labels={"outcome": outcome})
+        return report
+
+    def _backfill(self, row: Dict[str, Any], track_format: TrackFormat, stale: List[str]) -> str:
+        track = Track(
+            id=row["id"],
+            user_id=row["user_id"],
+            filename=row["filename"],
+            format=track_format,
+            source=row["source"],
+            created_at=row["created_at"],
+        )
+        if not self.storage.exists(track.id):
+            return "missing"
+        try:
+            with self.metrics.stage("backfill.extract"), self.storage.open_raw(track) as raw:
+                extracted = dict(self.feature_extractor.extract(track_format, raw, stale))
+        except TrackRejectedError:
+            # Файл, отклонённый новыми ограничениями, оставляет прежние признаки
+            return "rejected"
+
+        best_efforts = extracted.pop("best_efforts", None)
+        extracted["id"] = track.id
+        merged = {**(self.features_repository.get(track.id) or {}), **extracted}
+        if self.vector_outbox and self.track_vectorizer:
+            # До сохранения признаков: точка попадает в их транзакцию
+            vector = self.track_vectorizer.vectorize(merged)
+            self.vector_outbox.add_upserts([(track.id, vector, track_index_payload(track_format.value, merged))])
+        with self.metrics.stage("backfill.save"):
+            self.features_repository.upsert(extracted)
+
+        if self.best_efforts_repository and best_efforts is not None:
+            self.best_efforts_repository.replace_for_track(track.id, track.user_id, best_efforts)
+        if self.training_load_use_case:
+            # Нагрузка не изменилась — сценарий ничего не пишет
+            self.training_load_use_case.execute(training_load_command(track.user_id, track.id, merged))
+        if self.vector_index and self.track_vectorizer and not self.vector_outbox:
+            self.vector_index.upsert(
+                track_id=track.id,
+                vector=self.track_vectorizer.vectorize(merged),
+                payload=track_index_payload(track_format.value, merged),
+            )
+        return "updated"
@@ -0,0 +1,133 @@
+"""
+Слой аппликации: очередь загрузок — постановка файла в очередь и обработка задач воркером
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from app.application.track import IngestTrackCommand
+from app.domain.models.track import FORMAT_SNIFF_MAX_BYTES, Track, TrackRejectedError
+from app.domain.ports.metrics import Metrics, NullMetrics
+from app.domain.ports.track import IngestJobQueue, TrackFormatDetector, TrackIdGenerator, TrackStorage
+
+
+class EnqueueTrackIngestUseCase:
+    """
+    Сценарий: принять загрузку без разбора. Формат проверяется сразу (ответ пользователю
+    не ждёт воркера), файл сохраняется в хранилище, задача ставится в очередь.
+    id трека выдаётся здесь — повтор задачи пишет в тот же трек.
+    """
+
+    def __init__(
+        self,
+        storage: TrackStorage,
+        id_gen: TrackIdGenerator,
+        detector: TrackFormatDetector,
+        queue: IngestJobQueue,
+        max_attempts: int = 5,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.storage = storage
+        self.id_gen = id_gen
+        self.detector = detector
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.metrics = metrics or NullMetrics()
+
+    def execute(self, cmd: IngestTrackCommand, notify_chat_id: Optional[int] = None) -> Dict[str, Any]:
+        format = self.detector.detect(cmd.filename, bytes(cmd.blob[:FORMAT_SNIFF_MAX_BYTES]))
+        if not format:
+            self.metrics.increment("ingest_rejected_total", labels={"reason": "format"})
+            raise TrackRejectedError("Ожидаю GPX/FIT/TCX", reason="format")
+
+        track = Track(
+            id=self.id_gen.new_id(),
+            user_id=cmd.user_id,
+            filename=cmd.filename,
+            format=format,
+            source=cmd.source,
+            created_at=datetime.now(timezone.utc),
+        )
+        with self.metrics.stage("ingest.store"):
+            self.storage.save_raw(track, cmd.blob)
+        job_id = self.queue.enqueue(
+            {
+                "id": self.id_gen.new_id(),
+                "track_id": track.id,
+                "user_id": track.user_id,
+                "filename": track.filename,
+                "format": track.format.value,
+                "source": track.source,
+                "notify_chat_id": notify_chat_id,
+                "max_attempts": self.max_attempts,
+            }
+        )
+        self.metrics.increment("ingest_jobs_enqueued_total", labels={"format": track.format.value})
+        return {"job_id": job_id, "track_id": track.id, "filename": track.filename, "format": track.format.value}
+
+
+@dataclass
+class IngestJobOutcome:
+    job: Dict[str, Any]
+    # done | queued (будет повтор) | dead | lost (захват истёк и перешёл к другому воркеру)
+    status: str
+    result: Optional[Mapping[str, Any]] = None
+    error: Optional[str] = None
+
+
+class ProcessIngestJobsUseCase:
+    """
+    Сценарий воркера: захватить пачку задач, выполнить каждую обработчиком, отметить результат.
+    ValueError (не тот формат, битый файл) — окончательная ошибка, задача сразу в dead;
+    прочие исключения (БД, Qdrant, диск) — повтор с экспоненциальной задержкой до max_attempts.
+    """
+
+    def __init__(
+        self,
+        queue: IngestJobQueue,
+        handler: Callable[[Mapping[str, Any]], Mapping[str, Any]],
+        worker_id: str,
+        batch_size: int = 4,
+        visibility_timeout_seconds: float = 300.0,
+        retry_base_seconds: float = 10.0,
+        retry_max_seconds: float = 600.0,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.metrics = metrics or NullMetrics()
+
+    def execute(self) -> List[IngestJobOutcome]:
+        with self.metrics.stage("worker.claim"):
+            jobs = self.queue.claim(self.worker_id, self.batch_size, self.visibility_timeout_seconds)
+        outcomes = [self._run(job) for job in jobs]
+        for status, count in self.queue.counts().items():
+            self.metrics.gauge("ingest_jobs", count, labels={"status": status})
+        return outcomes
+
+    def _run(self, job: Dict[str, Any]) -> IngestJobOutcome:
+        try:
+            with self.metrics.stage("worker.job"):
+                result = self.handler(job)
+        except ValueError as e:
+            outcome = IngestJobOutcome(job, self._fail(job, str(e), None), error=str(e))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            outcome = IngestJobOutcome(job, self._fail(job, error, self.retry_delay(job["attempts"])), error=error)
+        else:
+            done = self.queue.complete(job["id"], self.worker_id)
+            outcome = IngestJobOutcome(job, "done" if done else "lost", result=result)
+        self.metrics.increment("ingest_jobs_total", labels={"status": outcome.status})
+        return outcome
+
+    def _fail(self, job: Dict[str, Any], error: str, retry_in_seconds: Optional[float]) -> str:
+        return self.queue.fail(job["id"], self.worker_id, error, retry_in_seconds) or "lost"
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.retry_base_seconds * 2 ** max(attempts - 1, 0), self.retry_max_seconds)
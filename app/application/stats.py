@@ -0,0 +1,36 @@
+"""
+Слой аппликации: недельные/месячные объёмы
+"""
+
+from typing import Any, Dict, List, Optional
+
+from app.domain.models.stats import GetVolumeStatsCommand
+from app.domain.ports.stats import VolumeStatsRepository
+from app.domain.ports.user import UserRepository
+
+
+class GetVolumeStatsUseCase:
+    """Сценарий: объёмы по неделям и месяцам из инкрементальных сводных таблиц."""
+
+    def __init__(self, user_repo: UserRepository, stats_repo: VolumeStatsRepository):
+        self.user_repo = user_repo
+        self.stats_repo = stats_repo
+
+    def execute(self, cmd: GetVolumeStatsCommand) -> Dict[str, List[Dict[str, Any]]]:
+        user_id = self.user_repo.get_id_by_tg_id(cmd.tg_id)
+        if not user_id:
+            return {"weekly": [], "monthly": []}
+        return {
+            "weekly": self.stats_repo.get_weekly(user_id, cmd.weeks),
+            "monthly": self.stats_repo.get_monthly(user_id, cmd.months),
+        }
+
+
+class RebuildVolumeStatsUseCase:
+    """Сценарий: массовая перестройка сводных таблиц из track_features."""
+
+    def __init__(self, stats_repo: VolumeStatsRepository):
+        self.stats_repo = stats_repo
+
+    def execute(self, user_id: Optional[int] = None) -> int:
+        return self.stats_repo.rebuild(user_id)
@@ -3,10 +3,30 @@
 """
 
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Mapping, Optional
-
-from app.domain.models.track import ComputeAndIndexTrackFeaturesCommand, RecommendRoutesCommand, Track
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.application.training import UpdateTrainingLoadUseCase
+from app.domain.models.track import (
+    FORMAT_SNIFF_MAX_BYTES,
+    ROUTE_DUPLICATE_SIMILARITY,
+    TRACK_FEATURE_FIELDS,
+    ComputeAndIndexTrackFeaturesCommand,
+    GetPersonalRecordsCommand,
+    GetTrackFeaturesCommand,
+    ListUserTracksCommand,
+    RecommendRoutesCommand,
+    Track,
+    TrackBytes,
+    TrackRejectedError,
+    route_fingerprint_bands,
+    route_fingerprint_similarity,
+    start_area_ids_around,
+)
+from app.domain.models.training import UpdateTrainingLoadCommand
+from app.domain.ports.metrics import Metrics, NullMetrics
 from app.domain.ports.track import (
+    BestEffortsRepository,
+    RecommendationsRepository,
     TrackFeatureExtractor,
     TrackFeaturesRepository,
     TrackFormatDetector,
@@ -16,16 +36,74 @@ from app.domain.ports.track import (
     TrackStorage,
     TrackVectorIndex,
     TrackVectorizer,
+    UserProfileBuilder,
+    VectorOutbox,
 )
 from app.domain.ports.user import UserRepository
 
 
+def track_metadata_row(track: Track, meta: Mapping[str, Any]) -> Dict[str, Any]:
+    """Строка метаданных трека из результата парсера."""
+    return {
+        "id": track.id,
+        "user_id": track.user_id,
+        "filename": track.filename,
+        "format": track.format.value,
+        "source": track.source or "telegram",
+        "created_at": track.created_at,
+        "distance_km": meta.get("distance_km"),
+        "duration_s": meta.get("duration_s"),
+        "elevation_gain_m": meta.get("elevation_gain_m"),
+    }
+
+
+def training_load_command(user_id: int, track_id: str, features: Mapping[str, Any]) -> UpdateTrainingLoadCommand:
+    start_datetime_utc = features.get("start_datetime_utc")
+    return UpdateTrainingLoadCommand(
+        user_id=user_id,
+        track_id=track_id,
+        day=start_datetime_utc.date() if start_datetime_utc else None,
+        moving_duration_seconds=features.get("total_moving_duration_seconds"),
+        distance_kilometers=features.get("total_distance_kilometers"),
+        elevation_gain_meters=features.get("total_elevation_gain_meters"),
+    )
+
+
+def track_index_payload(track_format: str, features: Mapping[str, Any]) -> Dict[str, Any]:
+    """Payload точки векторного индекса — общий для загрузки по одному файлу и массового импорта."""
+    return {
+        # Владелец: поиск по чужим трекам отсекает свои фильтром индекса
+        "user_id": features.get("user_id"),
+        "format": track_format,
+        "start_time": str(features.get("start_datetime_utc")),
+        "route": features.get("route_curvature_category"),
+        "terrain": features.get("terrain_category"),
+        "area": features.get("start_area_identifier_approx"),
+        "distance": features.get("total_distance_kilometers"),
+        "hour": features.get("start_hour_of_day_utc"),
+        "fingerprint": features.get("route_fingerprint"),
+        "route_cluster": features.get("route_cluster_key"),
+    }
+
+
 class IngestTrackCommand:
-    def __init__(self, user_id: int, filename: str, blob: bytes, source: str = "telegram"):
+    def __init__(
+        self,
+        user_id: int,
+        filename: str,
+        blob: TrackBytes,
+        source: str = "telegram",
+        track_id: Optional[str] = None,
+        store_raw: bool = True,
+    ):
         self.user_id = user_id
         self.filename = filename
         self.blob = blob
         self.source = source
+        # Id задан заранее: задача из очереди загрузок (файл уже лежит в хранилище)
+        # или хэш содержимого HTTP-загрузки, чтобы повтор не создавал дубликат
+        self.track_id = track_id
+        self.store_raw = store_raw
 
 
 class IngestTrackUseCase:
@@ -40,6 +118,7 @@ class IngestTrackUseCase:
         meta_repo: TrackMetadataRepository,
         feature_extractor: TrackFeatureExtractor,
         features_repo: TrackFeaturesRepository,
+        metrics: Optional[Metrics] = None,
     ):
         self.storage = storage
         self.id_gen = id_gen
@@ -48,14 +127,17 @@ class IngestTrackUseCase:
         self.meta_repo = meta_repo
         self.feature_extractor = feature_extractor
         self.features_repo = features_repo
+        self.metrics = metrics or NullMetrics()
 
     def execute(self, cmd: IngestTrackCommand) -> Mapping[str, Any]:
-        format = self.detector.detect(cmd.filename, cmd.blob[:512])
+        with self.metrics.stage("ingest.detect"):
+            format = self.detector.detect(cmd.filename, bytes(cmd.blob[:FORMAT_SNIFF_MAX_BYTES]))
         if not format:
-            raise ValueError("Ожидаю GPX/FIT/TCX")
+            self.metrics.increment("ingest_rejected_total", labels={"reason": "format"})
+            raise TrackRejectedError("Ожидаю GPX/FIT/TCX", reason="format")
 
         track = Track(
-            id=self.id_gen.new_id(),
+            id=cmd.track_id or self.id_gen.new_id(),
             user_id=cmd.user_id,
             filename=cmd.filename,
             format=format,
@@ -63,26 +145,35 @@ class IngestTrackUseCase:
             created_at=datetime.now(timezone.utc),
         )
 
-        self.storage.save_raw(track, cmd.blob)
-        meta = self.parser.parse(format, cmd.blob) or {}
+        if cmd.store_raw:
+            with self.metrics.stage("ingest.store"):
+                self.storage.save_raw(track, cmd.blob)
+        try:
+            with self.metrics.stage("ingest.parse"):
+                meta = self.parser.parse(format, cmd.blob) or {}
+        except TrackRejectedError as e:
+            self.metrics.increment("ingest_rejected_total", labels={"reason": e.reason})
+            raise
 
-        row = {
-            "id": track.id,
-            "user_id": track.user_id,
-            "filename": track.filename,
-            "format": track.format.value,
-            "source": track.source or "telegram",
-            "created_at": track.created_at,
-            "distance_km": meta.get("distance_km"),
-            "duration_s": meta.get("duration_s"),
-            "elevation_gain_m": meta.get("elevation_gain_m"),
-        }
+        row = track_metadata_row(track, meta)
 
-        self.meta_repo.save(row)
+        with self.metrics.stage("ingest.save_metadata"):
+            self.meta_repo.save(row)
 
-        feats = dict(self.feature_extractor.extract(format, cmd.blob))
+        with self.metrics.stage("ingest.extract"):
+            # Лучшие отрезки при загрузке не сохраняются — их провайдер не запускается
+            feats = dict(self.feature_extractor.extract(format, cmd.blob, TRACK_FEATURE_FIELDS))
         feats.update({"id": track.id, "user_id": cmd.user_id})
-        self.features_repo.upsert(feats)
+        with self.metrics.stage("ingest.save_features"):
+            self.features_repo.upsert(feats)
+
+        labels = {"format": track.format.value}
+        self.metrics.increment("tracks_ingested_total", labels=labels)
+        self.metrics.increment("ingest_bytes_total", len(cmd.blob), labels=labels)
+        self.metrics.observe("ingest_file_bytes", len(cmd.blob), labels=labels)
+        if meta.get("point_count") is not None:
+            self.metrics.increment("ingest_points_total", meta["point_count"], labels=labels)
+            self.metrics.observe("ingest_points", meta["point_count"], labels=labels)
 
         return row
 
@@ -92,7 +183,10 @@ class ComputeAndIndexTrackFeaturesUseCase:
     Сценарий application-слоя:
     1) извлечь признаки из бинарного файла;
     2) сохранить признаки в БД (идемпотентно по track_id);
-    3) по желанию — построить вектор и проиндексировать в Qdrant.
+    3) по желанию — сохранить лучшие отрезки и обновить личные рекорды;
+    4) по желанию — учесть трек в тренировочной нагрузке (ATL/CTL);
+    5) по желанию — построить вектор и проиндексировать в Qdrant. С VectorOutbox точка
+       записывается в outbox в транзакции признаков, а в индекс её отправляет дренаж.
     """
 
     def __init__(
@@ -101,39 +195,63 @@ class ComputeAndIndexTrackFeaturesUseCase:
         features_repository: TrackFeaturesRepository,
         vector_index: Optional[TrackVectorIndex] = None,
         track_vectorizer: Optional[TrackVectorizer] = None,
+        best_efforts_repository: Optional[BestEffortsRepository] = None,
+        training_load_use_case: Optional[UpdateTrainingLoadUseCase] = None,
+        metrics: Optional[Metrics] = None,
+        vector_outbox: Optional[VectorOutbox] = None,
     ) -> None:
         self.feature_extractor = feature_extractor
         self.features_repository = features_repository
         self.vector_index = vector_index
         self.track_vectorizer = track_vectorizer
+        self.best_efforts_repository = best_efforts_repository
+        self.training_load_use_case = training_load_use_case
+        self.metrics = metrics or NullMetrics()
+        self.vector_outbox = vector_outbox
 
     def execute(self, command: ComputeAndIndexTrackFeaturesCommand) -> Mapping[str, Any]:
-        extracted_track_features: Mapping[str, Any] = self.feature_extractor.extract(
-            command.track_format, command.file_bytes
-        )
+        with self.metrics.stage("features.extract"):
+            extracted_track_features: Mapping[str, Any] = self.feature_extractor.extract(
+                command.track_format, command.file_bytes
+            )
         if not extracted_track_features:
             return {}
 
         features_to_save = dict(extracted_track_features)
+        best_efforts = features_to_save.pop("best_efforts", None)
         features_to_save.update({"id": command.track_id})
-        self.features_repository.upsert(features_to_save)
-
-        if self.vector_index and self.track_vectorizer:
-            features_vector = self.track_vectorizer.vectorize(features_to_save)
-            self.vector_index.upsert(
-                track_id=command.track_id,
-                vector=features_vector,
-                payload={
-                    "format": command.track_format.value,
-                    "start_time": str(features_to_save.get("start_datetime_utc")),
-                    "route": features_to_save.get("route_curvature_category"),
-                    "terrain": features_to_save.get("terrain_category"),
-                    "area": features_to_save.get("start_area_identifier_approx"),
-                    "distance": features_to_save.get("total_distance_kilometers"),
-                    "hour": features_to_save.get("start_hour_of_day_utc"),
-                },
-            )
-
+        if command.user_id is not None:
+            features_to_save["user_id"] = command.user_id
+        if self.vector_outbox and self.track_vectorizer:
+            # До сохранения признаков: точка попадает в их транзакцию
+            with self.metrics.stage("features.vectorize"):
+                features_vector = self.track_vectorizer.vectorize(features_to_save)
+            payload = track_index_payload(command.track_format.value, features_to_save)
+            self.vector_outbox.add_upserts([(command.track_id, features_vector, payload)])
+        with self.metrics.stage("features.save"):
+            self.features_repository.upsert(features_to_save)
+
+        if self.best_efforts_repository and best_efforts is not None and command.user_id is not None:
+            with self.metrics.stage("features.best_efforts"):
+                self.best_efforts_repository.replace_for_track(command.track_id, command.user_id, best_efforts)
+
+        if self.training_load_use_case and command.user_id is not None:
+            with self.metrics.stage("features.training_load"):
+                self.training_load_use_case.execute(
+                    training_load_command(command.user_id, command.track_id, features_to_save)
+                )
+
+        if self.vector_index and self.track_vectorizer and not self.vector_outbox:
+            with self.metrics.stage("features.vectorize"):
+                features_vector = self.track_vectorizer.vectorize(features_to_save)
+            with self.metrics.stage("features.index"):
+                self.vector_index.upsert(
+                    track_id=command.track_id,
+                    vector=features_vector,
+                    payload=track_index_payload(command.track_format.value, features_to_save),
+                )
+
+        self.metrics.increment("tracks_indexed_total", labels={"format": command.track_format.value})
         return features_to_save
 
 
@@ -143,23 +261,47 @@ class RecommendRoutesUseCase:
 
     Оркестрация:
     1. Получить user_id по tg_id (через UserRepository)
-    2. Получить все треки пользователя (через TrackFeaturesRepository)
-    3. Вычислить средний вектор (через TrackVectorizer)
-    4. Найти похожие треки (через TrackVectorIndex)
-    5. Вернуть результат
+    2. Если есть свежий предрасчёт (через RecommendationsRepository) — вернуть его
+    3. Получить все треки пользователя (через TrackFeaturesRepository)
+    4. Построить профиль: средний вектор или, при наличии UserProfileBuilder,
+       несколько центров (через TrackVectorizer)
+    5. Найти похожие треки (через TrackVectorIndex); несколько центров —
+       один batched-запрос, хиты объединяются и дедуплицируются по score.
+       В режиме "hybrid" — SQL-префильтр по индексам и точный rerank
+    6. Вернуть результат
     """
 
+    # Шаги расширения гибридного поиска:
+    # (радиус в ячейках зоны старта, ±доля дистанции, учитывать рельеф); None — без условия
+    HYBRID_WIDENING_STEPS = (
+        (3, 0.2, True),
+        (10, 0.35, True),
+        (10, 0.5, False),
+        (None, 0.5, False),
+        (None, None, False),
+    )
+    HYBRID_CANDIDATES_PER_RESULT = 20
+    # Дозапрос, когда дубликаты маршрутов и свои треки съели выдачу: лимит растёт в FETCH_GROWTH раз
+    FETCH_GROWTH = 4
+    MAX_FETCH = 1000
+
     def __init__(
         self,
         user_repo: UserRepository,
         features_repo: TrackFeaturesRepository,
         vectorizer: TrackVectorizer,
         vector_index: TrackVectorIndex,
+        recommendations_repo: Optional[RecommendationsRepository] = None,
+        profile_builder: Optional[UserProfileBuilder] = None,
+        metrics: Optional[Metrics] = None,
     ):
         self.user_repo = user_repo
         self.features_repo = features_repo
         self.vectorizer = vectorizer
         self.vector_index = vector_index
+        self.recommendations_repo = recommendations_repo
+        self.profile_builder = profile_builder
+        self.metrics = metrics or NullMetrics()
 
     def execute(self, cmd: RecommendRoutesCommand) -> List[Dict[str, Any]]:
         """Возвращает список рекомендаций."""
@@ -168,31 +310,234 @@ class RecommendRoutesUseCase:
         if not user_id:
             return []
 
-        # 2. Получаем все треки пользователя
-        all_tracks = self.features_repo.get_all_by_user(user_id)
+        # 2. Предрасчёт актуален, если после него не было новых загрузок
+        if self.recommendations_repo is not None:
+            with self.metrics.stage("recommend.precomputed"):
+                precomputed = self.recommendations_repo.get_fresh(user_id, cmd.mode, cmd.include_other_users)
+            if precomputed is not None and len(precomputed) >= cmd.top_k:
+                self.metrics.increment("recommendations_served_total", labels={"source": "precomputed"})
+                return precomputed[: cmd.top_k]
+
+        # 3. Получаем все треки пользователя
+        with self.metrics.stage("recommend.load_tracks"):
+            all_tracks = self.features_repo.get_all_by_user(user_id)
         if not all_tracks:
             return []
 
-        # 3. Вычисляем средние значения признаков
-        avg_features = self._compute_average(all_tracks)
+        # 4-5. Профиль: центры (UserProfileBuilder) или средний вектор признаков
+        with self.metrics.stage("recommend.profile"):
+            if self.profile_builder is not None:
+                query_vectors = self._profile_vectors(self.vectorizer, self.profile_builder, all_tracks)
+            else:
+                avg_features = self._compute_average(all_tracks)
+                query_vectors = [self.vectorizer.vectorize(avg_features)]
+
+        # 6-7. Ищем похожие без дубликатов маршрутов — пока не наберётся top_k.
+        # Охват одинаков в обоих режимах: include_other_users — только чужие треки (свои отсекает
+        # индекс или SQL), иначе — только свои
+        user_track_ids = {t["id"] for t in all_tracks}
+        with self.metrics.stage(f"recommend.search.{cmd.mode}"):
+            if cmd.mode == "hybrid":
+                recommendations = self._hybrid_search(user_id, all_tracks, query_vectors, user_track_ids, cmd)
+            elif not cmd.include_other_users:
+                # Свои треки уже загружены: точный косинус без запроса к индексу
+                recommendations = self._select_recommendations(
+                    self._rerank(self.vectorizer, query_vectors, all_tracks), user_track_ids, cmd.top_k, False
+                )
+            elif len(query_vectors) > 1:
+                # несколько центров — один batched-запрос, хиты объединяются
+                recommendations = self._select_widening(
+                    lambda limit: self.vector_index.search_batch(
+                        query_vectors, top_k=limit, exclude_user_ids=[user_id] * len(query_vectors)
+                    ),
+                    user_track_ids,
+                    cmd.top_k,
+                    cmd.include_other_users,
+                )
+            else:
+                recommendations = self._select_widening(
+                    lambda limit: [
+                        self.vector_index.search(query_vector=query_vectors[0], top_k=limit, exclude_user_id=user_id)
+                    ],
+                    user_track_ids,
+                    cmd.top_k,
+                    cmd.include_other_users,
+                )
+
+        self.metrics.increment("recommendations_served_total", labels={"source": "live"})
+        return recommendations
 
-        # 4. Векторизуем
-        query_vector = self.vectorizer.vectorize(avg_features)
+    @classmethod
+    def _select_widening(
+        cls,
+        search: Callable[[int], List[List[Dict[str, Any]]]],
+        user_track_ids: set,
+        top_k: int,
+        include_other_users: bool,
+        batch_results: Optional[List[List[Dict[str, Any]]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        top_k различных маршрутов из поиска search(limit) -> хиты по запросам.
+        Если после отбора маршрутов меньше top_k, а индекс вернул всё, что просили,
+        поиск повторяется с большим лимитом (до MAX_FETCH). batch_results — уже готовый первый ответ.
+        """
+        limit = top_k * 2
+        if batch_results is None:
+            batch_results = search(limit)
+        while True:
+            recommendations = cls._select_recommendations(
+                cls._merge_hits(batch_results), user_track_ids, top_k, include_other_users
+            )
+            saturated = any(len(hits) >= limit for hits in batch_results)
+            if len(recommendations) >= top_k or not saturated or limit >= cls.MAX_FETCH:
+                return recommendations
+            limit = min(limit * cls.FETCH_GROWTH, cls.MAX_FETCH)
+            batch_results = search(limit)
 
-        # 5. Ищем похожие
-        user_filter = None if cmd.include_other_users else user_id
-        results = self.vector_index.search(query_vector=query_vector,top_k=cmd.top_k * 2,user_id_filter=user_filter)
+    def _hybrid_search(
+        self,
+        user_id: int,
+        all_tracks: List[Dict[str, Any]],
+        query_vectors: List[List[float]],
+        user_track_ids: set,
+        cmd: RecommendRoutesCommand,
+    ) -> List[Dict[str, Any]]:
+        """
+        Гибридный поиск: узкий SQL-префильтр по индексированным колонкам
+        (зоны старта, полоса дистанции, рельеф), затем точный косинус кандидатов
+        к векторам профиля и отбор различных маршрутов. Если их меньше top_k, сначала
+        растёт лимит кандидатов (префильтр упёрся в него), затем расширяется полоса.
+        """
+        anchor = self._most_frequent_start(all_tracks)
+        distances = sorted(t["total_distance_kilometers"] for t in all_tracks if t.get("total_distance_kilometers"))
+        median_distance = distances[len(distances) // 2] if distances else None
+        terrain = self._compute_average(all_tracks).get("terrain_category")
+        scope = {"exclude_user_id": user_id} if cmd.include_other_users else {"user_id": user_id}
+
+        recommendations: List[Dict[str, Any]] = []
+        for radius_cells, band, use_terrain in self.HYBRID_WIDENING_STEPS:
+            if (radius_cells is not None and anchor is None) or (band is not None and median_distance is None):
+                continue
+            limit = cmd.top_k * self.HYBRID_CANDIDATES_PER_RESULT
+            while True:
+                candidates = self.features_repo.find_candidates(
+                    area_ids=start_area_ids_around(*anchor, radius_cells) if radius_cells is not None else None,
+                    distance_range=(median_distance * (1 - band), median_distance * (1 + band)) if band else None,
+                    terrain=terrain if use_terrain else None,
+                    limit=limit,
+                    target_distance=median_distance,
+                    **scope,
+                )
+                recommendations = self._select_recommendations(
+                    self._rerank(self.vectorizer, query_vectors, candidates),
+                    user_track_ids,
+                    cmd.top_k,
+                    cmd.include_other_users,
+                )
+                if len(recommendations) >= cmd.top_k or len(candidates) < limit or limit >= self.MAX_FETCH:
+                    break
+                limit = min(limit * self.FETCH_GROWTH, self.MAX_FETCH)
+            if len(recommendations) >= cmd.top_k:
+                break
 
-        # 6. Фильтруем свои треки
-        user_track_ids = {t["id"] for t in all_tracks}
+        return recommendations
+
+    @staticmethod
+    def _rerank(
+        vectorizer: TrackVectorizer, query_vectors: List[List[float]], candidates: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Точный косинус кандидатов к векторам профиля (лучший из центров), по убыванию."""
+        if not candidates:
+            return []
+        # numpy нужен только гибридному режиму: импорт здесь не замедляет запуск бота и CLI
+        import numpy as np
+
+        matrix = np.asarray(vectorizer.vectorize_many(candidates), dtype=np.float64)
+        queries = np.asarray(query_vectors, dtype=np.float64)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = (matrix @ queries.T).max(axis=1)
+        return [
+            {
+                "track_id": candidates[i]["id"],
+                "score": float(scores[i]),
+                "payload": {
+                    "user_id": candidates[i].get("user_id"),
+                    "route": candidates[i].get("route_curvature_category"),
+                    "terrain": candidates[i].get("terrain_category"),
+                    "area": candidates[i].get("start_area_identifier_approx"),
+                    "distance": candidates[i].get("total_distance_kilometers"),
+                    "hour": candidates[i].get("start_hour_of_day_utc"),
+                    "fingerprint": candidates[i].get("route_fingerprint"),
+                },
+            }
+            for i in np.argsort(-scores)
+        ]
+
+    @staticmethod
+    def _most_frequent_start(tracks: List[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+        """Координаты самой частой зоны старта пользователя."""
+        areas = [t.get("start_area_identifier_approx") for t in tracks if t.get("start_area_identifier_approx")]
+        if not areas:
+            return None
+        area = max(set(areas), key=areas.count)
+        track = next(t for t in tracks if t.get("start_area_identifier_approx") == area)
+        if track.get("start_latitude_deg") is None or track.get("start_longitude_deg") is None:
+            return None
+        return track["start_latitude_deg"], track["start_longitude_deg"]
+
+    @classmethod
+    def _profile_vectors(
+        cls, vectorizer: TrackVectorizer, profile_builder: UserProfileBuilder, tracks: List[Dict[str, Any]]
+    ) -> List[List[float]]:
+        """
+        Центры многоцентроидного профиля по векторам всех треков пользователя.
+        Один центр — классический профиль (среднее числовых признаков, мода категориальных),
+        а не среднее нормированных векторов: так ответ не меняется для пользователей с малой историей.
+        """
+        centroids = [centroid for centroid, _ in profile_builder.build(vectorizer.vectorize_many(tracks))]
+        if len(centroids) <= 1:
+            return [vectorizer.vectorize(cls._compute_average(tracks))]
+        return centroids
+
+    @staticmethod
+    def _merge_hits(batch_results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Объединяет хиты нескольких запросов: один трек — лучший score, по убыванию."""
+        best: Dict[Any, Dict[str, Any]] = {}
+        for hits in batch_results:
+            for hit in hits:
+                current = best.get(hit["track_id"])
+                if current is None or hit["score"] > current["score"]:
+                    best[hit["track_id"]] = hit
+        return sorted(best.values(), key=lambda hit: hit["score"], reverse=True)
+
+    @staticmethod
+    def _select_recommendations(
+        results: List[Dict[str, Any]], user_track_ids: set, top_k: int, include_other_users: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Отбирает top_k, схлопывая почти одинаковые маршруты: кандидаты в дубликаты
+        ищутся по LSH-полосам отпечатка, решение — по оценке Жаккара.
+        """
         recommendations = []
+        buckets: Dict[Tuple[int, Tuple[int, ...]], List[List[int]]] = {}
 
         for r in results:
-            if not cmd.include_other_users and r["track_id"] in user_track_ids:
+            # Точки, проиндексированные до user_id в payload, фильтр индекса не отсекает
+            if include_other_users and r["track_id"] in user_track_ids:
                 continue
 
+            fingerprint = (r.get("payload") or {}).get("fingerprint")
+            if fingerprint:
+                bands = list(enumerate(route_fingerprint_bands(fingerprint)))
+                seen = [kept for band in bands for kept in buckets.get(band, [])]
+                if any(route_fingerprint_similarity(fingerprint, kept) >= ROUTE_DUPLICATE_SIMILARITY for kept in seen):
+                    continue
+                for band in bands:
+                    buckets.setdefault(band, []).append(fingerprint)
+
             recommendations.append(r)
-            if len(recommendations) >= cmd.top_k:
+            if len(recommendations) >= top_k:
                 break
 
         return recommendations
@@ -226,3 +571,156 @@ class RecommendRoutesUseCase:
         avg["terrain_category"] = max(set(terrain_cats), key=terrain_cats.count) if terrain_cats else None
 
         return avg
+
+
+class PrecomputeRecommendationsUseCase:
+    """
+    Сценарий (по расписанию): предрасчёт рекомендаций для всех пользователей.
+
+    Пользователи обходятся пачками; на пачку — один запрос признаков,
+    пакетная векторизация профилей и один batched-поиск в индексе
+    (много запросов за один round-trip; при многоцентроидном профиле —
+    по запросу на центр). Результат сохраняется с меткой поколения.
+    """
+
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        features_repo: TrackFeaturesRepository,
+        vectorizer: TrackVectorizer,
+        vector_index: TrackVectorIndex,
+        recommendations_repo: RecommendationsRepository,
+        batch_size: int = 200,
+        top_k: int = 10,
+        include_other_users: bool = True,
+        profile_builder: Optional[UserProfileBuilder] = None,
+    ):
+        self.user_repo = user_repo
+        self.features_repo = features_repo
+        self.vectorizer = vectorizer
+        self.vector_index = vector_index
+        self.recommendations_repo = recommendations_repo
+        self.batch_size = batch_size
+        self.top_k = top_k
+        self.include_other_users = include_other_users
+        self.profile_builder = profile_builder
+
+    def execute(self, generation: int, computed_at: datetime) -> int:
+        """Возвращает число пользователей, для которых пересчитаны рекомендации."""
+        processed = 0
+        after_id = 0
+        while True:
+            user_ids = self.user_repo.list_ids(after_id=after_id, limit=self.batch_size)
+            if not user_ids:
+                break
+            after_id = user_ids[-1]
+
+            tracks_by_user = self.features_repo.get_all_by_users(user_ids)
+            users = [user_id for user_id in user_ids if tracks_by_user.get(user_id)]
+            if not users:
+                continue
+
+            if self.profile_builder is not None:
+                queries_per_user = [
+                    RecommendRoutesUseCase._profile_vectors(
+                        self.vectorizer, self.profile_builder, tracks_by_user[user_id]
+                    )
+                    for user_id in users
+                ]
+            else:
+                profiles = [RecommendRoutesUseCase._compute_average(tracks_by_user[user_id]) for user_id in users]
+                queries_per_user = [[vector] for vector in self.vectorizer.vectorize_many(profiles)]
+
+            if self.include_other_users:
+                recommendations = self._search_others(users, queries_per_user, tracks_by_user)
+            else:
+                # Только свои треки — как в живом запросе, точный косинус без индекса
+                recommendations = {
+                    user_id: RecommendRoutesUseCase._select_recommendations(
+                        RecommendRoutesUseCase._rerank(self.vectorizer, queries, tracks_by_user[user_id]),
+                        {t["id"] for t in tracks_by_user[user_id]},
+                        self.top_k,
+                        False,
+                    )
+                    for user_id, queries in zip(users, queries_per_user)
+                }
+            # Предрасчёт — векторный поиск; гибридные запросы и другой охват считаются вживую
+            self.recommendations_repo.replace_for_users(
+                generation, computed_at, recommendations, mode="vector", include_other_users=self.include_other_users
+            )
+            processed += len(users)
+
+        return processed
+
+    def _search_others(
+        self,
+        users: List[int],
+        queries_per_user: List[List[List[float]]],
+        tracks_by_user: Mapping[int, List[Dict[str, Any]]],
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Чужие треки: один пакетный запрос на всех пользователей пачки, свои отсекает индекс."""
+        query_vectors = [vector for queries in queries_per_user for vector in queries]
+        exclude = [user_id for user_id, queries in zip(users, queries_per_user) for _ in queries]
+        batch_results = self.vector_index.search_batch(query_vectors, top_k=self.top_k * 2, exclude_user_ids=exclude)
+
+        recommendations = {}
+        offset = 0
+        for user_id, queries in zip(users, queries_per_user):
+            user_results = batch_results[offset : offset + len(queries)]
+            offset += len(queries)
+            # Дозапрос — только для пользователей, у кого дубликаты съели общий пакетный ответ
+            recommendations[user_id] = RecommendRoutesUseCase._select_widening(
+                lambda limit, queries=queries, user_id=user_id: self.vector_index.search_batch(
+                    queries, top_k=limit, exclude_user_ids=[user_id] * len(queries)
+                ),
+                {t["id"] for t in tracks_by_user[user_id]},
+                self.top_k,
+                True,
+                batch_results=user_results,
+            )
+        return recommendations
+
+
+class GetPersonalRecordsUseCase:
+    """Сценарий: личные рекорды пользователя (1k/5k/10k/полумарафон) из индекса рекордов."""
+
+    def __init__(self, user_repo: UserRepository, best_efforts_repo: BestEffortsRepository):
+        self.user_repo = user_repo
+        self.best_efforts_repo = best_efforts_repo
+
+    def execute(self, cmd: GetPersonalRecordsCommand) -> List[Dict[str, Any]]:
+        user_id = self.user_repo.get_id_by_tg_id(cmd.tg_id)
+        if not user_id:
+            return []
+        return self.best_efforts_repo.get_personal_records(user_id)
+
+
+class ListUserTracksUseCase:
+    """Сценарий: признаки всех треков пользователя."""
+
+    def __init__(self, user_repo: UserRepository, features_repo: TrackFeaturesRepository):
+        self.user_repo = user_repo
+        self.features_repo = features_repo
+
+    def execute(self, cmd: ListUserTracksCommand) -> List[Dict[str, Any]]:
+        user_id = self.user_repo.get_id_by_tg_id(cmd.tg_id)
+        if not user_id:
+            return []
+        return self.features_repo.get_all_by_user(user_id)
+
+
+class GetTrackFeaturesUseCase:
+    """Сценарий: признаки одного трека; чужой трек не отдаётся (None, как и для отсутствующего)."""
+
+    def __init__(self, user_repo: UserRepository, features_repo: TrackFeaturesRepository):
+        self.user_repo = user_repo
+        self.features_repo = features_repo
+
+    def execute(self, cmd: GetTrackFeaturesCommand) -> Optional[Dict[str, Any]]:
+        user_id = self.user_repo.get_id_by_tg_id(cmd.tg_id)
+        if not user_id:
+            return None
+        features = self.features_repo.get(cmd.track_id)
+        if not features or features.get("user_id") != user_id:
+            return None
+        return features
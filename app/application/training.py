@@ -0,0 +1,125 @@
+"""
+Слой аппликации: тренировочная нагрузка (ATL/CTL/TSB)
+"""
+
+import math
+from dataclasses import replace
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from app.domain.models.training import (
+    ACUTE_LOAD_TIME_CONSTANT_DAYS,
+    CHRONIC_LOAD_TIME_CONSTANT_DAYS,
+    GetTrainingFormCommand,
+    TrainingLoadDay,
+    UpdateTrainingLoadCommand,
+)
+from app.domain.ports.training import TrainingLoadRepository
+from app.domain.ports.user import UserRepository
+
+ACUTE_DECAY = math.exp(-1.0 / ACUTE_LOAD_TIME_CONSTANT_DAYS)
+CHRONIC_DECAY = math.exp(-1.0 / CHRONIC_LOAD_TIME_CONSTANT_DAYS)
+
+
+def _advance(prev: Optional[TrainingLoadDay], day: date, load: float) -> TrainingLoadDay:
+    """Переносит состояние с предыдущего дня на день `day` и добавляет его нагрузку."""
+    if prev is None:
+        acute = chronic = 0.0
+        gap = 1
+    else:
+        acute, chronic = prev.acute_load, prev.chronic_load
+        gap = (day - prev.day).days
+    acute = acute * ACUTE_DECAY**gap + load * (1.0 - ACUTE_DECAY)
+    chronic = chronic * CHRONIC_DECAY**gap + load * (1.0 - CHRONIC_DECAY)
+    return TrainingLoadDay(day=day, load=load, acute_load=acute, chronic_load=chronic)
+
+
+class UpdateTrainingLoadUseCase:
+    """
+    Сценарий: учесть нагрузку трека в экспоненциально сглаженных ATL/CTL пользователя.
+
+    Храним состояние только на дни с тренировками; пропуски затухают аналитически.
+    - трек в последний день или позже — O(1): одна новая/обновлённая строка;
+    - трек задним числом или пересчёт — переигрываем только окно с самого раннего
+      затронутого дня до последнего.
+    """
+
+    def __init__(self, repo: TrainingLoadRepository, threshold_speed_kilometers_per_hour: float = 12.0):
+        self.repo = repo
+        self.threshold_speed_kilometers_per_hour = threshold_speed_kilometers_per_hour
+
+    def execute(self, cmd: UpdateTrainingLoadCommand) -> Optional[TrainingLoadDay]:
+        if cmd.day is None:
+            return None
+
+        new_load = self.track_load(cmd)
+        previous = self.repo.get_track_load(cmd.track_id)
+
+        deltas: Dict[date, float] = {cmd.day: new_load}
+        if previous is not None:
+            old_day, old_load = previous
+            deltas[old_day] = deltas.get(old_day, 0.0) - old_load
+        if all(abs(v) < 1e-9 for v in deltas.values()):
+            return None
+
+        window_start = min(deltas)
+        days = {d.day: d for d in self.repo.get_days_since(cmd.user_id, window_start)}
+        for day, delta in deltas.items():
+            current = days.get(day)
+            load = (current.load if current else 0.0) + delta
+            days[day] = TrainingLoadDay(day=day, load=max(load, 0.0), acute_load=0.0, chronic_load=0.0)
+
+        state = self.repo.get_day_before(cmd.user_id, window_start)
+        replayed: List[TrainingLoadDay] = []
+        for day in sorted(days):
+            state = _advance(state, day, days[day].load)
+            replayed.append(state)
+
+        self.repo.save(cmd.user_id, cmd.track_id, cmd.day, new_load, replayed)
+        return replayed[-1]
+
+    def track_load(self, cmd: UpdateTrainingLoadCommand) -> float:
+        """
+        Нагрузка трека по аналогии с TSS: часы в движении × IF² × 100.
+        IF — скорость с поправкой на набор (100 м набора ≈ 1 км) к пороговой скорости.
+        """
+        moving_hours = (cmd.moving_duration_seconds or 0) / 3600.0
+        if moving_hours <= 0:
+            return 0.0
+        equivalent_kilometers = (cmd.distance_kilometers or 0.0) + (cmd.elevation_gain_meters or 0.0) / 100.0
+        intensity_factor = equivalent_kilometers / moving_hours / self.threshold_speed_kilometers_per_hour
+        return round(moving_hours * intensity_factor**2 * 100.0, 2)
+
+
+class GetTrainingFormUseCase:
+    """Сценарий: текущие ATL/CTL/TSB пользователя из сохранённого состояния."""
+
+    def __init__(self, user_repo: UserRepository, training_repo: TrainingLoadRepository):
+        self.user_repo = user_repo
+        self.training_repo = training_repo
+
+    def execute(self, cmd: GetTrainingFormCommand) -> Optional[Dict[str, Any]]:
+        user_id = self.user_repo.get_id_by_tg_id(cmd.tg_id)
+        if not user_id:
+            return None
+
+        latest = self.training_repo.get_latest_day(user_id)
+        if latest is None:
+            return None
+
+        # Затухание от последнего дня с тренировкой до сегодня
+        gap = max((cmd.today - latest.day).days, 0)
+        today = replace(
+            latest,
+            day=cmd.today,
+            load=0.0 if gap else latest.load,
+            acute_load=latest.acute_load * ACUTE_DECAY**gap,
+            chronic_load=latest.chronic_load * CHRONIC_DECAY**gap,
+        )
+        return {
+            "day": today.day,
+            "last_activity_day": latest.day,
+            "acute_load": round(today.acute_load, 1),
+            "chronic_load": round(today.chronic_load, 1),
+            "training_stress_balance": round(today.training_stress_balance, 1),
+        }
@@ -19,3 +19,27 @@ class UpsertTelegramUserUseCase:
                 created_at=datetime.now(timezone.utc),
             )
         )
+
+
+class EnsureUserUseCase:
+    """Пользователь по tg_id для клиентов без Telegram-профиля: существующий не перезаписывается."""
+
+    def __init__(self, users: UserRepository):
+        self.users = users
+
+    def execute(self, tg_id: int) -> int:
+        user_id = self.users.get_id_by_tg_id(tg_id)
+        if user_id:
+            return user_id
+        return self.users.upsert(
+            UserEntity(
+                tg_id=tg_id,
+                first_name=None,
+                last_name=None,
+                is_bot=False,
+                language_code=None,
+                # username в таблице обязателен и уникален
+                username=f"tg{tg_id}",
+                created_at=datetime.now(timezone.utc),
+            )
+        )
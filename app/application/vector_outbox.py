@@ -0,0 +1,135 @@
+"""
+Слой аппликации: доставка outbox векторного индекса и сверка индекса с SQL
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.application.track import track_index_payload
+from app.domain.ports.metrics import Metrics, NullMetrics
+from app.domain.ports.track import TrackFeaturesRepository, TrackVectorIndex, TrackVectorizer, VectorOutbox
+
+
+class DrainVectorOutboxUseCase:
+    """
+    Сценарий: отправить пачку операций из outbox в индекс.
+    Outbox отдаёт операции трека все сразу и по порядку, так что схлопывание (побеждает последняя)
+    не зависит от числа дренажей и отложенных пачек. Точки уходят одним пакетным запросом.
+    Ошибка индекса откладывает всю пачку с экспоненциальной задержкой. Когда попытки исчерпаны,
+    пачка отправляется по трекам: доставленные подтверждаются, упавшие уходят в dead —
+    одна «ядовитая» точка не держит остальные и не повторяется бесконечно.
+    """
+
+    def __init__(
+        self,
+        outbox: VectorOutbox,
+        vector_index: TrackVectorIndex,
+        batch_size: int = 256,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 300.0,
+        max_attempts: int = 20,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.outbox = outbox
+        self.vector_index = vector_index
+        self.batch_size = batch_size
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.max_attempts = max_attempts
+        self.metrics = metrics or NullMetrics()
+
+    def execute(self) -> int:
+        """Сколько операций доставлено; 0 — outbox пуст или пачка отложена."""
+        entries = self.outbox.claim(self.batch_size)
+        if not entries:
+            return 0
+
+        by_track: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_track.setdefault(entry["track_id"], []).append(entry)
+        entry_ids = [entry["id"] for entry in entries]
+
+        try:
+            with self.metrics.stage("outbox.deliver"):
+                self.vector_index.upsert_many([self._point(track_entries) for track_entries in by_track.values()])
+        except Exception as e:
+            attempts = max(entry["attempts"] for entry in entries) + 1
+            if attempts >= self.max_attempts:
+                return self._deliver_by_track(by_track)
+            delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+            self.outbox.retry(entry_ids, f"{type(e).__name__}: {e}", delay)
+            self.metrics.increment("vector_outbox_retries_total", len(entries))
+            return 0
+
+        self.outbox.ack(entry_ids)
+        self.metrics.increment("vector_outbox_delivered_total", len(by_track))
+        return len(entries)
+
+    @staticmethod
+    def _point(track_entries: List[Dict[str, Any]]) -> Tuple[str, List[float], Dict[str, Any]]:
+        # Операции трека идут по порядку записи: побеждает последняя
+        last = track_entries[-1]
+        return last["track_id"], last["vector"], last["payload"]
+
+    def _deliver_by_track(self, by_track: Dict[str, List[Dict[str, Any]]]) -> int:
+        delivered = 0
+        for track_entries in by_track.values():
+            ids = [entry["id"] for entry in track_entries]
+            try:
+                self.vector_index.upsert_many([self._point(track_entries)])
+            except Exception as e:
+                self.outbox.mark_dead(ids, f"{type(e).__name__}: {e}")
+                self.metrics.increment("vector_outbox_dead_total", len(ids))
+                continue
+            self.outbox.ack(ids)
+            self.metrics.increment("vector_outbox_delivered_total")
+            delivered += len(ids)
+        return delivered
+
+
+class ReconcileVectorIndexUseCase:
+    """
+    Сценарий: сверка индекса с track_features.
+    Треки без точки в индексе переиндексируются из сохранённых признаков, точки без трека удаляются.
+    Id индекса читаются раньше SQL: точка попадает в индекс только после commit признаков,
+    поэтому трек, загруженный во время сверки, не будет принят за «лишний».
+    """
+
+    def __init__(
+        self,
+        features_repo: TrackFeaturesRepository,
+        vector_index: TrackVectorIndex,
+        track_vectorizer: TrackVectorizer,
+        batch_size: int = 256,
+    ):
+        self.features_repo = features_repo
+        self.vector_index = vector_index
+        self.track_vectorizer = track_vectorizer
+        self.batch_size = batch_size
+
+    def execute(self, dry_run: bool = False) -> Dict[str, int]:
+        index_ids = set(self.vector_index.ids())
+        sql_ids = set(self.features_repo.list_ids())
+        missing = sorted(sql_ids - index_ids)
+        orphaned = sorted(index_ids - sql_ids)
+        report = {"sql": len(sql_ids), "index": len(index_ids), "missing": len(missing), "orphaned": len(orphaned)}
+        if dry_run:
+            return report
+
+        for start in range(0, len(missing), self.batch_size):
+            features_list: List[Dict[str, Any]] = [
+                features
+                for track_id in missing[start : start + self.batch_size]
+                if (features := self.features_repo.get(track_id)) is not None
+            ]
+            if not features_list:
+                continue
+            vectors = self.track_vectorizer.vectorize_many(features_list)
+            self.vector_index.upsert_many(
+                [
+                    (f["id"], vector, track_index_payload(f.get("source_format") or "gpx", f))
+                    for f, vector in zip(features_list, vectors)
+                ]
+            )
+        for start in range(0, len(orphaned), self.batch_size):
+            self.vector_index.delete_many(orphaned[start : start + self.batch_size])
+        return report
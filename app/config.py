@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,7 +11,112 @@ class Settings(BaseSettings):
     QDRANT_COLLECTION: str = "track_features_v1"
     EMBEDDING_DIM: int = 13
 
+    # Индекс Qdrant: HNSW, квантование ("none" | "scalar" | "product") и хранение оригиналов на диске
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_SEARCH_HNSW_EF: int | None = None
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_PRODUCT_COMPRESSION: str = "x16"
+    QDRANT_ON_DISK_VECTORS: bool = False
+    QDRANT_SEARCH_RESCORE: bool = True
+    QDRANT_SEARCH_OVERSAMPLING: float = 2.0
+
+    # Пороговая скорость для расчёта тренировочной нагрузки (IF = скорость / порог)
+    TRAINING_LOAD_THRESHOLD_SPEED_KMH: float = 12.0
+
+    # Пакетный предрасчёт рекомендаций
+    RECOMMENDATIONS_PRECOMPUTE_BATCH_SIZE: int = 200
+    RECOMMENDATIONS_PRECOMPUTE_TOP_K: int = 10
+
+    # Режим /recommend: "vector" — векторный индекс; "hybrid" — SQL-префильтр + rerank
+    RECOMMEND_SEARCH_MODE: Literal["vector", "hybrid"] = "vector"
+
+    # Многоцентроидный профиль пользователя (1 — классический средний вектор; >1 — k-means,
+    # пока треков меньше чем на два центра, профиль остаётся классическим)
+    PROFILE_MAX_CENTROIDS: int = 1
+    PROFILE_MIN_TRACKS_PER_CENTROID: int = 3
+
+    # Эндпоинт /metrics в формате Prometheus (None — не поднимать)
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int | None = None
+
+    # Профилирование запросов (cProfile + tracemalloc): всегда, 1 из N или по команде /profile
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: int = 0
+    PROFILING_OUTPUT_DIR: str = "./data/profiles"
+    ADMIN_TG_IDS: list[int] = []
+
+    # HTTP API (FastAPI + uvicorn): загрузки сверх HTTP_SPOOL_MEMORY_BYTES буферизуются на диске
+    HTTP_HOST: str = "127.0.0.1"
+    HTTP_PORT: int = 8000
+    HTTP_WORKERS: int = 2
+    HTTP_API_TOKEN: str | None = None
+    HTTP_MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    HTTP_MAX_BULK_FILES: int = 50
+    HTTP_SPOOL_MEMORY_BYTES: int = 1024 * 1024
+
+    # Массовый импорт архивов (0 воркеров — по числу CPU); группы файлов Telegram собираются с паузой
+    IMPORT_WORKERS: int = 0
+    IMPORT_BATCH_SIZE: int = 64
+    IMPORT_MAX_FILE_BYTES: int = 50 * 1024 * 1024
+    IMPORT_CHECKPOINT_DIR: str = "./data/imports"
+    TELEGRAM_MEDIA_GROUP_WAIT_SECONDS: float = 1.5
+
     TELEGRAM_TOKEN: str | None = None
+    # Документы крупнее скачиваются во временный файл и разбираются через mmap, а не копией в памяти
+    TELEGRAM_SPOOL_MEMORY_BYTES: int = 1024 * 1024
+
+    # Режим бота: "polling" (разработка) или "webhook" (ASGI на uvicorn); число апдейтов в обработке одновременно
+    TELEGRAM_MODE: Literal["polling", "webhook"] = "polling"
+    TELEGRAM_CONCURRENT_UPDATES: int = 8
+    TELEGRAM_WEBHOOK_URL: str | None = None
+    TELEGRAM_WEBHOOK_PATH: str = "/telegram/webhook"
+    TELEGRAM_WEBHOOK_SECRET: str | None = None
+    TELEGRAM_WEBHOOK_HOST: str = "127.0.0.1"
+    TELEGRAM_WEBHOOK_PORT: int = 8081
+    TELEGRAM_WEBHOOK_WORKERS: int = 1
+    TELEGRAM_WEBHOOK_MAX_CONNECTIONS: int = 40
+
+    # Лимиты файла трека до разбора (любой источник): размер и число точек
+    TRACK_MAX_FILE_BYTES: int = 50 * 1024 * 1024
+    TRACK_MAX_POINTS: int = 200_000
+
+    # Очередь загрузок: "inline" — разбор в боте, "queue" — бот сохраняет файл и ставит задачу в ingest_jobs,
+    # её выполняет python -m app.adapters.worker (задача без подтверждения дольше таймаута — снова в очереди)
+    INGEST_MODE: Literal["inline", "queue"] = "inline"
+    INGEST_WORKER_BATCH_SIZE: int = 4
+    INGEST_WORKER_POLL_SECONDS: float = 1.0
+    INGEST_JOB_VISIBILITY_TIMEOUT_SECONDS: float = 300.0
+    INGEST_JOB_MAX_ATTEMPTS: int = 5
+    INGEST_JOB_RETRY_BASE_SECONDS: float = 10.0
+    INGEST_JOB_RETRY_MAX_SECONDS: float = 600.0
+
+    # Outbox векторного индекса: точки пишутся в vector_outbox в транзакции признаков, в Qdrant их
+    # пачками отправляет фоновый дренаж (в боте, HTTP API, воркере или cli drain-vector-outbox --follow)
+    VECTOR_OUTBOX_ENABLED: bool = True
+    VECTOR_OUTBOX_BATCH_SIZE: int = 256
+    VECTOR_OUTBOX_POLL_SECONDS: float = 0.5
+    VECTOR_OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    VECTOR_OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+    # После стольких неудачных попыток (около часа при недоступном индексе) операции трека уходят в dead;
+    # вернуть их — cli drain-vector-outbox --requeue-dead
+    VECTOR_OUTBOX_MAX_ATTEMPTS: int = 20
+
+    # Допуск тяжёлых обработчиков (загрузки, импорт): всего одновременно, на пользователя, ждущих в очереди.
+    # ADMISSION_MAX_IN_FLIGHT меньше TELEGRAM_CONCURRENT_UPDATES — остаток держит /recommend и команды
+    ADMISSION_MAX_IN_FLIGHT: int = 4
+    ADMISSION_PER_USER: int = 1
+    ADMISSION_MAX_QUEUE: int = 200
+
+    # Хранилище исходных файлов: сжатие при записи "auto" (zstd, если установлен zstandard, иначе gzip),
+    # "zstd", "gzip" или "none"; уровень None — по умолчанию кодека (zstd 3, gzip 6)
+    RAW_STORAGE_DIR: str = "./data/uploads"
+    RAW_STORAGE_COMPRESSION: str = "auto"
+    RAW_STORAGE_COMPRESSION_LEVEL: int | None = None
+    # Холодный архив: cli compact-raw-storage переносит файлы старше N дней в pack-файлы до заданного размера
+    RAW_STORAGE_PACK_AFTER_DAYS: float = 30.0
+    RAW_STORAGE_PACK_MAX_BYTES: int = 256 * 1024 * 1024
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
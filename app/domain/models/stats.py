@@ -0,0 +1,13 @@
+"""Доменные сущности сводной статистики объёмов
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class GetVolumeStatsCommand:
+    """Команда для получения недельных и месячных объёмов пользователя."""
+
+    tg_id: int
+    weeks: int = 4
+    months: int = 3
@@ -1,10 +1,10 @@
-"""Доменные сущности треков
-"""
+"""Доменные сущности треков"""
 
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, fields
 from datetime import datetime
 from enum import StrEnum
-from typing import Optional
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
 
 
 class TrackFormat(StrEnum):
@@ -13,6 +13,84 @@ class TrackFormat(StrEnum):
     TCX = "tcx"
 
 
+# Содержимое файла трека: байты или буфер без копии (memoryview поверх загрузки или mmap файла)
+TrackBytes = Union[bytes, bytearray, memoryview]
+# ...или поток (например, TrackStorage.open_raw с распаковкой на лету)
+TrackSource = Union[bytes, bytearray, memoryview, BinaryIO]
+
+# Сколько первых байт файла получает TrackFormatDetector: пролог XML (пробелы, комментарии)
+# бывает длинным, а корневой элемент должен в них попасть
+FORMAT_SNIFF_MAX_BYTES = 64 * 1024
+
+
+class TrackRejectedError(ValueError):
+    """
+    Файл отклонён: не трек, обрезан, превышены лимиты или не разбирается.
+    ValueError — окончательная ошибка (в очереди загрузок задача сразу уходит в dead); reason — метка метрик.
+    """
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+# Целевые дистанции лучших отрезков (личных рекордов), метры
+BEST_EFFORT_DISTANCES_METERS: Dict[str, float] = {
+    "1k": 1000.0,
+    "5k": 5000.0,
+    "10k": 10000.0,
+    "half_marathon": 21097.5,
+}
+
+
+# Точность «зоны старта»: 3 знака ≈ ячейка ~110 м по широте
+START_AREA_PRECISION = 3
+
+
+def approx_start_area_id(lat: Optional[float], lon: Optional[float], precision: int = START_AREA_PRECISION):
+    """Приближённая «зона старта» (округление координат), напр. '55.751:37.618'."""
+    if lat is None or lon is None:
+        return None
+    return f"{round(lat, precision)}:{round(lon, precision)}"
+
+
+def start_area_ids_around(
+    lat: float, lon: float, radius_cells: int, precision: int = START_AREA_PRECISION
+) -> List[str]:
+    """
+    Идентификаторы зон старта в квадрате radius_cells вокруг точки.
+    По долготе радиус в ячейках растёт как 1/cos(широты), чтобы покрыть ту же дистанцию.
+    """
+    step = 10.0**-precision
+    center_lat, center_lon = round(lat, precision), round(lon, precision)
+    lon_radius = math.ceil(radius_cells / max(math.cos(math.radians(lat)), 0.1))
+    return [
+        approx_start_area_id(center_lat + i * step, center_lon + j * step, precision)
+        for i in range(-radius_cells, radius_cells + 1)
+        for j in range(-lon_radius, lon_radius + 1)
+    ]
+
+
+# Отпечаток маршрута (MinHash): число компонент и LSH-полос (по 4 компоненты)
+ROUTE_FINGERPRINT_SIZE = 32
+ROUTE_FINGERPRINT_BANDS = 8
+# Оценка Жаккара, начиная с которой маршруты считаются почти одинаковыми
+ROUTE_DUPLICATE_SIMILARITY = 0.6
+
+
+def route_fingerprint_bands(signature: Sequence[int], bands: int = ROUTE_FINGERPRINT_BANDS) -> List[Tuple[int, ...]]:
+    """Разбиение сигнатуры на LSH-полосы; совпадение любой полосы — кандидат в дубликаты."""
+    rows = len(signature) // bands
+    return [tuple(signature[i * rows : (i + 1) * rows]) for i in range(bands)]
+
+
+def route_fingerprint_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Оценка коэффициента Жаккара по доле совпавших компонент MinHash."""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
 @dataclass(frozen=True)
 class Track:
     """Базовая доменная сущность трека."""
@@ -54,6 +132,10 @@ class TrackFeatures:
     elevation_gain_per_kilometer: Optional[float]
     terrain_category: Optional[str]
 
+    # Отпечаток маршрута
+    route_fingerprint: Optional[List[int]]
+    route_cluster_key: Optional[str]
+
     # Время/скорость
     total_elapsed_duration_seconds: Optional[int]
     total_moving_duration_seconds: Optional[int]
@@ -65,6 +147,15 @@ class TrackFeatures:
     features_version: int
     computed_at_utc: datetime
     source_format: Optional[str]
+    # Версии провайдеров признаков, которыми посчитана строка; None — до реестра провайдеров
+    feature_versions: Optional[Dict[str, int]]
+
+
+_SERVICE_FEATURE_FIELDS = {"id", "features_version", "computed_at_utc", "source_format", "feature_versions"}
+# Признаки строки track_features; лучшие отрезки хранятся отдельно и сюда не входят
+TRACK_FEATURE_FIELDS: Tuple[str, ...] = tuple(
+    f.name for f in fields(TrackFeatures) if f.name not in _SERVICE_FEATURE_FIELDS
+)
 
 
 @dataclass(frozen=True)
@@ -75,7 +166,8 @@ class ComputeAndIndexTrackFeaturesCommand:
 
     track_id: str
     track_format: TrackFormat
-    file_bytes: bytes
+    file_bytes: TrackBytes
+    user_id: Optional[int] = None
 
 
 @dataclass(frozen=True)
@@ -84,4 +176,29 @@ class RecommendRoutesCommand:
 
     tg_id: int
     top_k: int = 3
+    # True — маршруты других пользователей (свои исключаются), False — только свои
     include_other_users: bool = True
+    # "vector" — поиск в векторном индексе; "hybrid" — SQL-префильтр по индексам + точный rerank
+    mode: str = "vector"
+
+
+@dataclass(frozen=True)
+class GetPersonalRecordsCommand:
+    """Команда для получения личных рекордов пользователя."""
+
+    tg_id: int
+
+
+@dataclass(frozen=True)
+class ListUserTracksCommand:
+    """Команда для получения признаков всех треков пользователя."""
+
+    tg_id: int
+
+
+@dataclass(frozen=True)
+class GetTrackFeaturesCommand:
+    """Команда для получения признаков одного трека пользователя."""
+
+    tg_id: int
+    track_id: str
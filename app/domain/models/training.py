@@ -0,0 +1,44 @@
+"""Доменные сущности тренировочной нагрузки (ATL/CTL/TSB)
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+# Постоянные времени экспоненциального сглаживания, дни
+ACUTE_LOAD_TIME_CONSTANT_DAYS = 7
+CHRONIC_LOAD_TIME_CONSTANT_DAYS = 42
+
+
+@dataclass(frozen=True)
+class TrainingLoadDay:
+    """Состояние нагрузки пользователя на конец дня, в который были тренировки."""
+
+    day: date
+    load: float
+    acute_load: float
+    chronic_load: float
+
+    @property
+    def training_stress_balance(self) -> float:
+        return self.chronic_load - self.acute_load
+
+
+@dataclass(frozen=True)
+class UpdateTrainingLoadCommand:
+    """Входные данные пересчёта нагрузки по одному треку."""
+
+    user_id: int
+    track_id: str
+    day: Optional[date]
+    moving_duration_seconds: Optional[int]
+    distance_kilometers: Optional[float]
+    elevation_gain_meters: Optional[float]
+
+
+@dataclass(frozen=True)
+class GetTrainingFormCommand:
+    """Команда для получения текущей формы пользователя."""
+
+    tg_id: int
+    today: date
@@ -0,0 +1,30 @@
+from contextlib import AbstractContextManager, nullcontext
+from typing import Mapping, Optional, Protocol
+
+Labels = Optional[Mapping[str, str]]
+
+
+class Metrics(Protocol):
+    def increment(self, name: str, amount: float = 1.0, labels: Labels = None) -> None: ...
+    def observe(self, name: str, value: float, labels: Labels = None) -> None: ...
+    def gauge(self, name: str, value: float, labels: Labels = None) -> None: ...
+
+    def stage(self, name: str) -> AbstractContextManager:
+        """Время стадии конвейера; исключение внутри считается ошибкой стадии."""
+        ...
+
+
+class NullMetrics(Metrics):
+    """Метрики выключены: все вызовы — no-op."""
+
+    def increment(self, name: str, amount: float = 1.0, labels: Labels = None) -> None:
+        pass
+
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        pass
+
+    def gauge(self, name: str, value: float, labels: Labels = None) -> None:
+        pass
+
+    def stage(self, name: str) -> AbstractContextManager:
+        return nullcontext()
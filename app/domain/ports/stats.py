@@ -0,0 +1,7 @@
+from typing import Any, Dict, List, Optional, Protocol
+
+
+class VolumeStatsRepository(Protocol):
+    def get_weekly(self, user_id: int, limit: int) -> List[Dict[str, Any]]: ...
+    def get_monthly(self, user_id: int, limit: int) -> List[Dict[str, Any]]: ...
+    def rebuild(self, user_id: Optional[int] = None) -> int: ...
@@ -7,13 +7,30 @@
 - Запрет на импорт из инфраструктуры или фреймворков.
 """
 
-from typing import Any, Dict, List, Mapping, Optional, Protocol
-
-from app.domain.models.track import Track, TrackFormat
+from datetime import datetime
+from typing import (
+    Any,
+    BinaryIO,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from app.domain.models.track import Track, TrackFormat, TrackSource
 
 
 class TrackStorage(Protocol):
-    def save_raw(self, track: Track, content: bytes) -> str: ...
+    def save_raw(self, track: Track, content: TrackSource) -> str: ...
+    def load_raw(self, track: Track) -> bytes: ...
+    def open_raw(self, track: Track) -> BinaryIO: ...
     def exists(self, track_id: str) -> bool: ...
 
 
@@ -21,24 +38,77 @@ class TrackIdGenerator(Protocol):
     def new_id(self) -> str: ...
 
 
+class TrackContentIdGenerator(Protocol):
+    """Детерминированный id по содержимому: повторный импорт того же файла не плодит дубликаты."""
+
+    def id_for(self, user_id: int, content: bytes) -> str: ...
+
+
 class TrackFormatDetector(Protocol):
+    """Формат по имени и первым байтам файла (до FORMAT_SNIFF_MAX_BYTES); None — не трек."""
+
     def detect(self, filename: str, first_bytes: bytes) -> Optional[TrackFormat]: ...
 
 
 class TrackMetadataRepository(Protocol):
     def save(self, meta) -> None: ...
 
+    def save_many(self, metas: Sequence[Mapping[str, Any]]) -> None:
+        """Не фиксирует транзакцию: пачка метаданных сохраняется тем же commit, что и её признаки (upsert_many)."""
+        ...
+
+    def existing_ids(self, track_ids: Sequence[str]) -> Set[str]: ...
+
 
 class TrackParser(Protocol):
-    def parse(self, format: TrackFormat, blob: bytes) -> dict: ...
+    def parse(self, format: TrackFormat, blob: TrackSource) -> dict: ...
 
 
 class TrackFeatureExtractor(Protocol):
-    def extract(self, format: TrackFormat, blob: bytes) -> Mapping[str, Any]: ...
+    def extract(
+        self, format: TrackFormat, blob: TrackSource, features: Optional[Collection[str]] = None
+    ) -> Mapping[str, Any]:
+        """Признаки трека (None — все) и "feature_versions" — версии посчитанных провайдеров."""
+        ...
+
+    def stale_features(self, format: TrackFormat, feature_versions: Optional[Mapping[str, int]]) -> List[str]:
+        """Признаки, посчитанные устаревшими версиями провайдеров (None — строка до реестра провайдеров)."""
+        ...
 
 
 class TrackFeaturesRepository(Protocol):
     def upsert(self, features: Mapping[str, Any]) -> None: ...
+    def upsert_many(self, features_list: Sequence[Mapping[str, Any]]) -> None: ...
+    def get(self, track_id: str) -> Optional[Dict[str, Any]]: ...
+    def list_ids(self) -> List[str]: ...
+
+    def page_feature_versions(self, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """
+        Треки с признаками по возрастанию id после after_id (keyset-страница):
+        id, user_id, filename, format, source, created_at, feature_versions.
+        """
+        ...
+
+    def get_all_by_user(self, user_id: int) -> List[Dict[str, Any]]: ...
+    def get_all_by_users(self, user_ids: Sequence[int]) -> Dict[int, List[Dict[str, Any]]]: ...
+
+    def find_candidates(
+        self,
+        area_ids: Optional[Sequence[str]] = None,
+        distance_range: Optional[Tuple[float, float]] = None,
+        terrain: Optional[str] = None,
+        user_id: Optional[int] = None,
+        exclude_user_id: Optional[int] = None,
+        limit: int = 200,
+        target_distance: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Не больше limit кандидатов; порядок детерминирован: ближе к target_distance, затем по id."""
+        ...
+
+
+class BestEffortsRepository(Protocol):
+    def replace_for_track(self, track_id: str, user_id: int, efforts: List[Mapping[str, Any]]) -> None: ...
+    def get_personal_records(self, user_id: int) -> List[Dict[str, Any]]: ...
 
 
 class TrackVectorIndex(Protocol):
@@ -46,11 +116,107 @@ class TrackVectorIndex(Protocol):
 
     def upsert(self, track_id: str, user_id: int, vector: List[float], payload: Dict[str, Any]) -> None: ...
 
+    def upsert_many(self, points: Sequence[Tuple[str, List[float], Dict[str, Any]]]) -> None: ...
+    def delete_many(self, track_ids: Sequence[str]) -> None: ...
+    def ids(self) -> Iterator[str]: ...
+
     def search(
-        self, query_vector: List[float], top_k: int = 10, user_id_filter: Optional[int] = None
-    ) -> List[Dict[str, Any]]: ...
+        self, query_vector: List[float], top_k: int = 10, exclude_user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """exclude_user_id — не возвращать треки этого пользователя (user_id в payload)."""
+        ...
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[List[float]],
+        top_k: int = 10,
+        exclude_user_ids: Optional[Sequence[Optional[int]]] = None,
+    ) -> List[List[Dict[str, Any]]]: ...
+
+
+class VectorOutbox(Protocol):
+    """
+    Outbox векторного индекса. add_* не фиксируют транзакцию: операция сохраняется тем же
+    commit, что и признаки трека, и не теряется, если индекс недоступен. В индекс операции
+    отправляет DrainVectorOutboxUseCase.
+    """
+
+    def add_upserts(self, points: Sequence[Tuple[str, List[float], Dict[str, Any]]]) -> None: ...
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Готовые к отправке операции по порядку записи; захвачены до ack/retry.
+        Операции одного трека отдаются только вместе и начиная с самой ранней в outbox.
+        """
+        ...
+
+    def ack(self, entry_ids: Sequence[int]) -> None: ...
+    def retry(self, entry_ids: Sequence[int], error: str, delay_seconds: float) -> None: ...
+    def mark_dead(self, entry_ids: Sequence[int], error: str) -> None: ...
+    def pending(self) -> int: ...
+    def dead(self) -> int: ...
+
+    def requeue_dead(self) -> int:
+        """Вернуть операции из dead в очередь с нулём попыток; сколько возвращено."""
+        ...
+
+
+class TrackBatchAnalyzer(Protocol):
+    """
+    Разбор пачки файлов (формат, метаданные, признаки), возможно параллельный.
+    Результаты отдаются в порядке входа: (имя, содержимое, {"format", "meta", "features"} | {"error"}).
+    """
+
+    def analyze_many(self, files: Iterable[Tuple[str, bytes]]) -> Iterator[Tuple[str, bytes, Mapping[str, Any]]]: ...
+
+
+class ImportCheckpoint(Protocol):
+    """Какие записи архива уже импортированы — для продолжения прерванного импорта."""
+
+    def done(self) -> Set[str]: ...
+    def mark_done(self, names: Sequence[str]) -> None: ...
 
 
 class TrackVectorizer(Protocol):
     def vector_size(self) -> int: ...
     def vectorize(self, features: Mapping[str, Any]) -> List[float]: ...
+    def vectorize_many(self, features_list: Sequence[Mapping[str, Any]]) -> List[List[float]]: ...
+
+
+class UserProfileBuilder(Protocol):
+    def build(self, vectors: Sequence[List[float]]) -> List[Tuple[List[float], float]]: ...
+
+
+class RecommendationsRepository(Protocol):
+    def replace_for_users(
+        self,
+        generation: int,
+        computed_at: datetime,
+        recommendations: Mapping[int, List[Dict[str, Any]]],
+        mode: str = "vector",
+        include_other_users: bool = True,
+    ) -> None: ...
+
+    def get_fresh(
+        self, user_id: int, mode: str = "vector", include_other_users: bool = True
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Предрасчёт, если он свежий и построен для того же режима и охвата; иначе None."""
+        ...
+
+
+class IngestJobQueue(Protocol):
+    """
+    Надёжная очередь загрузок: задача захватывается воркером на visibility_timeout_seconds;
+    не завершённая за это время (воркер упал) снова становится доступной.
+    """
+
+    def enqueue(self, job: Mapping[str, Any]) -> str: ...
+    def claim(self, worker_id: str, limit: int, visibility_timeout_seconds: float) -> List[Dict[str, Any]]: ...
+    def complete(self, job_id: str, worker_id: str) -> bool: ...
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry_in_seconds: Optional[float]) -> Optional[str]:
+        """retry_in_seconds=None — без повторов; возвращает новый статус или None, если захват утерян."""
+        ...
+
+    def counts(self) -> Dict[str, int]: ...
+    def requeue_dead(self) -> int: ...
@@ -0,0 +1,15 @@
+from datetime import date
+from typing import List, Optional, Protocol, Tuple
+
+from app.domain.models.training import TrainingLoadDay
+
+
+class TrainingLoadRepository(Protocol):
+    def get_track_load(self, track_id: str) -> Optional[Tuple[date, float]]: ...
+    def get_day_before(self, user_id: int, day: date) -> Optional[TrainingLoadDay]: ...
+    def get_days_since(self, user_id: int, day: date) -> List[TrainingLoadDay]: ...
+    def get_latest_day(self, user_id: int) -> Optional[TrainingLoadDay]: ...
+
+    def save(
+        self, user_id: int, track_id: str, track_day: date, track_load: float, days: List[TrainingLoadDay]
+    ) -> None: ...
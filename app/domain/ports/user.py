@@ -1,4 +1,4 @@
-from typing import Optional, Protocol
+from typing import List, Optional, Protocol
 
 from app.domain.models.users import UserEntity
 
@@ -7,3 +7,4 @@ class UserRepository(Protocol):
     def upsert(self, user: UserEntity) -> int: ...
     def get_by_id(self, user_id: int) -> Optional[UserEntity]: ...
     def get_id_by_tg_id(self, tg_id: int) -> Optional[int]: ...
+    def list_ids(self, after_id: int = 0, limit: int = 100) -> List[int]: ...
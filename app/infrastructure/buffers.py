@@ -0,0 +1,45 @@
+"""Infrastructure: zero-copy views of spooled uploads.
+
+Responsibilities:
+- Expose a file on disk (a Telegram download, an HTTP upload spilled by its
+  SpooledTemporaryFile) as a read-only ``memoryview`` over ``mmap``. The raw
+  storage and the parsers then read the page cache directly, with no heap copy
+  of the whole upload.
+
+Constraints:
+- The view is valid only inside the ``with`` block. A slice still alive at
+  exit (e.g. held by a traceback) keeps the mapping open until it is garbage
+  collected.
+"""
+
+import mmap
+import os
+from contextlib import contextmanager
+from typing import IO, Iterator, Union
+
+
+@contextmanager
+def mapped_file(source: Union[str, os.PathLike, IO[bytes]]) -> Iterator[memoryview]:
+    """Файл (путь или открытый объект с fileno) как memoryview только для чтения."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            with mapped_file(f) as view:
+                yield view
+        return
+
+    # Буфер записи (SpooledTemporaryFile после переполнения) должен дойти до файла раньше отображения
+    source.flush()
+    if os.fstat(source.fileno()).st_size == 0:
+        # Пустой файл mmap не отображает
+        yield memoryview(b"")
+        return
+    mapping = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapping)
+    try:
+        yield view
+    finally:
+        view.release()
+        try:
+            mapping.close()
+        except BufferError:
+            pass
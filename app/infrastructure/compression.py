@@ -0,0 +1,121 @@
+"""Infrastructure: compression codecs for raw track files.
+
+Responsibilities:
+- Compress raw uploads on write and hand out streaming readers that inflate on
+  the fly, so stored blobs can be re-parsed without keeping a compressed copy
+  and an inflated copy in memory.
+- Prefer zstd (``zstandard`` package, optional) and fall back to gzip from
+  the standard library.
+
+Constraints:
+- The codec is recognised by the suffix appended to the stored file name
+  (``.zst`` / ``.gz``); files written before compression was enabled have
+  no suffix and are read as is.
+"""
+
+import gzip
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd — необязательная зависимость
+    zstandard = None
+
+
+class Codec:
+    """Без сжатия; базовый класс кодеков."""
+
+    name = "none"
+    suffix = ""
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def open_writer(self, path: Path) -> BinaryIO:
+        """Поток записи со сжатием на лету: крупный файл не собирается сжатым целиком в памяти."""
+        return open(path, "wb")
+
+    def open_reader(self, path: Path) -> BinaryIO:
+        """Поток распакованного содержимого; закрывает файл при закрытии."""
+        return open(path, "rb")
+
+    def reader(self, raw: BinaryIO) -> BinaryIO:
+        """Поток распакованного содержимого поверх уже открытого (например, среза pack-файла в памяти)."""
+        return raw
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+    suffix = ".gz"
+
+    def __init__(self, level: Optional[int] = None):
+        self.level = 6 if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        # mtime=0 — одинаковое содержимое даёт одинаковые байты на диске
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def open_writer(self, path: Path) -> BinaryIO:
+        return gzip.GzipFile(path, "wb", compresslevel=self.level, mtime=0)
+
+    def open_reader(self, path: Path) -> BinaryIO:
+        return gzip.open(path, "rb")
+
+    def reader(self, raw: BinaryIO) -> BinaryIO:
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+    suffix = ".zst"
+
+    def __init__(self, level: Optional[int] = None):
+        self.level = 3 if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def open_writer(self, path: Path) -> BinaryIO:
+        return zstandard.ZstdCompressor(level=self.level).stream_writer(open(path, "wb"), closefd=True)
+
+    def open_reader(self, path: Path) -> BinaryIO:
+        self._require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+    def reader(self, raw: BinaryIO) -> BinaryIO:
+        self._require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+
+    @staticmethod
+    def _require_zstandard() -> None:
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed raw file but the zstandard package is not installed")
+
+
+def make_codec(name: str = "auto", level: Optional[int] = None) -> Codec:
+    """auto — zstd, если установлен zstandard, иначе gzip."""
+    name = name.lower()
+    if name == "auto":
+        name = "zstd" if zstandard is not None else "gzip"
+    if name == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        return ZstdCodec(level)
+    if name == "gzip":
+        return GzipCodec(level)
+    if name == "none":
+        return Codec()
+    raise ValueError(f"Unknown raw storage compression: {name}")
+
+
+def stored_codecs() -> List[Codec]:
+    """Кодеки для чтения в порядке поиска файла: сжатые варианты раньше несжатого."""
+    return [ZstdCodec(), GzipCodec(), Codec()]
+
+
+def codec_for_suffix(suffix: str) -> Codec:
+    for codec in stored_codecs():
+        if codec.suffix == suffix:
+            return codec
+    raise ValueError(f"Unknown compressed file suffix: {suffix}")
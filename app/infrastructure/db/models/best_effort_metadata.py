@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class BestEffortMetadata(SQLModel, table=True):
+    """Лучший отрезок трека на целевую дистанцию"""
+
+    __tablename__ = "best_efforts"
+    __table_args__ = (Index("ix_best_efforts_user_label_elapsed", "user_id", "distance_label", "elapsed_seconds"),)
+
+    track_id: str = Field(primary_key=True, foreign_key="tracks.id")
+    distance_label: str = Field(primary_key=True)
+    user_id: int = Field(foreign_key="users.id")
+    distance_meters: float
+    elapsed_seconds: float
+    start_offset_meters: float | None = None
+    start_datetime_utc: datetime | None = None
+    computed_at_utc: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PersonalRecordMetadata(SQLModel, table=True):
+    """Личный рекорд пользователя на целевую дистанцию (индекс по best_efforts)"""
+
+    __tablename__ = "personal_records"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    distance_label: str = Field(primary_key=True)
+    track_id: str = Field(foreign_key="tracks.id")
+    distance_meters: float
+    elapsed_seconds: float
+    start_datetime_utc: datetime | None = None
+    updated_at_utc: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, Index
+from sqlmodel import Field, SQLModel
+
+
+class IngestJobMetadata(SQLModel, table=True):
+    """Задача очереди загрузок: файл уже в хранилище, воркер разбирает его и индексирует"""
+
+    __tablename__ = "ingest_jobs"
+    __table_args__ = (Index("ix_ingest_jobs_status_available_at", "status", "available_at"),)
+
+    id: str = Field(primary_key=True)
+    track_id: str
+    user_id: int = Field(index=True, foreign_key="users.id")
+    filename: str
+    format: str
+    source: str = "telegram"
+    # Куда сообщить о результате (чат Telegram); None — не сообщать
+    notify_chat_id: int | None = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+    # queued → running → done | queued (повтор) | dead
+    status: str = "queued"
+    attempts: int = 0
+    max_attempts: int = 5
+    available_at: datetime
+    locked_by: str | None = None
+    locked_until: datetime | None = None
+    last_error: str | None = None
+    created_at: datetime
+    updated_at: datetime
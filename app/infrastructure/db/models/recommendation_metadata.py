@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column
+from sqlmodel import Field, SQLModel
+
+
+class UserRecommendationMetadata(SQLModel, table=True):
+    """Предрассчитанная рекомендация (top-k) для пользователя"""
+
+    __tablename__ = "user_recommendations"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    rank: int = Field(primary_key=True)
+    track_id: str
+    score: float
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    generation: int = Field(index=True)
+    computed_at_utc: datetime
+    # Для каких запросов годится предрасчёт: режим поиска и охват (чужие треки)
+    mode: str = "vector"
+    include_other_users: bool = True
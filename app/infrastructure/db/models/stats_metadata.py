@@ -0,0 +1,27 @@
+from sqlmodel import Field, SQLModel
+
+
+class WeeklyVolumeMetadata(SQLModel, table=True):
+    """Недельный объём пользователя (ISO-неделя, напр. 2025-W43)"""
+
+    __tablename__ = "volume_weekly"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    iso_week: str = Field(primary_key=True)
+    distance_kilometers: float = 0.0
+    moving_duration_seconds: int = 0
+    elevation_gain_meters: float = 0.0
+    activity_count: int = 0
+
+
+class MonthlyVolumeMetadata(SQLModel, table=True):
+    """Месячный объём пользователя (напр. 2025-10)"""
+
+    __tablename__ = "volume_monthly"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    month: str = Field(primary_key=True)
+    distance_kilometers: float = 0.0
+    moving_duration_seconds: int = 0
+    elevation_gain_meters: float = 0.0
+    activity_count: int = 0
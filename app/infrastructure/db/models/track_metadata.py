@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import JSON, Column
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -38,7 +39,7 @@ class TrackFeaturesMetadata(SQLModel, table=True):
     end_latitude_deg: float | None = None
     end_longitude_deg: float | None = None
     start_area_identifier_approx: str | None = Field(default=None, index=True)
-    total_distance_kilometers: float | None = None
+    total_distance_kilometers: float | None = Field(default=None, index=True)
     straight_line_distance_kilometers: float | None = None
     path_sinuosity_ratio: float | None = None
     route_curvature_category: str | None = Field(default=None, index=True)
@@ -46,6 +47,8 @@ class TrackFeaturesMetadata(SQLModel, table=True):
     total_elevation_loss_meters: float | None = None
     elevation_gain_per_kilometer: float | None = None
     terrain_category: str | None = Field(default=None, index=True)
+    route_fingerprint: list[int] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    route_cluster_key: str | None = Field(default=None, index=True)
     total_elapsed_duration_seconds: int | None = None
     total_moving_duration_seconds: int | None = None
     total_stopped_duration_seconds: int | None = None
@@ -57,3 +60,5 @@ class TrackFeaturesMetadata(SQLModel, table=True):
     features_version: int = 1
     computed_at_utc: datetime = Field(default_factory=datetime.utcnow)
     source_format: str | None = "gpx"
+    # Версии провайдеров признаков {"distance": 1, ...}; NULL — строка посчитана до реестра провайдеров
+    feature_versions: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
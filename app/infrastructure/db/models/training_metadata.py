@@ -0,0 +1,27 @@
+from datetime import date, datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class TrainingLoadDayMetadata(SQLModel, table=True):
+    """Состояние ATL/CTL пользователя на конец дня с тренировками"""
+
+    __tablename__ = "training_load_days"
+
+    user_id: int = Field(primary_key=True, foreign_key="users.id")
+    day: date = Field(primary_key=True)
+    load: float = 0.0
+    acute_load: float = 0.0
+    chronic_load: float = 0.0
+    updated_at_utc: datetime = Field(default_factory=datetime.utcnow)
+
+
+class TrackTrainingLoadMetadata(SQLModel, table=True):
+    """Вклад отдельного трека в нагрузку (для пересчёта и загрузки задним числом)"""
+
+    __tablename__ = "track_training_loads"
+
+    track_id: str = Field(primary_key=True, foreign_key="tracks.id")
+    user_id: int = Field(index=True, foreign_key="users.id")
+    day: date
+    load: float
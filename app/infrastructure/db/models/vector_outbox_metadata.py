@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column
+from sqlmodel import Field, SQLModel
+
+
+class VectorOutboxMetadata(SQLModel, table=True):
+    """Операция над векторным индексом, записанная в одной транзакции с признаками трека"""
+
+    __tablename__ = "vector_outbox"
+
+    id: int | None = Field(default=None, primary_key=True)
+    track_id: str = Field(index=True)
+    # upsert; лишние точки индекса удаляет сверка (reconcile-vector-index)
+    op: str
+    vector: list[float] | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    payload: dict | None = Field(default=None, sa_column=Column(JSON, nullable=True))
+    attempts: int = 0
+    available_at: datetime = Field(index=True)
+    last_error: str | None = None
+    # Не доставлена за VECTOR_OUTBOX_MAX_ATTEMPTS попыток; дренаж её больше не берёт
+    dead_at: datetime | None = None
+    created_at: datetime
@@ -2,17 +2,30 @@
 
 Constraints:
 - Import ORM models locally inside init_db to avoid cross-layer cycles.
+- The engine is created on first use, not at import: importing an adapter
+  (CLI, tests) does not build a connection pool it may never need.
 """
 
+import threading
 from contextlib import contextmanager
 
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
 
 from app.config import settings
-from app.infrastructure.db.models.track_metadata import TrackMetadata
-from app.infrastructure.db.models.user_metadata import UserMetadata
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """Общий на процесс engine из DATABASE_URL; создаётся при первом обращении."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+    return _engine
 
 
 def init_db() -> None:
@@ -21,5 +34,5 @@ def init_db() -> None:
 
 @contextmanager
 def get_session():
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
@@ -1,11 +1,79 @@
+"""Infrastructure: Qdrant client and collection settings.
+
+Constraints:
+- The client is created on first use, not at import.
+"""
+
+import threading
+from typing import Optional
+
 from qdrant_client import QdrantClient, models
 
 from app.config import settings
 
-client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> QdrantClient:
+    """Общий на процесс клиент из QDRANT_URL; создаётся при первом обращении."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+    return _client
 
 
-def init_qdrant():
+def hnsw_config() -> models.HnswConfigDiff:
+    return models.HnswConfigDiff(
+        m=settings.QDRANT_HNSW_M,
+        ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+        full_scan_threshold=10_000,
+    )
+
+
+def quantization_config() -> Optional[models.QuantizationConfig]:
+    """Квантование векторов по настройкам: int8-скаляр, product или без него."""
+    mode = settings.QDRANT_QUANTIZATION.lower()
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+            )
+        )
+    if mode == "product":
+        return models.ProductQuantization(
+            product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio(settings.QDRANT_PRODUCT_COMPRESSION),
+                always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+            )
+        )
+    raise ValueError(f"Unknown QDRANT_QUANTIZATION: {settings.QDRANT_QUANTIZATION}")
+
+
+def search_params() -> Optional[models.SearchParams]:
+    """
+    Параметры поиска: ef для HNSW и пересчёт кандидатов по оригинальным векторам
+    (oversampling) при включённом квантовании.
+    """
+    quantization = None
+    if settings.QDRANT_QUANTIZATION.lower() != "none":
+        quantization = models.QuantizationSearchParams(
+            rescore=settings.QDRANT_SEARCH_RESCORE,
+            oversampling=settings.QDRANT_SEARCH_OVERSAMPLING,
+        )
+    if quantization is None and settings.QDRANT_SEARCH_HNSW_EF is None:
+        return None
+    return models.SearchParams(hnsw_ef=settings.QDRANT_SEARCH_HNSW_EF, quantization=quantization)
+
+
+def init_qdrant(client: Optional[QdrantClient] = None):
+    client = client or get_client()
     try:
         client.get_collection(settings.QDRANT_COLLECTION)
     except Exception:
@@ -14,11 +82,30 @@ def init_qdrant():
             vectors_config=models.VectorParams(
                 size=settings.EMBEDDING_DIM,
                 distance=models.Distance.COSINE,
-                hnsw_config=models.HnswConfigDiff(
-                    m=16,
-                    ef_construct=100,
-                    full_scan_threshold=10_000,
-                ),
+                hnsw_config=hnsw_config(),
+                on_disk=settings.QDRANT_ON_DISK_VECTORS,
             ),
+            quantization_config=quantization_config(),
             optimizers_config=models.OptimizersConfigDiff(default_segment_number=2),
         )
+        _index_user_id(client)
+        return
+
+    # Коллекция уже есть: подтягиваем изменившиеся HNSW/квантование без пересоздания
+    client.update_collection(
+        collection_name=settings.QDRANT_COLLECTION,
+        vectors_config={
+            "": models.VectorParamsDiff(hnsw_config=hnsw_config(), on_disk=settings.QDRANT_ON_DISK_VECTORS),
+        },
+        quantization_config=quantization_config() or models.Disabled.DISABLED,
+    )
+    _index_user_id(client)
+
+
+def _index_user_id(client: QdrantClient) -> None:
+    # Поиск по чужим трекам фильтрует по user_id: без индекса payload фильтр перебирает точки
+    client.create_payload_index(
+        collection_name=settings.QDRANT_COLLECTION,
+        field_name="user_id",
+        field_schema=models.PayloadSchemaType.INTEGER,
+    )
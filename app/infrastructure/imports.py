@@ -0,0 +1,101 @@
+"""Infrastructure: reading activity exports and tracking import progress.
+
+Responsibilities:
+- Stream track files out of a ZIP export (Strava/Garmin layout) one member at a
+  time: ``ZipFile.open`` decompresses on the fly, nothing is extracted to disk.
+- Transparently gunzip ``*.gpx.gz`` / ``*.fit.gz`` / ``*.tcx.gz`` members.
+- Persist which members are already imported (JSON file next to the archive or
+  under ./data/imports) so an interrupted import resumes where it stopped.
+
+Constraints:
+- Members larger than ``max_file_bytes`` after decompression are yielded with
+  ``None`` content instead of being read in full (zip bombs); corrupted members
+  are yielded with empty content. Both are rejected per file by the import.
+"""
+
+import gzip
+import io
+import json
+import os
+import zipfile
+from typing import IO, Iterator, Optional, Sequence, Set, Tuple, Union
+
+from app.infrastructure.parsers.sniff import is_gzip
+
+TRACK_EXTENSIONS = (".gpx", ".fit", ".tcx")
+
+
+def _track_name(member: str) -> Optional[str]:
+    """Путь трека в архиве без .gz; None — не трек (csv, медиа, служебные файлы macOS)."""
+    if member.endswith("/") or member.startswith("__MACOSX/"):
+        return None
+    name = member[:-3] if member.lower().endswith(".gz") else member
+    return name if name.lower().endswith(TRACK_EXTENSIONS) else None
+
+
+def _read_limited(stream: IO[bytes], limit: int) -> Optional[bytes]:
+    data = stream.read(limit + 1)
+    return None if len(data) > limit else data
+
+
+def iter_archive_tracks(
+    archive: Union[str, IO[bytes]], max_file_bytes: int, skip: Optional[Set[str]] = None
+) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    (путь в архиве без .gz, содержимое) для каждого трека в ZIP. Путь уникален и служит
+    ключом продолжения импорта; записи из skip не распаковываются.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            name = _track_name(info.filename)
+            if name is None or (skip and name in skip):
+                continue
+            try:
+                with zf.open(info) as member:
+                    if name != info.filename:
+                        with gzip.GzipFile(fileobj=member) as unpacked:
+                            blob = _read_limited(unpacked, max_file_bytes)
+                    else:
+                        blob = _read_limited(member, max_file_bytes)
+            except (OSError, EOFError, zipfile.BadZipFile):
+                # Повреждённая запись (CRC, обрезанный gzip) отклоняется, остальные импортируются
+                blob = b""
+            yield name, blob
+
+
+def maybe_gunzip(filename: str, blob: bytes, max_file_bytes: int) -> Tuple[str, Optional[bytes]]:
+    """
+    Одиночный сжатый gzip файл (например, из группы файлов Telegram) → (имя без .gz, содержимое).
+    Сжатие определяется по сигнатуре, а не по имени: run.gpx, который на деле gzip, тоже распаковывается.
+    """
+    name = filename[:-3] if filename.lower().endswith(".gz") else filename
+    if not is_gzip(blob):
+        return name, blob
+    try:
+        with gzip.GzipFile(fileobj=io.BytesIO(blob)) as unpacked:
+            return name, _read_limited(unpacked, max_file_bytes)
+    except (OSError, EOFError):
+        # Обрезанный архив: пустое содержимое отклоняется импортом как повреждённый файл
+        return name, b""
+
+
+class JsonFileImportCheckpoint:
+    """Список импортированных записей в JSON; пишется атомарно (tmp + rename) после каждой пачки."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._done = set(json.load(f).get("done", []))
+
+    def done(self) -> Set[str]:
+        return set(self._done)
+
+    def mark_done(self, names: Sequence[str]) -> None:
+        self._done.update(names)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self._done)}, f)
+        os.replace(tmp, self.path)
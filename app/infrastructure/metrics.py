@@ -0,0 +1,226 @@
+"""Infrastructure: in-process metrics registry with Prometheus text exposition.
+
+Responsibilities:
+- Histograms, counters and gauges behind the Metrics port (stage timings, bytes, points, errors).
+- Proxy that times every public call of a repository or index.
+- Tiny /metrics HTTP endpoint for Prometheus scraping.
+
+Constraints:
+- Hot path is a perf_counter pair, a dict lookup and a bisect under a lock —
+  microseconds per stage against milliseconds of work.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import AbstractContextManager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.domain.ports.metrics import Labels, Metrics
+
+NAMESPACE = "run366"
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+HISTOGRAM_BUCKETS = {
+    "ingest_file_bytes": (1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 2.5e7, 5e7),
+    "ingest_points": (1e2, 1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Labels) -> LabelKey:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, le: Optional[str] = None) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in key]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _StageTimer(AbstractContextManager):
+    __slots__ = ("metrics", "name", "histogram", "started")
+
+    def __init__(self, metrics: "PrometheusMetrics", name: str, histogram: _Histogram):
+        self.metrics = metrics
+        self.name = name
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        with self.metrics._lock:
+            self.histogram.observe(elapsed)
+        if exc_type is not None:
+            self.metrics.increment("stage_errors_total", labels={"stage": self.name, "error": exc_type.__name__})
+        return False
+
+
+class PrometheusMetrics(Metrics):
+    """Потокобезопасный реестр счётчиков, гистограмм и текущих значений (gauge)."""
+
+    def __init__(self, namespace: str = NAMESPACE):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._stage_histograms: Dict[str, _Histogram] = {}
+
+    def increment(self, name: str, amount: float = 1.0, labels: Labels = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        histogram = self.histogram(name, labels)
+        with self._lock:
+            histogram.observe(value)
+
+    def gauge(self, name: str, value: float, labels: Labels = None) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def stage(self, name: str) -> AbstractContextManager:
+        histogram = self._stage_histograms.get(name)
+        if histogram is None:
+            histogram = self._stage_histograms[name] = self.histogram("stage_duration_seconds", {"stage": name})
+        return _StageTimer(self, name, histogram)
+
+    def histogram(self, name: str, labels: Labels = None) -> _Histogram:
+        """Серия гистограммы (создаётся при первом обращении); горячие пути держат ссылку на неё."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(HISTOGRAM_BUCKETS.get(name, DURATION_BUCKETS))
+            return histogram
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus 0.0.4."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._gauges.items()):
+                full = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                full = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{_format_labels(key, _format_value(bound))} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(key, '+Inf')} {h.count}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {repr(h.sum)}")
+                    lines.append(f"{full}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+class _InstrumentedProxy:
+    """Прокси репозитория/индекса: каждое публичное обращение попадает в repo_call_duration_seconds."""
+
+    def __init__(self, target: Any, registry: "PrometheusMetrics", component: str):
+        self._target = target
+        self._registry = registry
+        self._component = component
+        self._wrapped: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._wrapped[name] = self._wrap(name, attribute)
+        return wrapped
+
+    def _wrap(self, method: str, fn: Any) -> Any:
+        labels = {"component": self._component, "method": method}
+        registry = self._registry
+        histogram = registry.histogram("repo_call_duration_seconds", labels)
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                registry.increment("repo_call_errors_total", labels={**labels, "error": type(e).__name__})
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                with registry._lock:
+                    histogram.observe(elapsed)
+
+        return call
+
+
+def instrument(target: Any, registry: "PrometheusMetrics", component: Optional[str] = None) -> Any:
+    """Оборачивает репозиторий/индекс таймингом вызовов; None передаётся как есть."""
+    if target is None:
+        return None
+    return _InstrumentedProxy(target, registry, component or type(target).__name__)
+
+
+def start_metrics_server(registry: PrometheusMetrics, host: str, port: int) -> ThreadingHTTPServer:
+    """Поднимает GET /metrics в фоновом потоке."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+metrics = PrometheusMetrics()
@@ -1,11 +0,0 @@
-from app.domain.models.track import TrackFormat
-from app.domain.ports.track import TrackParser
-
-from .gpx_parser import parse_gpx
-
-
-class TrackParserImpl(TrackParser):
-    def parse(self, fmt: TrackFormat, blob: bytes) -> dict:
-        if fmt == TrackFormat.GPX:
-            return parse_gpx(blob)
-        return {}
@@ -0,0 +1,78 @@
+"""Отпечаток маршрута: MinHash по множеству geohash-ячеек, которые посетил трек.
+
+Похожие маршруты (один и тот же parkrun у 50 пользователей) дают близкие сигнатуры:
+доля совпадающих компонент ≈ коэффициенту Жаккара множеств ячеек.
+"""
+
+import hashlib
+import random
+from typing import Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+from app.domain.models.track import ROUTE_FINGERPRINT_BANDS, ROUTE_FINGERPRINT_SIZE, route_fingerprint_bands
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# Фиксированное зерно: сигнатуры должны совпадать между процессами и релизами
+_rng = random.Random(366)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(ROUTE_FINGERPRINT_SIZE)
+]
+
+
+def geohash_cells(lats: Sequence[float], lons: Sequence[float], precision: int = 7) -> Set[str]:
+    """
+    Множество geohash-ячеек точек; 7 символов ≈ ячейка 150×150 м.
+    Бисекция идёт сразу по всем точкам (те же float64-середины, что и у поточечного geohash),
+    в строки переводятся только уникальные коды: у длинного трека тысячи точек на сотню ячеек.
+    """
+    lat = np.asarray(lats, dtype=np.float64)
+    lon = np.asarray(lons, dtype=np.float64)
+    lat_lo, lat_hi = np.full_like(lat, -90.0), np.full_like(lat, 90.0)
+    lon_lo, lon_hi = np.full_like(lon, -180.0), np.full_like(lon, 180.0)
+    codes = np.zeros(lat.shape, dtype=np.int64)
+    for bit in range(precision * 5):
+        # Чётные биты — долгота, нечётные — широта
+        if bit % 2 == 0:
+            mid = (lon_lo + lon_hi) / 2
+            upper = lon >= mid
+            lon_lo, lon_hi = np.where(upper, mid, lon_lo), np.where(upper, lon_hi, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            upper = lat >= mid
+            lat_lo, lat_hi = np.where(upper, mid, lat_lo), np.where(upper, lat_hi, mid)
+        codes = codes * 2 + upper
+    return {
+        "".join(_GEOHASH_BASE32[(code >> (5 * (precision - 1 - i))) & 31] for i in range(precision))
+        for code in np.unique(codes).tolist()
+    }
+
+
+def minhash_signature(cells: Iterable[str]) -> Optional[List[int]]:
+    """MinHash-сигнатура множества ячеек (32-битные компоненты)."""
+    hashes = {int.from_bytes(hashlib.blake2b(c.encode(), digest_size=8).digest(), "little") for c in cells}
+    if not hashes:
+        return None
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS]
+
+
+def route_fingerprint_gpx(g, precision: int = 7) -> dict:
+    """Отпечаток маршрута GPX и ключ кластера (хэш первой LSH-полосы) для группировки."""
+    points = [
+        (p.latitude, p.longitude)
+        for tr in g.tracks
+        for seg in tr.segments
+        for p in seg.points
+        if p.latitude is not None and p.longitude is not None
+    ]
+    cells = geohash_cells([lat for lat, _ in points], [lon for _, lon in points], precision) if points else set()
+    signature = minhash_signature(cells)
+    if signature is None:
+        return {"route_fingerprint": None, "route_cluster_key": None}
+    first_band = route_fingerprint_bands(signature, ROUTE_FINGERPRINT_BANDS)[0]
+    return {
+        "route_fingerprint": signature,
+        "route_cluster_key": hashlib.blake2b(repr(first_band).encode(), digest_size=8).hexdigest(),
+    }
@@ -1,18 +1,47 @@
 from collections import deque
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from math import atan2, cos, radians, sin, sqrt
+from typing import Collection, Optional
 
 import gpxpy
 
+from app.domain.models.track import (
+    BEST_EFFORT_DISTANCES_METERS,
+    TrackRejectedError,
+    TrackSource,
+    approx_start_area_id,
+)
 
-def parse_gpx(blob: bytes) -> dict:
+from .fingerprint import route_fingerprint_gpx
+from .registry import FeatureRegistry, TrackContext
+
+_EPS = 1e-6
+
+
+def _load_gpx(blob: TrackSource) -> gpxpy.gpx.GPX:
+    """
+    GPX из байтов, буфера или потока. gpxpy разбирает только str: буфер (memoryview поверх mmap)
+    декодируется напрямую, без промежуточной копии bytes; поток читается до конца.
+    """
+    if not isinstance(blob, (bytes, bytearray, memoryview)):
+        blob = blob.read()
+    try:
+        return gpxpy.parse(str(blob, "utf-8", errors="ignore"))
+    except gpxpy.gpx.GPXException as e:
+        # Битый XML не исправится повтором — окончательный отказ, а не временная ошибка
+        raise TrackRejectedError(f"GPX не разбирается: {e}", reason="corrupt") from e
+
+
+def parse_gpx(blob: TrackSource) -> dict:
     """Парсер для стандартных метрик"""
-    g = gpxpy.parse(blob.decode("utf-8", errors="ignore"))
+    g = _load_gpx(blob)
     total_m = 0.0
     total_s = 0
     gain = 0.0
+    point_count = 0
     for tr in g.tracks:
         for seg in tr.segments:
+            point_count += len(seg.points)
             total_m += seg.length_2d() or 0.0
             if seg.points:
                 st, en = seg.points[0].time, seg.points[-1].time
@@ -34,6 +63,7 @@ def parse_gpx(blob: bytes) -> dict:
         "distance_km": round(total_m / 1000, 3),
         "duration_s": total_s,
         "elevation_gain_m": round(gain, 1),
+        "point_count": point_count,
     }
 
 
@@ -84,82 +114,214 @@ def _elevation_gain_loss_gpx(g, min_delta_m=1.0, smooth_window=3, min_horiz_m=3.
     return round(gain, 1), round(loss, 1)
 
 
-def extract_track_features_from_gpx(blob: bytes) -> dict:
+def _cumulative_distance_time_gpx(g):
     """
-    Возвращает словарь агрегированных фич для одного GPX‑трека.
-    Все метки времени — в UTC.
+    Кумулятивные массивы по точкам с временем:
+    дистанция от старта (м) и время от старта (с).
+    Между сегментами дистанция не накапливается, время — продолжается.
     """
-    g = gpxpy.parse(blob.decode("utf-8", errors="ignore"))
+    distances_m = []
+    times_s = []
+    total_m = 0.0
+    t0 = None
+    for tr in g.tracks:
+        for seg in tr.segments:
+            prev = None
+            for p in seg.points:
+                if p.time is None or p.latitude is None or p.longitude is None:
+                    continue
+                if t0 is None:
+                    t0 = p.time
+                if prev is not None:
+                    total_m += _haversine_m(prev.latitude, prev.longitude, p.latitude, p.longitude)
+                prev = p
+                distances_m.append(total_m)
+                times_s.append((p.time - t0).total_seconds())
+    return distances_m, times_s, t0
+
+
+def _best_efforts(distances_m, times_s, targets_m, start_time=None):
+    """
+    Лучшие (самые быстрые) отрезки на целевые дистанции.
+
+    Один линейный проход двумя указателями: для каждой цели левая граница окна
+    только сдвигается вперёд, поэтому общая сложность O(n * len(targets_m)).
+    Время окна линейно приводится к точной целевой дистанции.
+    """
+    n = len(distances_m)
+    labels = [label for label, target in targets_m.items() if n > 1 and distances_m[-1] >= target]
+    left = {label: 0 for label in labels}
+    best = {}
+    for j in range(1, n):
+        for label in labels:
+            target = targets_m[label]
+            i = left[label]
+            # сдвигаем левую границу, пока окно [i + 1, j] всё ещё покрывает цель
+            while distances_m[j] - distances_m[i + 1] >= target:
+                i += 1
+            left[label] = i
+            covered = distances_m[j] - distances_m[i]
+            if covered < target:
+                continue
+            elapsed = (times_s[j] - times_s[i]) * target / covered
+            if elapsed > 0 and (label not in best or elapsed < best[label][0]):
+                best[label] = (elapsed, i)
+
+    efforts = []
+    for label in labels:
+        if label not in best:
+            continue
+        elapsed, i = best[label]
+        efforts.append(
+            {
+                "distance_label": label,
+                "distance_meters": targets_m[label],
+                "elapsed_seconds": round(elapsed, 1),
+                "start_offset_meters": round(distances_m[i], 1),
+                "start_datetime_utc": start_time + timedelta(seconds=times_s[i]) if start_time else None,
+            }
+        )
+    return efforts
+
+
+# Провайдеры признаков GPX. Изменили формулу или округление — поднимите версию провайдера:
+# backfill-features пересчитает только его признаки (и признаки зависящих от него провайдеров).
+gpx_features = FeatureRegistry()
+
+# Версии строк, посчитанных до реестра (feature_versions IS NULL): тогдашний монолит соответствует версии 1
+LEGACY_FEATURE_VERSIONS = {
+    "time": 1,
+    "location": 1,
+    "distance": 1,
+    "elevation": 1,
+    "movement": 1,
+    "route_fingerprint": 1,
+    "best_efforts": 1,
+}
+
+
+@gpx_features.intermediate("length_2d")
+def _length_2d(ctx: TrackContext) -> float:
+    return ctx.track.length_2d() or 0.0
 
-    # Базовые агрегаты
-    total_distance_meters = g.length_2d() or 0.0
-    moving_data = g.get_moving_data()  # данные о движении/стопах/макс. скорости
-    uphill_downhill = g.get_uphill_downhill()  # (набор, сброс), м
-    time_bounds = g.get_time_bounds()  # (start_time, end_time), UTC
 
-    # Первая и последняя точки трека (для прямой линии старт→финиш)
+@gpx_features.intermediate("moving_data")
+def _moving_data(ctx: TrackContext):
+    # данные о движении/стопах/макс. скорости
+    return ctx.track.get_moving_data()
+
+
+@gpx_features.intermediate("time_bounds")
+def _time_bounds(ctx: TrackContext):
+    # (start_time, end_time), UTC
+    return ctx.track.get_time_bounds()
+
+
+@gpx_features.intermediate("endpoints")
+def _endpoints(ctx: TrackContext):
+    """Первая и последняя точки трека (для прямой линии старт→финиш)."""
     first_point = last_point = None
-    for track in g.tracks:
+    for track in ctx.track.tracks:
         for seg in track.segments:
             if seg.points:
                 if first_point is None:
                     first_point = seg.points[0]
                 last_point = seg.points[-1]
+    return first_point, last_point
 
-    start_latitude_deg = start_longitude_deg = None
-    end_latitude_deg = end_longitude_deg = None
-    if first_point:
-        start_latitude_deg = first_point.latitude
-        start_longitude_deg = first_point.longitude
-    if last_point:
-        end_latitude_deg = last_point.latitude
-        end_longitude_deg = last_point.longitude
 
-    # Расстояние по прямой (старт→финиш)
-    straight_line_distance_meters = 0.0
-    if first_point and last_point:
-        straight_line_distance_meters = _haversine_distance_meters(
-            start_latitude_deg, start_longitude_deg, end_latitude_deg, end_longitude_deg
-        )
+@gpx_features.intermediate("elevation_gain_loss")
+def _elevation_gain_loss(ctx: TrackContext):
+    return _elevation_gain_loss_gpx(ctx.track)
 
-    # Преобразования единиц
-    total_distance_kilometers = round(total_distance_meters / 1000.0, 3)
-    straight_line_distance_kilometers = round(straight_line_distance_meters / 1000.0, 3)
 
-    # Время старта/финиша (UTC)
+@gpx_features.intermediate("cumulative")
+def _cumulative(ctx: TrackContext):
+    return _cumulative_distance_time_gpx(ctx.track)
+
+
+@gpx_features.provider(
+    "time",
+    version=1,
+    outputs=(
+        "start_datetime_utc",
+        "end_datetime_utc",
+        "start_hour_of_day_utc",
+        "day_of_week_index",
+        "total_elapsed_duration_seconds",
+    ),
+    depends=("time_bounds",),
+)
+def _time_features(ctx: TrackContext) -> dict:
+    time_bounds = ctx["time_bounds"]
     start_datetime_utc = getattr(time_bounds, "start_time", None) if time_bounds else None
     end_datetime_utc = getattr(time_bounds, "end_time", None) if time_bounds else None
+    return {
+        "start_datetime_utc": start_datetime_utc,
+        "end_datetime_utc": end_datetime_utc,
+        "start_hour_of_day_utc": start_datetime_utc.hour if start_datetime_utc else None,
+        "day_of_week_index": start_datetime_utc.weekday() if start_datetime_utc else None,
+        "total_elapsed_duration_seconds": (
+            int((end_datetime_utc - start_datetime_utc).total_seconds())
+            if (start_datetime_utc and end_datetime_utc)
+            else None
+        ),
+    }
 
-    # Производные метрики
-    eps = 1e-6
-    path_sinuosity_ratio = (
-        (total_distance_kilometers / max(straight_line_distance_kilometers, eps))
-        if total_distance_kilometers and straight_line_distance_kilometers
-        else None
-    )
 
-    total_elevation_gain_meters, total_elevation_loss_meters = _elevation_gain_loss_gpx(g)
+@gpx_features.provider(
+    "location",
+    version=1,
+    outputs=(
+        "start_latitude_deg",
+        "start_longitude_deg",
+        "end_latitude_deg",
+        "end_longitude_deg",
+        "start_area_identifier_approx",
+    ),
+    depends=("endpoints",),
+)
+def _location_features(ctx: TrackContext) -> dict:
+    first_point, last_point = ctx["endpoints"]
+    start_latitude_deg = first_point.latitude if first_point else None
+    start_longitude_deg = first_point.longitude if first_point else None
+    return {
+        "start_latitude_deg": start_latitude_deg,
+        "start_longitude_deg": start_longitude_deg,
+        "end_latitude_deg": last_point.latitude if last_point else None,
+        "end_longitude_deg": last_point.longitude if last_point else None,
+        # Приближённая “зона старта” (округление координат)
+        "start_area_identifier_approx": approx_start_area_id(start_latitude_deg, start_longitude_deg),
+    }
 
-    elevation_gain_per_kilometer = (
-        total_elevation_gain_meters / max(total_distance_kilometers, eps) if total_distance_kilometers else None
-    )
 
-    total_elapsed_duration_seconds = (
-        int((end_datetime_utc - start_datetime_utc).total_seconds())
-        if (start_datetime_utc and end_datetime_utc)
-        else None
-    )
+@gpx_features.provider(
+    "distance",
+    version=1,
+    outputs=(
+        "total_distance_kilometers",
+        "straight_line_distance_kilometers",
+        "path_sinuosity_ratio",
+        "route_curvature_category",
+    ),
+    depends=("length_2d", "endpoints"),
+)
+def _distance_features(ctx: TrackContext) -> dict:
+    first_point, last_point = ctx["endpoints"]
+    # Расстояние по прямой (старт→финиш)
+    straight_line_distance_meters = 0.0
+    if first_point and last_point:
+        straight_line_distance_meters = _haversine_distance_meters(
+            first_point.latitude, first_point.longitude, last_point.latitude, last_point.longitude
+        )
 
-    total_moving_duration_seconds = int(moving_data.moving_time) if moving_data else None
-    total_stopped_duration_seconds = int(moving_data.stopped_time) if moving_data else None
-    average_speed_kilometers_per_hour = (
-        round((moving_data.moving_distance / moving_data.moving_time) * 3.6, 2)
-        if (moving_data and moving_data.moving_time)
+    total_distance_kilometers = round(ctx["length_2d"] / 1000.0, 3)
+    straight_line_distance_kilometers = round(straight_line_distance_meters / 1000.0, 3)
+    path_sinuosity_ratio = (
+        (total_distance_kilometers / max(straight_line_distance_kilometers, _EPS))
+        if total_distance_kilometers and straight_line_distance_kilometers
         else None
     )
-    maximum_speed_kilometers_per_hour = (
-        round(moving_data.max_speed * 3.6, 2) if (moving_data and moving_data.max_speed) else None
-    )
 
     if path_sinuosity_ratio is None:
         route_curvature_category = None
@@ -170,6 +332,32 @@ def extract_track_features_from_gpx(blob: bytes) -> dict:
     else:
         route_curvature_category = "смешанный"
 
+    return {
+        "total_distance_kilometers": total_distance_kilometers,
+        "straight_line_distance_kilometers": straight_line_distance_kilometers,
+        "path_sinuosity_ratio": round(path_sinuosity_ratio, 3) if path_sinuosity_ratio is not None else None,
+        "route_curvature_category": route_curvature_category,
+    }
+
+
+@gpx_features.provider(
+    "elevation",
+    version=1,
+    outputs=(
+        "total_elevation_gain_meters",
+        "total_elevation_loss_meters",
+        "elevation_gain_per_kilometer",
+        "terrain_category",
+    ),
+    depends=("elevation_gain_loss", "distance"),
+)
+def _elevation_features(ctx: TrackContext) -> dict:
+    total_elevation_gain_meters, total_elevation_loss_meters = ctx["elevation_gain_loss"]
+    total_distance_kilometers = ctx["distance"]["total_distance_kilometers"]
+    elevation_gain_per_kilometer = (
+        total_elevation_gain_meters / max(total_distance_kilometers, _EPS) if total_distance_kilometers else None
+    )
+
     # Категория рельефа по набору/км
     if elevation_gain_per_kilometer is None:
         terrain_category = None
@@ -180,43 +368,72 @@ def extract_track_features_from_gpx(blob: bytes) -> dict:
     else:
         terrain_category = "rolling"  # волнистый рельеф (10–30 м/км)
 
-    # Приближённая “зона старта” (округление координат)
-    def _approx_start_area_id(lat, lon, precision=3):
-        if lat is None or lon is None:
-            return None
-        return f"{round(lat, precision)}:{round(lon, precision)}"
-
-    start_area_identifier_approx = _approx_start_area_id(start_latitude_deg, start_longitude_deg, precision=3)
-
-    start_hour_of_day_utc = start_datetime_utc.hour if start_datetime_utc else None
-    day_of_week_index = start_datetime_utc.weekday() if start_datetime_utc else None
-
     return {
-        "start_datetime_utc": start_datetime_utc,
-        "end_datetime_utc": end_datetime_utc,
-        "start_hour_of_day_utc": start_hour_of_day_utc,
-        "day_of_week_index": day_of_week_index,
-        "start_latitude_deg": start_latitude_deg,
-        "start_longitude_deg": start_longitude_deg,
-        "end_latitude_deg": end_latitude_deg,
-        "end_longitude_deg": end_longitude_deg,
-        "start_area_identifier_approx": start_area_identifier_approx,
-        "total_distance_kilometers": total_distance_kilometers,
-        "straight_line_distance_kilometers": straight_line_distance_kilometers,
-        "path_sinuosity_ratio": round(path_sinuosity_ratio, 3) if path_sinuosity_ratio is not None else None,
-        "route_curvature_category": route_curvature_category,
         "total_elevation_gain_meters": round(total_elevation_gain_meters, 1),
         "total_elevation_loss_meters": round(total_elevation_loss_meters, 1),
         "elevation_gain_per_kilometer": (
             round(elevation_gain_per_kilometer, 1) if elevation_gain_per_kilometer is not None else None
         ),
         "terrain_category": terrain_category,
-        "total_elapsed_duration_seconds": total_elapsed_duration_seconds,
-        "total_moving_duration_seconds": total_moving_duration_seconds,
-        "total_stopped_duration_seconds": total_stopped_duration_seconds,
-        "average_speed_kilometers_per_hour": average_speed_kilometers_per_hour,
-        "maximum_speed_kilometers_per_hour": maximum_speed_kilometers_per_hour,
-        "features_version": 1,
-        "computed_at_utc": datetime.now(timezone.utc),
-        "source_format": "gpx",
     }
+
+
+@gpx_features.provider(
+    "movement",
+    version=1,
+    outputs=(
+        "total_moving_duration_seconds",
+        "total_stopped_duration_seconds",
+        "average_speed_kilometers_per_hour",
+        "maximum_speed_kilometers_per_hour",
+    ),
+    depends=("moving_data",),
+)
+def _movement_features(ctx: TrackContext) -> dict:
+    moving_data = ctx["moving_data"]
+    return {
+        "total_moving_duration_seconds": int(moving_data.moving_time) if moving_data else None,
+        "total_stopped_duration_seconds": int(moving_data.stopped_time) if moving_data else None,
+        "average_speed_kilometers_per_hour": (
+            round((moving_data.moving_distance / moving_data.moving_time) * 3.6, 2)
+            if (moving_data and moving_data.moving_time)
+            else None
+        ),
+        "maximum_speed_kilometers_per_hour": (
+            round(moving_data.max_speed * 3.6, 2) if (moving_data and moving_data.max_speed) else None
+        ),
+    }
+
+
+@gpx_features.provider("route_fingerprint", version=1, outputs=("route_fingerprint", "route_cluster_key"))
+def _route_fingerprint_features(ctx: TrackContext) -> dict:
+    # Отпечаток маршрута для схлопывания почти одинаковых рекомендаций
+    fingerprint = route_fingerprint_gpx(ctx.track)
+    return {
+        "route_fingerprint": fingerprint["route_fingerprint"],
+        "route_cluster_key": fingerprint["route_cluster_key"],
+    }
+
+
+@gpx_features.provider("best_efforts", version=1, outputs=("best_efforts",), depends=("cumulative",))
+def _best_effort_features(ctx: TrackContext) -> dict:
+    # Лучшие отрезки на 1k/5k/10k/полумарафон
+    distances_m, times_s, first_time = ctx["cumulative"]
+    return {"best_efforts": _best_efforts(distances_m, times_s, BEST_EFFORT_DISTANCES_METERS, start_time=first_time)}
+
+
+def extract_track_features_from_gpx(blob: TrackSource, features: Optional[Collection[str]] = None) -> dict:
+    """
+    Возвращает словарь агрегированных фич для одного GPX‑трека.
+    features — только эти признаки (None — все): считаются лишь нужные провайдеры и их зависимости.
+    Все метки времени — в UTC.
+    """
+    result = gpx_features.evaluate(_load_gpx(blob), features)
+    result.update(
+        {
+            "features_version": 1,
+            "computed_at_utc": datetime.now(timezone.utc),
+            "source_format": "gpx",
+        }
+    )
+    return result
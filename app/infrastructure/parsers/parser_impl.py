@@ -1,25 +1,47 @@
 """Infrastructure parser implementation of TrackParser port.
 
 Dispatches by TrackFormat and delegates to concrete parsers.
+Size, truncation and point-count guardrails run before any parser.
 """
 
-from typing import Any, Mapping
+from typing import Any, Collection, List, Mapping, Optional
 
-from app.domain.models.track import TrackFormat
+from app.config import settings
+from app.domain.models.track import TrackBytes, TrackFormat, TrackSource
 from app.domain.ports.track import TrackFeatureExtractor, TrackParser
 
-from .gpx_parser import extract_track_features_from_gpx, parse_gpx
+from .gpx_parser import LEGACY_FEATURE_VERSIONS, extract_track_features_from_gpx, gpx_features, parse_gpx
+from .sniff import check_track_limits, read_limited
+
+
+def checked_blob(fmt: TrackFormat, blob: TrackSource) -> TrackBytes:
+    """Поток читается не дальше TRACK_MAX_FILE_BYTES; затем дешёвые проверки — до дорогого разбора."""
+    if not isinstance(blob, (bytes, bytearray, memoryview)):
+        blob = read_limited(blob, settings.TRACK_MAX_FILE_BYTES)
+    check_track_limits(fmt, blob, settings.TRACK_MAX_FILE_BYTES, settings.TRACK_MAX_POINTS)
+    return blob
 
 
 class TrackParserImpl(TrackParser):
-    def parse(self, fmt: TrackFormat, blob: bytes) -> dict:
+    def parse(self, fmt: TrackFormat, blob: TrackSource) -> dict:
+        blob = checked_blob(fmt, blob)
         if fmt == TrackFormat.GPX:
             return parse_gpx(blob)
         return {}
 
 
 class TrackFeatureExtractorImpl(TrackFeatureExtractor):
-    def extract(self, fmt: TrackFormat, blob: bytes) -> Mapping[str, Any]:
+    def extract(
+        self, fmt: TrackFormat, blob: TrackSource, features: Optional[Collection[str]] = None
+    ) -> Mapping[str, Any]:
+        blob = checked_blob(fmt, blob)
         if fmt == TrackFormat.GPX:
-            return extract_track_features_from_gpx(blob)
+            return extract_track_features_from_gpx(blob, features)
         return {}
+
+    def stale_features(self, fmt: TrackFormat, feature_versions: Optional[Mapping[str, int]]) -> List[str]:
+        if fmt != TrackFormat.GPX:
+            return []
+        # Провайдера нет в сохранённых версиях — строка старше реестра; новый провайдер устарел всегда
+        stored = {**LEGACY_FEATURE_VERSIONS, **(feature_versions or {})}
+        return gpx_features.outputs_of(gpx_features.stale(stored))
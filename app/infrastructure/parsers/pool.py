@@ -0,0 +1,83 @@
+"""Infrastructure: parallel track analysis for bulk imports.
+
+Parsing and feature extraction are pure CPU work holding the GIL, so a bulk
+import fans them out to a process pool. Results come back in submission order
+and only a bounded window of files is in flight, so a stream of archive members
+is never materialised in memory.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.domain.models.track import FORMAT_SNIFF_MAX_BYTES, TrackRejectedError
+from app.domain.ports.track import TrackBatchAnalyzer
+from app.infrastructure.parsers.parser_impl import TrackFeatureExtractorImpl, TrackParserImpl
+from app.infrastructure.repos.track_repo_sql import SimpleFormatDetector
+
+_detector = SimpleFormatDetector()
+_parser = TrackParserImpl()
+_extractor = TrackFeatureExtractorImpl()
+
+
+def analyze_track(filename: str, blob: Optional[bytes]) -> Dict[str, Any]:
+    """Формат, метаданные и признаки одного файла; исполняется в процессе пула."""
+    if blob is None:
+        return {"error": "файл слишком большой"}
+    if not blob:
+        return {"error": "файл пустой или повреждён"}
+    fmt = _detector.detect(filename, blob[:FORMAT_SNIFF_MAX_BYTES])
+    if not fmt:
+        return {"error": "Ожидаю GPX/FIT/TCX"}
+    try:
+        meta = _parser.parse(fmt, blob) or {}
+        features = dict(_extractor.extract(fmt, blob))
+    except TrackRejectedError as e:
+        return {"error": str(e)}
+    except Exception as e:  # битый файл не должен останавливать весь импорт
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {"format": fmt.value, "meta": meta, "features": features}
+
+
+class ProcessPoolTrackAnalyzer(TrackBatchAnalyzer):
+    """
+    Пул процессов для разбора треков; workers=1 — разбор в текущем процессе.
+    Пул создаётся при первом использовании и переиспользуется между импортами.
+    """
+
+    def __init__(self, workers: int = 0, in_flight_per_worker: int = 4):
+        self.workers = workers or os.cpu_count() or 1
+        self.window = self.workers * in_flight_per_worker
+        self._executor: Optional[Executor] = None
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            # forkserver: безопасно из многопоточного процесса (бот, uvicorn), в отличие от fork
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("forkserver"))
+        return self._executor
+
+    def analyze_many(
+        self, files: Iterable[Tuple[str, Optional[bytes]]]
+    ) -> Iterator[Tuple[str, Optional[bytes], Dict[str, Any]]]:
+        if self.workers <= 1:
+            for filename, blob in files:
+                yield filename, blob, analyze_track(filename, blob)
+            return
+
+        pool = self._pool()
+        pending: Deque = deque()
+        for filename, blob in files:
+            pending.append((filename, blob, pool.submit(analyze_track, filename, blob)))
+            if len(pending) >= self.window:
+                filename, blob, future = pending.popleft()
+                yield filename, blob, future.result()
+        while pending:
+            filename, blob, future = pending.popleft()
+            yield filename, blob, future.result()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
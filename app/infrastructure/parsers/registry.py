@@ -0,0 +1,132 @@
+"""Infrastructure: registry of versioned, lazily evaluated track feature providers.
+
+Responsibilities:
+- Providers declare the features they output, what they depend on (shared
+  intermediates such as gpxpy's moving data, or other providers) and a version.
+- Evaluation is demand-driven over one parsed track. Only the providers that
+  produce the requested features, and their dependencies, run. Every
+  intermediate and provider result is computed at most once.
+- Versions make backfills incremental. A provider is stale when its version
+  differs from the stored one, or when any provider it depends on is stale.
+
+Constraints:
+- Feature names are unique across providers; the registry refuses duplicates.
+- Providers are pure functions of the parsed track. Side effects (storage,
+  indexing) belong to the application layer.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Collection, Dict, List, Mapping, Optional, Set, Tuple
+
+
+@dataclass(frozen=True)
+class FeatureProvider:
+    name: str
+    version: int
+    outputs: Tuple[str, ...]
+    # Имена промежуточных результатов и других провайдеров
+    depends: Tuple[str, ...]
+    compute: Callable[["TrackContext"], Dict[str, Any]]
+
+
+class TrackContext:
+    """Разобранный трек и мемоизированные результаты: промежуточные и провайдеров, каждый — не более раза."""
+
+    def __init__(self, registry: "FeatureRegistry", track: Any):
+        self.registry = registry
+        self.track = track
+        self._memo: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._memo:
+            provider = self.registry.providers.get(name)
+            if provider is not None:
+                self._memo[name] = provider.compute(self)
+            else:
+                self._memo[name] = self.registry.intermediates[name](self)
+        return self._memo[name]
+
+    def evaluated(self) -> List[str]:
+        return [name for name in self._memo if name in self.registry.providers]
+
+
+class FeatureRegistry:
+    def __init__(self) -> None:
+        self.providers: Dict[str, FeatureProvider] = {}
+        self.intermediates: Dict[str, Callable[[TrackContext], Any]] = {}
+        self._provider_of: Dict[str, str] = {}
+
+    def intermediate(self, name: str):
+        """Декоратор общего промежуточного результата (например, get_moving_data), без версии."""
+
+        def register(fn: Callable[[TrackContext], Any]) -> Callable[[TrackContext], Any]:
+            self.intermediates[name] = fn
+            return fn
+
+        return register
+
+    def provider(self, name: str, version: int, outputs: Collection[str], depends: Collection[str] = ()):
+        """Декоратор провайдера: fn(ctx) возвращает словарь ровно с outputs."""
+
+        def register(fn: Callable[[TrackContext], Dict[str, Any]]) -> Callable[[TrackContext], Dict[str, Any]]:
+            for feature in outputs:
+                if feature in self._provider_of:
+                    raise ValueError(f"feature {feature} is already provided by {self._provider_of[feature]}")
+                self._provider_of[feature] = name
+            self.providers[name] = FeatureProvider(name, version, tuple(outputs), tuple(depends), fn)
+            return fn
+
+        return register
+
+    def features(self) -> List[str]:
+        return list(self._provider_of)
+
+    def versions(self) -> Dict[str, int]:
+        return {name: provider.version for name, provider in self.providers.items()}
+
+    def providers_for(self, features: Optional[Collection[str]] = None) -> List[str]:
+        """Провайдеры запрошенных признаков (None — все); неизвестный признак — ошибка вызывающего."""
+        if features is None:
+            return list(self.providers)
+        unknown = [feature for feature in features if feature not in self._provider_of]
+        if unknown:
+            raise KeyError(f"unknown features: {', '.join(unknown)}")
+        return list(dict.fromkeys(self._provider_of[feature] for feature in features))
+
+    def stale(self, stored_versions: Mapping[str, int]) -> List[str]:
+        """Провайдеры, которые надо пересчитать: версия отличается или устарел провайдер, от которого он зависит."""
+        stale: Set[str] = set()
+
+        def is_stale(name: str) -> bool:
+            provider = self.providers[name]
+            if name in stale or stored_versions.get(name) != provider.version:
+                return True
+            return any(dep in self.providers and is_stale(dep) for dep in provider.depends)
+
+        for name in self.providers:
+            if is_stale(name):
+                stale.add(name)
+        return [name for name in self.providers if name in stale]
+
+    def outputs_of(self, providers: Collection[str]) -> List[str]:
+        return [feature for name in providers for feature in self.providers[name].outputs]
+
+    def evaluate(self, track: Any, features: Optional[Collection[str]] = None) -> Dict[str, Any]:
+        """
+        Запрошенные признаки (None — все) и "feature_versions" — версии провайдеров, чьи признаки в ответе.
+        Провайдер-зависимость считается, но его признаки в ответ не попадают, если их не просили.
+        """
+        ctx = TrackContext(self, track)
+        wanted = set(features) if features is not None else None
+        result: Dict[str, Any] = {}
+        versions: Dict[str, int] = {}
+        for name in self.providers_for(features):
+            provider = self.providers[name]
+            values = ctx[name]
+            if wanted is None or wanted.issuperset(provider.outputs):
+                versions[name] = provider.version
+            result.update(
+                (feature, values[feature]) for feature in provider.outputs if wanted is None or feature in wanted
+            )
+        result["feature_versions"] = versions
+        return result
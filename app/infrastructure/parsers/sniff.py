@@ -0,0 +1,123 @@
+"""Infrastructure: content sniffing and pre-parse guardrails for track files.
+
+Responsibilities:
+- Tell FIT, GPX and TCX apart by content: the FIT header signature, and for
+  XML the root element and its namespace. The extension is used only when the
+  root element is not within the first ``FORMAT_SNIFF_MAX_BYTES``.
+- Reject files that would only waste parser time before they reach gpxpy:
+  wrong content, gzip wrapping, oversized input, truncated documents and too
+  many points. Every check is a header test or a chunked C-level scan of the
+  buffer, with no decode and no DOM.
+
+Constraints:
+- Detection looks at the first ``SNIFF_BYTES`` and reads on, up to
+  ``FORMAT_SNIFF_MAX_BYTES``, only while the XML prolog (whitespace, comments,
+  DOCTYPE) has not reached the root element. Guardrails take the whole
+  buffer (bytes or a memoryview over mmap) and scan it in chunks without
+  copying it.
+"""
+
+import os
+import re
+from typing import BinaryIO, Optional, Union
+
+from app.domain.models.track import FORMAT_SNIFF_MAX_BYTES, TrackBytes, TrackFormat, TrackRejectedError
+
+SNIFF_BYTES = 512
+GZIP_MAGIC = b"\x1f\x8b"
+_SCAN_CHUNK_BYTES = 1024 * 1024
+_TAIL_BYTES = 4096
+
+# Пролог XML: BOM, объявление, комментарии, DOCTYPE — до корневого элемента
+_XML_PROLOG = re.compile(rb"\A(?:\xef\xbb\xbf)?(?:\s+|<\?.*?\?>|<!--.*?-->|<!DOCTYPE[^>]*>)*", re.S)
+_XML_ROOT = re.compile(rb"<(?:[\w.-]+:)?([\w.-]+)(?=[\s/>])")
+_GPX_END = re.compile(rb"</(?:[\w.-]+:)?gpx\s*>")
+_TCX_END = re.compile(rb"</(?:[\w.-]+:)?TrainingCenterDatabase\s*>")
+
+
+def is_gzip(head: bytes) -> bool:
+    return head[:2] == GZIP_MAGIC
+
+
+def _is_fit(head: bytes) -> bool:
+    # Заголовок FIT: размер заголовка (12 или 14), версии, размер данных, затем сигнатура ".FIT"
+    return len(head) >= 12 and head[0] in (12, 14) and head[8:12] == b".FIT"
+
+
+def sniff_format(head: bytes) -> Optional[Union[TrackFormat, str]]:
+    """
+    Формат по первым байтам. TrackFormat — распознан; "xml" — похоже на XML, но корень не уместился
+    в заголовок; None — не трек (PDF, картинка, gzip, пустой файл).
+    """
+    if _is_fit(head):
+        return TrackFormat.FIT
+    rest = head[_XML_PROLOG.match(head).end() :]
+    if not rest:
+        # Заголовок целиком ушёл на пролог (например, длинный отступ перед корнем)
+        return "xml" if head else None
+    if not rest.startswith(b"<"):
+        return None
+    root = _XML_ROOT.match(rest)
+    if root is None:
+        # Пролог длиннее заголовка или имя корня обрезано на его границе
+        return "xml"
+    name, attrs = root.group(1), rest[root.end() :].split(b">", 1)[0]
+    if name == b"gpx" or b"topografix.com/GPX" in attrs:
+        return TrackFormat.GPX
+    if name == b"TrainingCenterDatabase" or b"TrainingCenterDatabase/v2" in attrs:
+        return TrackFormat.TCX
+    return None
+
+
+def detect_format(filename: str, head: bytes) -> Optional[TrackFormat]:
+    """Содержимое важнее расширения: run.gpx с FIT внутри уйдёт в разбор FIT, переименованный PDF — отклонён."""
+    sniffed = sniff_format(head[:SNIFF_BYTES])
+    if sniffed == "xml" and len(head) > SNIFF_BYTES:
+        # Длинный пролог: корень ищется дальше, но не глубже FORMAT_SNIFF_MAX_BYTES
+        sniffed = sniff_format(head[:FORMAT_SNIFF_MAX_BYTES])
+    if isinstance(sniffed, TrackFormat):
+        return sniffed
+    ext = os.path.splitext(filename)[1].lower().lstrip(".")
+    if sniffed == "xml" and ext in {"gpx", "tcx"}:
+        return TrackFormat(ext)
+    return None
+
+
+def read_limited(stream: BinaryIO, max_bytes: int) -> bytes:
+    """Поток целиком, но не больше max_bytes: больший файл отклоняется, не дочитываясь."""
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise TrackRejectedError(f"файл больше {max_bytes // (1024 * 1024)} МБ", reason="size")
+    return data
+
+
+def _count(view: memoryview, token: bytes, stop_after: int) -> int:
+    """Вхождения token кусками по 1 МБ; перекрытие кусков — len(token) - 1, каждое вхождение считается раз."""
+    count = 0
+    overlap = len(token) - 1
+    for start in range(0, len(view), _SCAN_CHUNK_BYTES):
+        count += bytes(view[max(start - overlap, 0) : start + _SCAN_CHUNK_BYTES]).count(token)
+        if count > stop_after:
+            break
+    return count
+
+
+def check_track_limits(fmt: TrackFormat, blob: TrackBytes, max_bytes: int, max_points: int) -> None:
+    """Дешёвые проверки до разбора: размер, обрезанный конец документа, число точек."""
+    view = memoryview(blob)
+    if len(view) > max_bytes:
+        raise TrackRejectedError(f"файл больше {max_bytes // (1024 * 1024)} МБ", reason="size")
+    if fmt == TrackFormat.FIT:
+        # Размер данных из заголовка + CRC: короче — файл оборван при загрузке
+        header = bytes(view[:12])
+        if len(header) < 12 or len(view) < header[0] + int.from_bytes(header[4:8], "little") + 2:
+            raise TrackRejectedError("FIT-файл обрезан", reason="truncated")
+        return
+
+    tail = bytes(view[-_TAIL_BYTES:])
+    end = _GPX_END if fmt == TrackFormat.GPX else _TCX_END
+    if not end.search(tail):
+        raise TrackRejectedError("файл обрезан: нет закрывающего тега", reason="truncated")
+    token = b"<trkpt" if fmt == TrackFormat.GPX else b"<Trackpoint"
+    if _count(view, token, max_points) > max_points:
+        raise TrackRejectedError(f"слишком много точек (больше {max_points})", reason="points")
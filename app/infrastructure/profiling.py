@@ -0,0 +1,254 @@
+"""Infrastructure: on-demand per-request profiling (cProfile + tracemalloc).
+
+Responsibilities:
+- Decide whether a request is profiled: always (env), armed by an admin for a
+  user's next request, or 1 in N sampling.
+- Wrap one handler run with cProfile and tracemalloc; per pipeline stage record
+  wall time and peak allocation through the Metrics port. A stage resets the
+  tracemalloc peak, so the peak seen so far is folded into the session and into
+  enclosing stages first; the session peak covers the whole request.
+- Write ``<stamp>-<handler>-<tag>.prof`` and a JSON summary next to it.
+
+Constraints:
+- One profiled request at a time: cProfile cannot nest, and tracemalloc is
+  process-wide.
+- cProfile is enabled only around the request's blocking calls
+  (``ProfileSession.call``), in the worker thread that runs them; the event loop
+  keeps serving other updates meanwhile. Since Python 3.12 cProfile observes
+  every thread, so other requests may still leak into the profile; the JSON
+  summary records the handler wall time to spot that.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import AbstractContextManager, contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from app.domain.ports.metrics import Labels, Metrics
+
+TAGGED_OBSERVATIONS = {"ingest_file_bytes": "size_bytes", "ingest_points": "point_count"}
+
+
+class _MemoryStage(AbstractContextManager):
+    def __init__(self, owner: "ProfilingMetrics", name: str):
+        self.owner = owner
+        self.name = name
+        self.inner = owner.inner.stage(name)
+
+    def __enter__(self):
+        self.inner.__enter__()
+        self.owner.fold_peak(tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.current_before = tracemalloc.get_traced_memory()[0]
+        self.peak = self.current_before
+        self.owner.open_stages.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        current, peak = tracemalloc.get_traced_memory()
+        self.owner.fold_peak(peak)
+        self.owner.open_stages.remove(self)
+        self.owner.stages.append(
+            {
+                "stage": self.name,
+                "seconds": round(elapsed, 6),
+                "peak_bytes": max(self.peak - self.current_before, 0),
+                "retained_bytes": current - self.current_before,
+                "error": exc_type.__name__ if exc_type else None,
+            }
+        )
+        return self.inner.__exit__(exc_type, exc, tb)
+
+
+class ProfilingMetrics(Metrics):
+    """Метрики профилируемого запроса: пишет в общий реестр и дополнительно меряет память по стадиям."""
+
+    def __init__(self, inner: Metrics, tags: Dict[str, Any]):
+        self.inner = inner
+        self.tags = tags
+        self.stages: List[Dict[str, Any]] = []
+        self.open_stages: List[_MemoryStage] = []
+        # Пик запроса до последнего reset_peak(): стадии сбрасывают счётчик tracemalloc
+        self.peak = 0
+
+    def fold_peak(self, peak: int) -> None:
+        """Учесть пик tracemalloc перед сбросом: в пике запроса и всех открытых стадий."""
+        self.peak = max(self.peak, peak)
+        for stage in self.open_stages:
+            stage.peak = max(stage.peak, peak)
+
+    def increment(self, name: str, amount: float = 1.0, labels: Labels = None) -> None:
+        self.inner.increment(name, amount, labels)
+
+    def observe(self, name: str, value: float, labels: Labels = None) -> None:
+        if name in TAGGED_OBSERVATIONS:
+            self.tags[TAGGED_OBSERVATIONS[name]] = value
+        self.inner.observe(name, value, labels)
+
+    def gauge(self, name: str, value: float, labels: Labels = None) -> None:
+        self.inner.gauge(name, value, labels)
+
+    def stage(self, name: str) -> AbstractContextManager:
+        return _MemoryStage(self, name)
+
+
+class ProfileSession:
+    """Контекст одного запроса: метрики для use case'ов и теги для отчёта (track_id и т.п.)."""
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        tags: Optional[Dict[str, Any]] = None,
+        profile: Optional[cProfile.Profile] = None,
+    ):
+        self.metrics = metrics
+        self.tags = tags if tags is not None else {}
+        self.profile = profile
+
+    @property
+    def active(self) -> bool:
+        return self.profile is not None
+
+    def tag(self, **tags: Any) -> None:
+        self.tags.update(tags)
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Синхронный вызов запроса под cProfile — в том потоке, где он выполняется."""
+        if self.profile is None:
+            return fn(*args)
+        self.profile.enable()
+        try:
+            return fn(*args)
+        finally:
+            self.profile.disable()
+
+
+class RequestProfiler:
+    def __init__(
+        self,
+        registry: Metrics,
+        output_dir: str = "./data/profiles",
+        enabled: bool = False,
+        sample_rate: int = 0,
+        top_functions: int = 30,
+        top_allocations: int = 15,
+    ):
+        self.registry = registry
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+        self._armed: Set[int] = set()
+        self._requests = 0
+        self._active = False
+        self._lock = threading.Lock()
+
+    def arm(self, tg_id: int) -> None:
+        """Профилировать следующий запрос пользователя (админская команда)."""
+        with self._lock:
+            self._armed.add(tg_id)
+
+    def _claim(self, tg_id: Optional[int]) -> bool:
+        with self._lock:
+            self._requests += 1
+            if self._active:
+                return False
+            wanted = (
+                self.enabled
+                or tg_id in self._armed
+                or (self.sample_rate > 0 and self._requests % self.sample_rate == 0)
+            )
+            if wanted:
+                self._armed.discard(tg_id)
+                self._active = True
+            return wanted
+
+    @contextmanager
+    def session(self, handler: str, tg_id: Optional[int] = None) -> Iterator[ProfileSession]:
+        if not self._claim(tg_id):
+            yield ProfileSession(self.registry)
+            return
+
+        tags: Dict[str, Any] = {"handler": handler, "tg_id": tg_id}
+        metrics = ProfilingMetrics(self.registry, tags)
+        profile = cProfile.Profile()
+        session = ProfileSession(metrics, tags, profile)
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield session
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            wall = time.perf_counter() - started
+            peak = max(metrics.peak, tracemalloc.get_traced_memory()[1])
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            try:
+                self._write(profile, snapshot, metrics, tags, started_at, wall, peak, error)
+            finally:
+                with self._lock:
+                    self._active = False
+
+    def _write(
+        self,
+        profile: cProfile.Profile,
+        snapshot: tracemalloc.Snapshot,
+        metrics: ProfilingMetrics,
+        tags: Dict[str, Any],
+        started_at: datetime,
+        wall: float,
+        peak: int,
+        error: Optional[str],
+    ) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        label = tags.get("track_id") or tags.get("tg_id") or "anonymous"
+        base = os.path.join(self.output_dir, f"{started_at:%Y%m%dT%H%M%S.%f}-{tags['handler']}-{label}")
+        profile.dump_stats(base + ".prof")
+
+        summary = {
+            **tags,
+            "started_at": started_at.isoformat(),
+            "wall_seconds": round(wall, 6),
+            "peak_traced_bytes": peak,
+            "error": error,
+            "stages": metrics.stages,
+            "top_functions": self._top_functions(profile),
+            "top_allocations": [
+                {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[: self.top_allocations]
+            ],
+            "prof_file": base + ".prof",
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+        return base + ".json"
+
+    def _top_functions(self, profile: cProfile.Profile) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(profile).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[: self.top_functions]
+        return [
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "total_seconds": round(total, 6),
+                "cumulative_seconds": round(cumulative, 6),
+            }
+            for (filename, line, name), (_, calls, total, cumulative, _) in rows
+        ]
@@ -0,0 +1,244 @@
+"""Infrastructure: append-only pack files for cold raw uploads.
+
+Responsibilities:
+- Move loose raw files (``<base>/<user_id>/<track_id>/<name>``) older than a
+  cutoff into pack files under ``<base>/packs`` and remove their directories,
+  so the upload tree stops growing by two directories per track.
+- Serve reads of packed files with a single ``os.pread`` of the stored slice.
+
+Layout:
+- ``<name>.pack`` holds the stored files back to back, byte for byte.
+  Compressed files are not re-encoded.
+- ``<name>.idx`` is the sidecar index, with one JSON line per file:
+  ``{"track_id", "user_id", "suffix", "offset", "length"}``.
+
+Constraints:
+- Packs are written once and never modified. Every compaction run writes new
+  packs. The index is published (atomic rename) after the pack is fsynced and
+  before the loose files are deleted, so every file stays readable throughout.
+- A pack without an index (crash mid-run) is ignored. Its loose files are
+  still in place and the next run packs them again.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from app.infrastructure.compression import Codec, stored_codecs
+
+PACKS_DIR = "packs"
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+
+
+@dataclass(frozen=True)
+class PackEntry:
+    pack_path: Path
+    suffix: str
+    offset: int
+    length: int
+
+
+class PackIndex:
+    """Индекс всех pack-файлов каталога в памяти; индексы новых pack'ов подхватываются при промахе."""
+
+    def __init__(self, packs_dir: Path):
+        self.packs_dir = packs_dir
+        self._entries: Dict[str, PackEntry] = {}
+        self._loaded: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, track_id: str) -> Optional[PackEntry]:
+        entry = self._entries.get(track_id)
+        if entry is None and self._refresh():
+            entry = self._entries.get(track_id)
+        return entry
+
+    def _refresh(self) -> bool:
+        """Читает индексы, появившиеся после прошлого вызова; True — добавилось хоть что-то."""
+        with self._lock:
+            try:
+                names = sorted(
+                    name
+                    for name in os.listdir(self.packs_dir)
+                    if name.endswith(INDEX_SUFFIX) and name not in self._loaded
+                )
+            except FileNotFoundError:
+                return False
+            for name in names:
+                pack_path = self.packs_dir / (name[: -len(INDEX_SUFFIX)] + PACK_SUFFIX)
+                with open(self.packs_dir / name, encoding="utf-8") as f:
+                    for line in f:
+                        row = json.loads(line)
+                        self._entries[row["track_id"]] = PackEntry(
+                            pack_path, row["suffix"], row["offset"], row["length"]
+                        )
+                self._loaded.add(name)
+            return bool(names)
+
+
+_indexes: Dict[Path, PackIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def pack_index(base_dir: Path) -> PackIndex:
+    """Общий на процесс индекс pack'ов хранилища: экземпляры LocalFSStorage создаются на каждый запрос."""
+    packs_dir = Path(base_dir).resolve() / PACKS_DIR
+    with _indexes_lock:
+        index = _indexes.get(packs_dir)
+        if index is None:
+            index = _indexes[packs_dir] = PackIndex(packs_dir)
+        return index
+
+
+def read_entry(entry: PackEntry) -> bytes:
+    """Срез pack-файла одним pread: без seek, безопасно из нескольких потоков."""
+    fd = os.open(entry.pack_path, os.O_RDONLY)
+    try:
+        data = os.pread(fd, entry.length, entry.offset)
+    finally:
+        os.close(fd)
+    if len(data) != entry.length:
+        raise OSError(f"{entry.pack_path}: truncated entry at offset {entry.offset}")
+    return data
+
+
+@dataclass
+class CompactionReport:
+    packed: int = 0
+    packs: int = 0
+    bytes_packed: int = 0
+    # Уже лежали в pack'е (прошлый запуск упал до удаления) — удалена только свободная копия
+    already_packed: int = 0
+    # Каталоги трека с несколькими файлами: не наша раскладка, не трогаем
+    skipped: int = 0
+
+
+class _PackWriter:
+    def __init__(self, packs_dir: Path):
+        self.packs_dir = packs_dir
+        self.name = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.tmp_path = packs_dir / (self.name + PACK_SUFFIX + ".tmp")
+        self.file = open(self.tmp_path, "wb")
+        self.rows: List[Dict[str, Any]] = []
+        self.sources: List[Path] = []
+        self.size = 0
+
+    def add(self, track_id: str, user_id: str, suffix: str, data: bytes, source: Path) -> None:
+        self.file.write(data)
+        self.rows.append(
+            {"track_id": track_id, "user_id": user_id, "suffix": suffix, "offset": self.size, "length": len(data)}
+        )
+        self.sources.append(source)
+        self.size += len(data)
+
+    def publish(self) -> List[Path]:
+        """Pack, затем индекс — оба через fsync и rename; возвращает упакованные свободные файлы."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.packs_dir / (self.name + PACK_SUFFIX))
+
+        index_tmp = self.packs_dir / (self.name + INDEX_SUFFIX + ".tmp")
+        with open(index_tmp, "w", encoding="utf-8") as f:
+            for row in self.rows:
+                f.write(json.dumps(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(index_tmp, self.packs_dir / (self.name + INDEX_SUFFIX))
+        return self.sources
+
+
+def _split_suffix(name: str) -> str:
+    for codec in stored_codecs():
+        if codec.suffix and name.endswith(codec.suffix):
+            return codec.suffix
+    return ""
+
+
+def _remove_loose(path: Path) -> None:
+    path.unlink(missing_ok=True)
+    # Пустые каталоги трека и пользователя больше не нужны; непустой каталог пользователя остаётся
+    for directory in (path.parent, path.parent.parent):
+        try:
+            directory.rmdir()
+        except OSError:
+            break
+
+
+def compact_loose_files(
+    base_dir: Path,
+    codec: Codec,
+    older_than_seconds: float,
+    max_pack_bytes: int,
+    dry_run: bool = False,
+) -> CompactionReport:
+    """
+    Упаковывает свободные файлы старше older_than_seconds в новые pack'и (до max_pack_bytes каждый).
+    Несжатые файлы (записанные до включения сжатия) по пути сжимаются текущим кодеком.
+    """
+    base_dir = Path(base_dir)
+    packs_dir = base_dir / PACKS_DIR
+    index = pack_index(base_dir)
+    cutoff = time.time() - older_than_seconds
+    report = CompactionReport()
+    writer: Optional[_PackWriter] = None
+
+    def flush() -> None:
+        nonlocal writer
+        if writer is None:
+            return
+        for source in writer.publish():
+            _remove_loose(source)
+        report.packs += 1
+        writer = None
+
+    if not base_dir.is_dir():
+        return report
+    try:
+        for user_dir in sorted(base_dir.iterdir()):
+            if not user_dir.is_dir() or user_dir.name == PACKS_DIR:
+                continue
+            for track_dir in sorted(user_dir.iterdir()):
+                if not track_dir.is_dir():
+                    continue
+                files = [p for p in track_dir.iterdir() if p.is_file() and not p.name.endswith(".tmp")]
+                if len(files) != 1:
+                    report.skipped += bool(files)
+                    continue
+                [path] = files
+                if path.stat().st_mtime >= cutoff:
+                    continue
+                if index.get(track_dir.name) is not None:
+                    report.already_packed += 1
+                    if not dry_run:
+                        _remove_loose(path)
+                    continue
+
+                data = path.read_bytes()
+                suffix = _split_suffix(path.name)
+                if not suffix and codec.suffix:
+                    data, suffix = codec.compress(data), codec.suffix
+                report.packed += 1
+                report.bytes_packed += len(data)
+                if dry_run:
+                    continue
+                if writer is not None and writer.size + len(data) > max_pack_bytes:
+                    flush()
+                if writer is None:
+                    packs_dir.mkdir(parents=True, exist_ok=True)
+                    writer = _PackWriter(packs_dir)
+                writer.add(track_dir.name, user_dir.name, suffix, data, path)
+        flush()
+    finally:
+        # Ошибка посреди запуска: недописанный pack не публикуется, свободные файлы остаются на месте
+        if writer is not None:
+            writer.file.close()
+            writer.tmp_path.unlink(missing_ok=True)
+    return report
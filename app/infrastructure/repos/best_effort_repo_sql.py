@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlmodel import Session, select
+
+from app.domain.ports.track import BestEffortsRepository
+from app.infrastructure.db.models.best_effort_metadata import BestEffortMetadata, PersonalRecordMetadata
+
+
+class BestEffortsRepoSQL(BestEffortsRepository):
+    """
+    Лучшие отрезки треков и инкрементально обновляемая таблица личных рекордов.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def replace_for_track(self, track_id: str, user_id: int, efforts: List[Mapping[str, Any]]) -> None:
+        """Заменяет лучшие отрезки трека и точечно обновляет личные рекорды."""
+
+        stmt = select(BestEffortMetadata).where(BestEffortMetadata.track_id == track_id)
+        existing = {row.distance_label: row for row in self.session.exec(stmt).all()}
+        new_by_label = {e["distance_label"]: e for e in efforts}
+
+        for label, row in existing.items():
+            if label not in new_by_label:
+                self.session.delete(row)
+
+        for label, effort in new_by_label.items():
+            row = existing.get(label)
+            if row is None:
+                row = BestEffortMetadata(track_id=track_id, user_id=user_id, **effort)
+                self.session.add(row)
+            else:
+                for k, v in effort.items():
+                    setattr(row, k, v)
+                row.computed_at_utc = datetime.now(timezone.utc)
+        self.session.flush()
+
+        for label in set(existing) | set(new_by_label):
+            self._update_record(user_id, label, track_id, new_by_label.get(label))
+
+        self.session.commit()
+
+    def get_personal_records(self, user_id: int) -> List[Dict[str, Any]]:
+        """Возвращает личные рекорды пользователя (чтение из индекса, без пересчёта истории)."""
+
+        stmt = (
+            select(PersonalRecordMetadata)
+            .where(PersonalRecordMetadata.user_id == user_id)
+            .order_by(PersonalRecordMetadata.distance_meters)
+        )
+        return [
+            {
+                "distance_label": row.distance_label,
+                "distance_meters": row.distance_meters,
+                "elapsed_seconds": row.elapsed_seconds,
+                "track_id": row.track_id,
+                "start_datetime_utc": row.start_datetime_utc,
+            }
+            for row in self.session.exec(stmt).all()
+        ]
+
+    def _update_record(self, user_id: int, label: str, track_id: str, effort: Optional[Mapping[str, Any]]) -> None:
+        record = self.session.get(PersonalRecordMetadata, (user_id, label))
+
+        # Новый результат лучше текущего рекорда — O(1) обновление
+        if effort is not None and (record is None or effort["elapsed_seconds"] < record.elapsed_seconds):
+            self._set_record(record, user_id, label, track_id, effort)
+            return
+
+        # Рекорд принадлежал этому треку, а теперь результат хуже или пропал —
+        # берём лучший из индекса best_efforts (user_id, distance_label, elapsed_seconds)
+        if record is not None and record.track_id == track_id:
+            stmt = (
+                select(BestEffortMetadata)
+                .where(BestEffortMetadata.user_id == user_id, BestEffortMetadata.distance_label == label)
+                .order_by(BestEffortMetadata.elapsed_seconds)
+                .limit(1)
+            )
+            best = self.session.exec(stmt).first()
+            if best is None:
+                self.session.delete(record)
+            else:
+                self._set_record(
+                    record,
+                    user_id,
+                    label,
+                    best.track_id,
+                    {
+                        "distance_meters": best.distance_meters,
+                        "elapsed_seconds": best.elapsed_seconds,
+                        "start_datetime_utc": best.start_datetime_utc,
+                    },
+                )
+
+    def _set_record(
+        self,
+        record: Optional[PersonalRecordMetadata],
+        user_id: int,
+        label: str,
+        track_id: str,
+        effort: Mapping[str, Any],
+    ) -> None:
+        if record is None:
+            record = PersonalRecordMetadata(
+                user_id=user_id,
+                distance_label=label,
+                track_id=track_id,
+                distance_meters=effort["distance_meters"],
+                elapsed_seconds=effort["elapsed_seconds"],
+            )
+            self.session.add(record)
+        record.track_id = track_id
+        record.distance_meters = effort["distance_meters"]
+        record.elapsed_seconds = effort["elapsed_seconds"]
+        record.start_datetime_utc = effort.get("start_datetime_utc")
+        record.updated_at_utc = datetime.now(timezone.utc)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlalchemy import func, or_, update
+from sqlmodel import Session, select
+
+from app.domain.ports.track import IngestJobQueue
+from app.infrastructure.db.models.ingest_job_metadata import IngestJobMetadata
+
+# Сообщение об ошибке хранится обрезанным: трейсбеки парсеров бывают очень длинными
+MAX_ERROR_LENGTH = 2000
+
+
+class IngestJobQueueSQL(IngestJobQueue):
+    """
+    Очередь загрузок в таблице ingest_jobs (PostgreSQL). Захват — SELECT ... FOR UPDATE SKIP LOCKED:
+    воркеры на разных хостах не ждут друг друга и не берут одну задачу дважды.
+    На SQLite (разработка) блокировки строк нет — там запускается один воркер.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def enqueue(self, job: Mapping[str, Any]) -> str:
+        now = datetime.utcnow()
+        row = IngestJobMetadata(**{"available_at": now, "created_at": now, "updated_at": now, **job})
+        self.session.add(row)
+        self.session.commit()
+        return row.id
+
+    def claim(self, worker_id: str, limit: int, visibility_timeout_seconds: float) -> List[Dict[str, Any]]:
+        """Свободные задачи и задачи с истёкшим захватом (воркер упал); исчерпавшие попытки — в dead."""
+
+        now = datetime.utcnow()
+        stmt = (
+            select(IngestJobMetadata)
+            .where(
+                or_(
+                    (IngestJobMetadata.status == "queued") & (IngestJobMetadata.available_at <= now),
+                    (IngestJobMetadata.status == "running") & (IngestJobMetadata.locked_until < now),
+                )
+            )
+            .order_by(IngestJobMetadata.available_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = []
+        for row in self.session.exec(stmt).all():
+            row.updated_at = now
+            if row.status == "running" and row.attempts >= row.max_attempts:
+                row.status = "dead"
+                row.last_error = row.last_error or "visibility timeout: воркер не завершил задачу"
+                row.locked_by = row.locked_until = None
+                continue
+            row.status = "running"
+            row.attempts += 1
+            row.locked_by = worker_id
+            row.locked_until = now + timedelta(seconds=visibility_timeout_seconds)
+            claimed.append(row.model_dump())
+        self.session.commit()
+        return claimed
+
+    def complete(self, job_id: str, worker_id: str) -> bool:
+        # Условие на locked_by: воркер, чей захват истёк и перешёл к другому, не перетирает результат
+        result = self.session.execute(
+            update(IngestJobMetadata)
+            .where(
+                IngestJobMetadata.id == job_id,
+                IngestJobMetadata.locked_by == worker_id,
+                IngestJobMetadata.status == "running",
+            )
+            .values(status="done", last_error=None, locked_by=None, locked_until=None, updated_at=datetime.utcnow())
+        )
+        self.session.commit()
+        return result.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry_in_seconds: Optional[float]) -> Optional[str]:
+        row = self.session.get(IngestJobMetadata, job_id, with_for_update=True)
+        if row is None or row.locked_by != worker_id or row.status != "running":
+            return None
+        now = datetime.utcnow()
+        retry = retry_in_seconds is not None and row.attempts < row.max_attempts
+        row.status = "queued" if retry else "dead"
+        row.available_at = now + timedelta(seconds=retry_in_seconds) if retry else row.available_at
+        row.last_error = error[:MAX_ERROR_LENGTH]
+        row.locked_by = row.locked_until = None
+        row.updated_at = now
+        self.session.commit()
+        return row.status
+
+    def counts(self) -> Dict[str, int]:
+        stmt = select(IngestJobMetadata.status, func.count()).group_by(IngestJobMetadata.status)
+        return {status: count for status, count in self.session.exec(stmt).all()}
+
+    def requeue_dead(self) -> int:
+        now = datetime.utcnow()
+        result = self.session.execute(
+            update(IngestJobMetadata)
+            .where(IngestJobMetadata.status == "dead")
+            .values(status="queued", attempts=0, available_at=now, updated_at=now)
+        )
+        self.session.commit()
+        return result.rowcount
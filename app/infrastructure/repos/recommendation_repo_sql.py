@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlalchemy import delete, func, or_
+from sqlmodel import Session, select
+
+from app.domain.ports.track import RecommendationsRepository
+from app.infrastructure.db.models.recommendation_metadata import UserRecommendationMetadata
+from app.infrastructure.db.models.track_metadata import TrackMetadata
+
+
+class RecommendationsRepoSQL(RecommendationsRepository):
+    """Предрассчитанные рекомендации пользователей через SQLModel (PostgreSQL)."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def replace_for_users(
+        self,
+        generation: int,
+        computed_at: datetime,
+        recommendations: Mapping[int, List[Dict[str, Any]]],
+        mode: str = "vector",
+        include_other_users: bool = True,
+    ) -> None:
+        """Заменяет рекомендации пачки пользователей одной транзакцией."""
+
+        if not recommendations:
+            return
+        self.session.execute(
+            delete(UserRecommendationMetadata).where(UserRecommendationMetadata.user_id.in_(list(recommendations)))
+        )
+        self.session.add_all(
+            UserRecommendationMetadata(
+                user_id=user_id,
+                rank=rank,
+                track_id=str(rec["track_id"]),
+                score=rec["score"],
+                payload=rec.get("payload") or {},
+                generation=generation,
+                computed_at_utc=computed_at,
+                mode=mode,
+                include_other_users=include_other_users,
+            )
+            for user_id, recs in recommendations.items()
+            for rank, rec in enumerate(recs)
+        )
+        self.session.commit()
+
+    def get_fresh(
+        self, user_id: int, mode: str = "vector", include_other_users: bool = True
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Возвращает предрассчитанные рекомендации, если после их расчёта
+        пользователь не загружал новых треков, а расчёт шёл в том же режиме
+        и с тем же охватом; иначе None.
+        """
+
+        latest_upload = select(func.max(TrackMetadata.created_at)).where(TrackMetadata.user_id == user_id)
+        stmt = (
+            select(UserRecommendationMetadata)
+            .where(
+                UserRecommendationMetadata.user_id == user_id,
+                UserRecommendationMetadata.mode == mode,
+                UserRecommendationMetadata.include_other_users == include_other_users,
+                or_(
+                    latest_upload.scalar_subquery().is_(None),
+                    UserRecommendationMetadata.computed_at_utc >= latest_upload.scalar_subquery(),
+                ),
+            )
+            .order_by(UserRecommendationMetadata.rank)
+        )
+        rows = self.session.exec(stmt).all()
+        if not rows:
+            return None
+        return [{"track_id": row.track_id, "score": row.score, "payload": row.payload} for row in rows]
@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.domain.ports.stats import VolumeStatsRepository
+from app.infrastructure.db.models.stats_metadata import MonthlyVolumeMetadata, WeeklyVolumeMetadata
+from app.infrastructure.db.models.track_metadata import TrackFeaturesMetadata
+
+_VOLUME_FIELDS = ("distance_kilometers", "moving_duration_seconds", "elevation_gain_meters", "activity_count")
+_PERIODS = ((WeeklyVolumeMetadata, "iso_week"), (MonthlyVolumeMetadata, "month"))
+REBUILD_BATCH_SIZE = 5000
+
+
+def volume_contribution(row: TrackFeaturesMetadata) -> Optional[Dict[str, Any]]:
+    """Вклад одного трека в недельную/месячную сводку (None — трек без времени старта)."""
+    start = row.start_datetime_utc
+    if start is None or row.user_id is None:
+        return None
+    iso_year, iso_week, _ = start.isocalendar()
+    return {
+        "user_id": row.user_id,
+        "iso_week": f"{iso_year}-W{iso_week:02d}",
+        "month": f"{start.year}-{start.month:02d}",
+        "distance_kilometers": row.total_distance_kilometers or 0.0,
+        "moving_duration_seconds": row.total_moving_duration_seconds or 0,
+        "elevation_gain_meters": row.total_elevation_gain_meters or 0.0,
+        "activity_count": 1,
+    }
+
+
+def apply_volume_delta(session: Session, contribution: Optional[Dict[str, Any]], sign: int) -> None:
+    """
+    Атомарно прибавляет (sign=1) или вычитает (sign=-1) вклад трека в сводных таблицах.
+    Не коммитит: вызывается внутри транзакции upsert/delete признаков.
+    """
+    if contribution is None:
+        return
+    insert = sqlite.insert if session.get_bind().dialect.name == "sqlite" else postgresql.insert
+    values = {k: contribution[k] * sign for k in _VOLUME_FIELDS}
+
+    for model, key in _PERIODS:
+        table = model.__table__
+        stmt = insert(table).values(user_id=contribution["user_id"], **{key: contribution[key]}, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", key],
+            set_={k: table.c[k] + stmt.excluded[k] for k in _VOLUME_FIELDS},
+        )
+        session.execute(stmt)
+        session.execute(
+            delete(table).where(
+                table.c.user_id == contribution["user_id"],
+                table.c[key] == contribution[key],
+                table.c.activity_count <= 0,
+            )
+        )
+
+
+class VolumeStatsRepoSQL(VolumeStatsRepository):
+    """Сводные таблицы объёмов по неделям/месяцам через SQLModel (PostgreSQL)."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_weekly(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        stmt = (
+            select(WeeklyVolumeMetadata)
+            .where(WeeklyVolumeMetadata.user_id == user_id)
+            .order_by(WeeklyVolumeMetadata.iso_week.desc())
+            .limit(limit)
+        )
+        return [
+            {"period": row.iso_week, **{k: getattr(row, k) for k in _VOLUME_FIELDS}}
+            for row in self.session.exec(stmt).all()
+        ]
+
+    def get_monthly(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        stmt = (
+            select(MonthlyVolumeMetadata)
+            .where(MonthlyVolumeMetadata.user_id == user_id)
+            .order_by(MonthlyVolumeMetadata.month.desc())
+            .limit(limit)
+        )
+        return [
+            {"period": row.month, **{k: getattr(row, k) for k in _VOLUME_FIELDS}}
+            for row in self.session.exec(stmt).all()
+        ]
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """
+        Перестраивает сводки с нуля. Периоды считает та же volume_contribution, что и инкрементальный
+        путь, поэтому ключи недель совпадают на любой СУБД. Треки читаются потоком, суммы копятся
+        в памяти (по строке на неделю/месяц пользователя). Возвращает число пересчитанных недельных строк.
+        """
+        f = TrackFeaturesMetadata
+        source = select(
+            f.user_id,
+            f.start_datetime_utc,
+            f.total_distance_kilometers,
+            f.total_moving_duration_seconds,
+            f.total_elevation_gain_meters,
+        ).where(f.start_datetime_utc.is_not(None))
+        if user_id is not None:
+            source = source.where(f.user_id == user_id)
+
+        totals: Dict[str, Dict[Tuple[int, str], Dict[str, Any]]] = {key: {} for _, key in _PERIODS}
+        for row in self.session.execute(source.execution_options(yield_per=REBUILD_BATCH_SIZE)):
+            contribution = volume_contribution(row)
+            if contribution is None:
+                continue
+            for _, key in _PERIODS:
+                period = (contribution["user_id"], contribution[key])
+                acc = totals[key].setdefault(period, dict.fromkeys(_VOLUME_FIELDS, 0))
+                for k in _VOLUME_FIELDS:
+                    acc[k] += contribution[k]
+
+        for model, key in _PERIODS:
+            table = model.__table__
+            cleanup = delete(table)
+            if user_id is not None:
+                cleanup = cleanup.where(table.c.user_id == user_id)
+            self.session.execute(cleanup)
+            rows = [{"user_id": uid, key: period, **values} for (uid, period), values in totals[key].items()]
+            for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+                self.session.execute(table.insert(), rows[start : start + REBUILD_BATCH_SIZE])
+        self.session.commit()
+        return len(totals["iso_week"])
@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.domain.ports.track import TrackVectorIndex
+
+
+class TrackVectorIndexInMemory(TrackVectorIndex):
+    """
+    Встроенный индекс без внешних сервисов: точный косинусный поиск по матрице NumPy.
+    Для локальной разработки, бенчмарков и небольших инсталляций.
+    """
+
+    def __init__(self, vector_size: int = 13):
+        self.ensure_collection(vector_size)
+
+    def ensure_collection(self, vector_size: int) -> None:
+        self.track_ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+        self.matrix = np.zeros((0, vector_size), dtype=np.float32)
+
+    def upsert(self, track_id: str, vector: List[float], payload: Dict[str, Any]) -> None:
+        self.upsert_many([(track_id, vector, payload)])
+
+    def upsert_many(self, points: Sequence[tuple]) -> None:
+        """Пакетная вставка: одна перестройка матрицы на пачку точек."""
+        new_rows = []
+        stored = len(self.matrix)
+        for track_id, vector, payload in points:
+            row = self._normalize(np.asarray(vector, dtype=np.float32))
+            position = self.positions.get(track_id)
+            if position is None:
+                position = self.positions[track_id] = len(self.track_ids)
+                self.track_ids.append(track_id)
+                self.payloads.append({**payload})
+                new_rows.append(row)
+                continue
+            self.payloads[position] = {**payload}
+            if position < stored:
+                self.matrix[position] = row
+            else:
+                new_rows[position - stored] = row
+        if new_rows:
+            self.matrix = np.vstack([self.matrix, np.stack(new_rows)])
+
+    def delete_many(self, track_ids: Sequence[str]) -> None:
+        drop = {self.positions[track_id] for track_id in track_ids if track_id in self.positions}
+        if not drop:
+            return
+        keep = [i for i in range(len(self.track_ids)) if i not in drop]
+        self.track_ids = [self.track_ids[i] for i in keep]
+        self.payloads = [self.payloads[i] for i in keep]
+        self.matrix = self.matrix[keep]
+        self.positions = {track_id: i for i, track_id in enumerate(self.track_ids)}
+
+    def ids(self) -> Iterator[str]:
+        return iter(list(self.track_ids))
+
+    def search(
+        self, query_vector: List[float], top_k: int = 10, exclude_user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return self.search_batch([query_vector], top_k, [exclude_user_id])[0]
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[List[float]],
+        top_k: int = 10,
+        exclude_user_ids: Optional[Sequence[Optional[int]]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        if not query_vectors:
+            return []
+        if not self.track_ids:
+            return [[] for _ in query_vectors]
+        queries = np.stack([self._normalize(np.asarray(v, dtype=np.float32)) for v in query_vectors])
+        scores = queries @ self.matrix.T
+        excluded = exclude_user_ids if exclude_user_ids is not None else [None] * len(query_vectors)
+
+        results = []
+        for row, user_id in zip(scores, excluded):
+            if user_id is not None:
+                row = np.where(self._user_mask(user_id), -np.inf, row)
+            k = min(top_k, len(row))
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append(
+                [
+                    {"track_id": self.track_ids[i], "score": float(row[i]), "payload": self.payloads[i]}
+                    for i in top
+                    if np.isfinite(row[i])
+                ]
+            )
+        return results
+
+    def _user_mask(self, user_id: int) -> np.ndarray:
+        return np.fromiter((p.get("user_id") == user_id for p in self.payloads), dtype=bool, count=len(self.payloads))
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
@@ -1,9 +1,24 @@
-from typing import Any, Dict, List, Optional
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, FieldCondition, Filter, MatchValue, PointStruct, VectorParams
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    HnswConfigDiff,
+    MatchValue,
+    PointIdsList,
+    PointStruct,
+    QuantizationConfig,
+    QueryRequest,
+    SearchParams,
+    VectorParams,
+)
 
+from app.config import settings
 from app.domain.ports.track import TrackVectorIndex
+from app.infrastructure.db import qdrant
 
 
 class TrackVectorIndexQdrant(TrackVectorIndex):
@@ -11,30 +26,125 @@ class TrackVectorIndexQdrant(TrackVectorIndex):
     Инфраструктурный репозиторий на базе Qdrant: хранение и поиск векторов признаков треков.
     """
 
-    def __init__(self, host: str = "localhost", port: int = 6333, collection_name: str = "track_features_v1"):
-        self.qdrant_client = QdrantClient(host=host, port=port)
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6333,
+        collection_name: str = "track_features_v1",
+        client: Optional[QdrantClient] = None,
+        hnsw_config: Optional[HnswConfigDiff] = None,
+        quantization_config: Optional[QuantizationConfig] = None,
+        on_disk: bool = False,
+        search_params: Optional[SearchParams] = None,
+    ):
+        self.qdrant_client = client or QdrantClient(host=host, port=port)
         self.collection_name = collection_name
+        self.hnsw_config = hnsw_config
+        self.quantization_config = quantization_config
+        self.on_disk = on_disk
+        self.search_params = search_params
 
     def ensure_collection(self, vector_size: int) -> None:
         self.qdrant_client.recreate_collection(
             collection_name=self.collection_name,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+            vectors_config=VectorParams(
+                size=vector_size, distance=Distance.COSINE, hnsw_config=self.hnsw_config, on_disk=self.on_disk
+            ),
+            quantization_config=self.quantization_config,
         )
 
     def upsert(self, track_id: str, vector: List[float], payload: Dict[str, Any]) -> None:
         point = PointStruct(id=track_id, vector=vector, payload={**payload})
         self.qdrant_client.upsert(collection_name=self.collection_name, points=[point])
 
+    def upsert_many(self, points: Sequence[Tuple[str, List[float], Dict[str, Any]]]) -> None:
+        """Пачка точек одним запросом (массовый импорт)."""
+        if not points:
+            return
+        structs = [PointStruct(id=track_id, vector=vector, payload={**payload}) for track_id, vector, payload in points]
+        self.qdrant_client.upsert(collection_name=self.collection_name, points=structs)
+
+    def delete_many(self, track_ids: Sequence[str]) -> None:
+        if not track_ids:
+            return
+        self.qdrant_client.delete(
+            collection_name=self.collection_name, points_selector=PointIdsList(points=list(track_ids))
+        )
+
+    def ids(self) -> Iterator[str]:
+        """Все id точек коллекции (scroll без векторов и payload) — в формате id трека (hex)."""
+        offset = None
+        while True:
+            points, offset = self.qdrant_client.scroll(
+                collection_name=self.collection_name,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            for point in points:
+                # Qdrant возвращает UUID с дефисами, id треков хранятся в hex
+                yield _track_id(point.id)
+            if offset is None:
+                return
+
     def search(
-        self, query_vector: List[float], top_k: int = 10, user_id_filter: Optional[int] = None
+        self, query_vector: List[float], top_k: int = 10, exclude_user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        query_filter = None
-        if user_id_filter is not None:
-            query_filter = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id_filter))])
         results = self.qdrant_client.search(
             collection_name=self.collection_name,
             query_vector=query_vector,
             limit=top_k,
-            query_filter=query_filter,
+            query_filter=self._exclude_user(exclude_user_id),
+            search_params=self.search_params,
         )
-        return [{"track_id": r.id, "score": r.score, "payload": r.payload} for r in results]
+        return [{"track_id": _track_id(r.id), "score": r.score, "payload": r.payload} for r in results]
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[List[float]],
+        top_k: int = 10,
+        exclude_user_ids: Optional[Sequence[Optional[int]]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Много запросов за один round-trip (query_batch_points)."""
+        if not query_vectors:
+            return []
+        excluded = exclude_user_ids if exclude_user_ids is not None else [None] * len(query_vectors)
+        requests = [
+            QueryRequest(
+                query=list(vector),
+                limit=top_k,
+                filter=self._exclude_user(user_id),
+                params=self.search_params,
+                with_payload=True,
+            )
+            for vector, user_id in zip(query_vectors, excluded)
+        ]
+        responses = self.qdrant_client.query_batch_points(collection_name=self.collection_name, requests=requests)
+        return [
+            [{"track_id": _track_id(p.id), "score": p.score, "payload": p.payload} for p in response.points]
+            for response in responses
+        ]
+
+    @staticmethod
+    def _exclude_user(user_id: Optional[int]) -> Optional[Filter]:
+        if user_id is None:
+            return None
+        return Filter(must_not=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+
+
+def _track_id(point_id: Union[str, int]) -> str:
+    """Id точки Qdrant (UUID с дефисами) -> id трека в SQL (hex, как у UUIDGen/ContentHashIdGen)."""
+    return uuid.UUID(point_id).hex if isinstance(point_id, str) else str(point_id)
+
+
+def vector_index_from_settings(client: Optional[QdrantClient] = None) -> TrackVectorIndexQdrant:
+    """Индекс на общем (или переданном) клиенте с HNSW/квантованием/параметрами поиска из настроек."""
+    return TrackVectorIndexQdrant(
+        collection_name=settings.QDRANT_COLLECTION,
+        client=client or qdrant.get_client(),
+        hnsw_config=qdrant.hnsw_config(),
+        quantization_config=qdrant.quantization_config(),
+        on_disk=settings.QDRANT_ON_DISK_VECTORS,
+        search_params=qdrant.search_params(),
+    )
@@ -1,13 +1,22 @@
+import hashlib
+import io
 import os
+import shutil
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
 
+from sqlalchemy import func
 from sqlmodel import Session, select
 
-from app.domain.models.track import Track, TrackFormat
-from app.domain.ports.track import TrackFormatDetector, TrackIdGenerator, TrackStorage
+from app.config import settings
+from app.domain.models.track import Track, TrackFormat, TrackSource
+from app.domain.ports.track import TrackContentIdGenerator, TrackFormatDetector, TrackIdGenerator, TrackStorage
+from app.infrastructure.compression import Codec, codec_for_suffix, make_codec, stored_codecs
 from app.infrastructure.db.models.track_metadata import TrackFeaturesMetadata, TrackMetadata
+from app.infrastructure.parsers.sniff import detect_format
+from app.infrastructure.raw_packs import CompactionReport, compact_loose_files, pack_index, read_entry
+from app.infrastructure.repos.stats_repo_sql import apply_volume_delta, volume_contribution
 
 
 class TrackMetadataRepoSQL:
@@ -17,25 +26,83 @@ class TrackMetadataRepoSQL:
         self.session = session
 
     def save(self, meta: dict) -> None:
-        row = TrackMetadata(**meta)
-        self.session.add(row)
+        # merge: повтор задачи из очереди загрузок с тем же id трека не падает на дубликате
+        self.session.merge(TrackMetadata(**meta))
         self.session.commit()
 
+    def save_many(self, metas: list[dict]) -> None:
+        """
+        Пачка метаданных без commit: фиксируется вместе с признаками пачки (upsert_many).
+        merge — повтор прерванного импорта не падает на дубликате.
+        """
+
+        for meta in metas:
+            self.session.merge(TrackMetadata(**meta))
+
+    def existing_ids(self, track_ids: list[str]) -> set[str]:
+        if not track_ids:
+            return set()
+        return set(self.session.exec(select(TrackMetadata.id).where(TrackMetadata.id.in_(track_ids))).all())
+
 
 class TrackFeaturesRepoSQL:
     def __init__(self, session: Session):
         self.session = session
 
     def upsert(self, features: dict) -> None:
-        row = self.session.get(TrackFeaturesMetadata, features["id"])
+        """Сохраняет признаки и в той же транзакции обновляет недельные/месячные сводки."""
+
+        self._upsert_row(features, self.session.get(TrackFeaturesMetadata, features["id"]))
+        self.session.commit()
+
+    def upsert_many(self, features_list: list[dict]) -> None:
+        """Пачка признаков одной транзакцией: существующие строки читаются одним запросом."""
+
+        ids = [features["id"] for features in features_list]
+        if ids:
+            stmt = select(TrackFeaturesMetadata).where(TrackFeaturesMetadata.id.in_(ids))
+            existing = {row.id: row for row in self.session.exec(stmt).all()}
+            for features in features_list:
+                existing[features["id"]] = self._upsert_row(features, existing.get(features["id"]))
+        # Пустая пачка тоже фиксируется: в транзакции могут ждать метаданные и outbox
+        self.session.commit()
+
+    def _upsert_row(self, features: dict, row: Optional[TrackFeaturesMetadata]) -> TrackFeaturesMetadata:
         if row is None:
+            previous = None
             row = TrackFeaturesMetadata(**features)
             self.session.add(row)
         else:
+            previous = volume_contribution(row)
             for k, v in features.items():
+                if k == "feature_versions" and v is not None:
+                    # Частичный пересчёт обновляет версии только своих провайдеров; новый dict — JSON без мутаций
+                    v = {**(row.feature_versions or {}), **v}
                 setattr(row, k, v)
-        self.session.commit()
+        apply_volume_delta(self.session, previous, -1)
+        apply_volume_delta(self.session, volume_contribution(row), 1)
+        return row
+
+    def get(self, track_id: str) -> Optional[dict]:
+        """Все сохранённые признаки трека."""
+
+        row = self.session.get(TrackFeaturesMetadata, track_id)
+        return row.model_dump() if row else None
 
+    def list_ids(self) -> list[str]:
+        return list(self.session.exec(select(TrackFeaturesMetadata.id)).all())
+
+    def page_feature_versions(self, after_id: Optional[str], limit: int) -> list[dict]:
+        """Страница (по id, keyset) треков с признаками: данные трека для open_raw и версии провайдеров."""
+
+        t, f = TrackMetadata, TrackFeaturesMetadata
+        stmt = select(t.id, t.user_id, t.filename, t.format, t.source, t.created_at, f.feature_versions).join(
+            f, f.id == t.id
+        )
+        if after_id is not None:
+            stmt = stmt.where(t.id > after_id)
+        rows = self.session.exec(stmt.order_by(t.id).limit(limit)).all()
+        return [row._asdict() for row in rows]
 
     def get_all_by_user(self, user_id: int) -> list[dict]:
         """Возвращает все треки пользователя."""
@@ -43,22 +110,70 @@ class TrackFeaturesRepoSQL:
         stmt = select(TrackFeaturesMetadata).where(TrackFeaturesMetadata.user_id == user_id)
         rows = self.session.exec(stmt).all()
 
-        return [
-            {
-                "id": row.id,
-                "user_id": row.user_id,
-                "total_distance_kilometers": row.total_distance_kilometers,
-                "elevation_gain_per_kilometer": row.elevation_gain_per_kilometer,
-                "path_sinuosity_ratio": row.path_sinuosity_ratio,
-                "start_hour_of_day_utc": row.start_hour_of_day_utc,
-                "day_of_week_index": row.day_of_week_index,
-                "start_latitude_deg": row.start_latitude_deg,
-                "start_longitude_deg": row.start_longitude_deg,
-                "route_curvature_category": row.route_curvature_category,
-                "terrain_category": row.terrain_category,
-            }
-            for row in rows
-        ]
+        return [self._to_profile_dict(row) for row in rows]
+
+    def get_all_by_users(self, user_ids: list[int]) -> dict[int, list[dict]]:
+        """Возвращает треки сразу для пачки пользователей одним запросом."""
+
+        stmt = select(TrackFeaturesMetadata).where(TrackFeaturesMetadata.user_id.in_(user_ids))
+        by_user: dict[int, list[dict]] = {user_id: [] for user_id in user_ids}
+        for row in self.session.exec(stmt).all():
+            by_user[row.user_id].append(self._to_profile_dict(row))
+        return by_user
+
+    def find_candidates(
+        self,
+        area_ids: Optional[list[str]] = None,
+        distance_range: Optional[tuple[float, float]] = None,
+        terrain: Optional[str] = None,
+        user_id: Optional[int] = None,
+        exclude_user_id: Optional[int] = None,
+        limit: int = 200,
+        target_distance: Optional[float] = None,
+    ) -> list[dict]:
+        """
+        Кандидаты для гибридного поиска: только предикаты по индексированным колонкам
+        (start_area_identifier_approx, total_distance_kilometers, terrain_category, user_id).
+        Когда совпадений больше limit, берутся ближайшие к target_distance (без дистанции — последними),
+        при равенстве — по id: выборка не зависит от плана запроса.
+        """
+
+        f = TrackFeaturesMetadata
+        stmt = select(f)
+        if area_ids is not None:
+            stmt = stmt.where(f.start_area_identifier_approx.in_(area_ids))
+        if distance_range is not None:
+            stmt = stmt.where(f.total_distance_kilometers.between(*distance_range))
+        if terrain is not None:
+            stmt = stmt.where(f.terrain_category == terrain)
+        if user_id is not None:
+            stmt = stmt.where(f.user_id == user_id)
+        if exclude_user_id is not None:
+            stmt = stmt.where(f.user_id != exclude_user_id)
+        if target_distance is not None:
+            stmt = stmt.order_by(
+                f.total_distance_kilometers.is_(None), func.abs(f.total_distance_kilometers - target_distance)
+            )
+        stmt = stmt.order_by(f.id).limit(limit)
+        return [self._to_profile_dict(row) for row in self.session.exec(stmt).all()]
+
+    @staticmethod
+    def _to_profile_dict(row: TrackFeaturesMetadata) -> dict:
+        return {
+            "id": row.id,
+            "user_id": row.user_id,
+            "total_distance_kilometers": row.total_distance_kilometers,
+            "elevation_gain_per_kilometer": row.elevation_gain_per_kilometer,
+            "path_sinuosity_ratio": row.path_sinuosity_ratio,
+            "start_hour_of_day_utc": row.start_hour_of_day_utc,
+            "day_of_week_index": row.day_of_week_index,
+            "start_latitude_deg": row.start_latitude_deg,
+            "start_longitude_deg": row.start_longitude_deg,
+            "start_area_identifier_approx": row.start_area_identifier_approx,
+            "route_curvature_category": row.route_curvature_category,
+            "terrain_category": row.terrain_category,
+            "route_fingerprint": row.route_fingerprint,
+        }
 
 
 class UUIDGen(TrackIdGenerator):
@@ -66,31 +181,85 @@ class UUIDGen(TrackIdGenerator):
         return uuid.uuid4().hex
 
 
+class ContentHashIdGen(TrackContentIdGenerator):
+    """uuid5 от пользователя и SHA-256 содержимого — тот же формат (hex), что у UUIDGen."""
+
+    NAMESPACE = uuid.UUID("5b0f3c1e-8d2a-4c57-9a3e-36600b7e0d15")
+
+    def id_for(self, user_id: int, content: bytes) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        return uuid.uuid5(self.NAMESPACE, f"{user_id}:{digest}").hex
+
+
 class LocalFSStorage(TrackStorage):
-    """Хранилище треков на локальной файловой системе."""
+    """Хранилище треков на локальной файловой системе; файлы сжимаются кодеком при записи."""
 
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, codec: Optional[Codec] = None):
         self.base_dir = Path(base_dir)
+        self.codec = codec or Codec()
 
-    def save_raw(self, track: Track, content: bytes) -> str:
-        user_dir = self.base_dir / str(track.user_id)
-        track_dir = user_dir / track.id
+    def _track_dir(self, track: Track) -> Path:
+        return self.base_dir / str(track.user_id) / track.id
+
+    def save_raw(self, track: Track, content: TrackSource) -> str:
+        """content — байты, буфер (memoryview поверх mmap) или поток: пишется кусками, без копии в памяти."""
+        track_dir = self._track_dir(track)
         track_dir.mkdir(parents=True, exist_ok=True)
-        file_path = track_dir / track.filename
-        with open(file_path, "wb") as f:
-            f.write(content)
+        file_path = track_dir / (track.filename + self.codec.suffix)
+        # Через временный файл: воркер не прочитает недописанный архив
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+        with self.codec.open_writer(tmp_path) as f:
+            if isinstance(content, (bytes, bytearray, memoryview)):
+                f.write(content)
+            else:
+                shutil.copyfileobj(content, f, 1024 * 1024)
+        os.replace(tmp_path, file_path)
         return str(file_path)
 
+    def open_raw(self, track: Track) -> BinaryIO:
+        """
+        Поток исходного файла с распаковкой на лету. Сначала свободный файл (свежие загрузки;
+        без сжатия — записанные до его включения), затем pack холодного архива.
+        """
+        track_dir = self._track_dir(track)
+        for codec in stored_codecs():
+            file_path = track_dir / (track.filename + codec.suffix)
+            if file_path.exists():
+                try:
+                    return codec.open_reader(file_path)
+                except FileNotFoundError:
+                    # Упакован compaction'ом между проверкой и открытием — индекс pack'а уже опубликован
+                    break
+        entry = pack_index(self.base_dir).get(track.id)
+        if entry is None:
+            raise FileNotFoundError(track_dir / track.filename)
+        return codec_for_suffix(entry.suffix).reader(io.BytesIO(read_entry(entry)))
+
+    def load_raw(self, track: Track) -> bytes:
+        with self.open_raw(track) as f:
+            return f.read()
+
     def exists(self, track_id: str) -> bool:
-        for p in self.base_dir.rglob("*"):
-            if p.is_dir() and p.name == track_id:
-                return True
-        return False
+        # Каталог трека лежит прямо в каталоге пользователя: обход по пользователям, без rglob по всем файлам
+        if self.base_dir.is_dir() and any((user_dir / track_id).is_dir() for user_dir in self.base_dir.iterdir()):
+            return True
+        return pack_index(self.base_dir).get(track_id) is not None
+
+    def compact(self, older_than_seconds: float, max_pack_bytes: int, dry_run: bool = False) -> CompactionReport:
+        """Переносит свободные файлы старше older_than_seconds в pack-файлы холодного архива."""
+        return compact_loose_files(self.base_dir, self.codec, older_than_seconds, max_pack_bytes, dry_run=dry_run)
+
+
+def raw_storage_from_settings() -> LocalFSStorage:
+    """Хранилище исходных файлов с каталогом и сжатием из настроек."""
+    return LocalFSStorage(
+        settings.RAW_STORAGE_DIR,
+        make_codec(settings.RAW_STORAGE_COMPRESSION, settings.RAW_STORAGE_COMPRESSION_LEVEL),
+    )
 
 
 class SimpleFormatDetector(TrackFormatDetector):
+    """Формат по содержимому (сигнатура FIT, корневой элемент XML); расширение — только если заголовок не решает."""
+
     def detect(self, filename: str, first_bytes: bytes) -> Optional[TrackFormat]:
-        ext = os.path.splitext(filename)[1].lower().lstrip(".")
-        if ext in {"gpx", "fit", "tcx"}:
-            return TrackFormat(ext)
-        return None
+        return detect_format(filename, first_bytes)
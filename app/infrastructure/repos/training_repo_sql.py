@@ -0,0 +1,76 @@
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.domain.models.training import TrainingLoadDay
+from app.domain.ports.training import TrainingLoadRepository
+from app.infrastructure.db.models.training_metadata import TrackTrainingLoadMetadata, TrainingLoadDayMetadata
+
+
+def _to_entity(row: TrainingLoadDayMetadata) -> TrainingLoadDay:
+    return TrainingLoadDay(day=row.day, load=row.load, acute_load=row.acute_load, chronic_load=row.chronic_load)
+
+
+class TrainingLoadRepoSQL(TrainingLoadRepository):
+    """Хранилище состояния тренировочной нагрузки через SQLModel (PostgreSQL)."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_track_load(self, track_id: str) -> Optional[Tuple[date, float]]:
+        row = self.session.get(TrackTrainingLoadMetadata, track_id)
+        return (row.day, row.load) if row else None
+
+    def get_day_before(self, user_id: int, day: date) -> Optional[TrainingLoadDay]:
+        stmt = (
+            select(TrainingLoadDayMetadata)
+            .where(TrainingLoadDayMetadata.user_id == user_id, TrainingLoadDayMetadata.day < day)
+            .order_by(TrainingLoadDayMetadata.day.desc())
+            .limit(1)
+        )
+        row = self.session.exec(stmt).first()
+        return _to_entity(row) if row else None
+
+    def get_days_since(self, user_id: int, day: date) -> List[TrainingLoadDay]:
+        stmt = (
+            select(TrainingLoadDayMetadata)
+            .where(TrainingLoadDayMetadata.user_id == user_id, TrainingLoadDayMetadata.day >= day)
+            .order_by(TrainingLoadDayMetadata.day)
+        )
+        return [_to_entity(row) for row in self.session.exec(stmt).all()]
+
+    def get_latest_day(self, user_id: int) -> Optional[TrainingLoadDay]:
+        stmt = (
+            select(TrainingLoadDayMetadata)
+            .where(TrainingLoadDayMetadata.user_id == user_id)
+            .order_by(TrainingLoadDayMetadata.day.desc())
+            .limit(1)
+        )
+        row = self.session.exec(stmt).first()
+        return _to_entity(row) if row else None
+
+    def save(
+        self, user_id: int, track_id: str, track_day: date, track_load: float, days: List[TrainingLoadDay]
+    ) -> None:
+        """Сохраняет вклад трека и переигранное окно состояний одной транзакцией."""
+
+        track_row = self.session.get(TrackTrainingLoadMetadata, track_id)
+        if track_row is None:
+            track_row = TrackTrainingLoadMetadata(track_id=track_id, user_id=user_id, day=track_day, load=track_load)
+            self.session.add(track_row)
+        else:
+            track_row.day = track_day
+            track_row.load = track_load
+
+        now = datetime.now(timezone.utc)
+        for d in days:
+            row = self.session.get(TrainingLoadDayMetadata, (user_id, d.day))
+            if row is None:
+                row = TrainingLoadDayMetadata(user_id=user_id, day=d.day)
+                self.session.add(row)
+            row.load = d.load
+            row.acute_load = d.acute_load
+            row.chronic_load = d.chronic_load
+            row.updated_at_utc = now
+        self.session.commit()
@@ -46,3 +46,9 @@ class UserRepoSQL(UserRepository):
 
         row = self.session.exec(select(UserMetadata).where(UserMetadata.tg_id == tg_id)).first()
         return row.id if row else None
+
+    def list_ids(self, after_id: int = 0, limit: int = 100) -> list[int]:
+        """Постраничный (keyset) обход id пользователей для пакетных задач."""
+
+        stmt = select(UserMetadata.id).where(UserMetadata.id > after_id).order_by(UserMetadata.id).limit(limit)
+        return list(self.session.exec(stmt).all())
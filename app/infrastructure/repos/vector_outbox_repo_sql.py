@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select
+
+from app.domain.ports.track import VectorOutbox
+from app.infrastructure.db.models.vector_outbox_metadata import VectorOutboxMetadata
+
+MAX_ERROR_LENGTH = 2000
+
+
+class VectorOutboxSQL(VectorOutbox):
+    """
+    Outbox в таблице vector_outbox. Запись — в сессии репозитория признаков (тот же commit).
+    Захват — SELECT ... FOR UPDATE SKIP LOCKED: строки заблокированы, пока дренаж шлёт пачку
+    в индекс, и освобождаются при ack/retry или обрыве соединения, так что несколько
+    дренажей не отправляют одно и то же.
+    Порядок по треку: захватывается только самая ранняя операция трека (более ранней нет ни
+    свободной, ни отложенной, ни захваченной другим дренажом) вместе со всеми последующими,
+    поэтому старый вектор не может лечь в индекс поверх нового.
+    Операции в dead (dead_at) не захватываются и не держат более поздние операции своего трека.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add_upserts(self, points: Sequence[Tuple[str, List[float], Dict[str, Any]]]) -> None:
+        now = datetime.utcnow()
+        self.session.add_all(
+            VectorOutboxMetadata(
+                track_id=track_id,
+                op="upsert",
+                vector=[float(v) for v in vector],
+                payload=payload,
+                available_at=now,
+                created_at=now,
+            )
+            for track_id, vector, payload in points
+        )
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        earlier = aliased(VectorOutboxMetadata)
+        heads_stmt = (
+            select(VectorOutboxMetadata)
+            .where(
+                VectorOutboxMetadata.dead_at.is_(None),
+                VectorOutboxMetadata.available_at <= datetime.utcnow(),
+                ~select(earlier.id)
+                .where(
+                    earlier.track_id == VectorOutboxMetadata.track_id,
+                    earlier.id < VectorOutboxMetadata.id,
+                    earlier.dead_at.is_(None),
+                )
+                .exists(),
+            )
+            .order_by(VectorOutboxMetadata.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        heads = self.session.exec(heads_stmt).all()
+        if not heads:
+            return []
+        # Последующие операции тех же треков: другой дренаж их не захватит, пока жива голова,
+        # а отложенные берутся тоже — иначе ack более новой оставил бы старую доставляться позже
+        followers_stmt = (
+            select(VectorOutboxMetadata)
+            .where(
+                VectorOutboxMetadata.track_id.in_([row.track_id for row in heads]),
+                VectorOutboxMetadata.id.not_in([row.id for row in heads]),
+                VectorOutboxMetadata.dead_at.is_(None),
+            )
+            .order_by(VectorOutboxMetadata.id)
+            .with_for_update()
+        )
+        rows = sorted([*heads, *self.session.exec(followers_stmt).all()], key=lambda row: row.id)
+        return [row.model_dump() for row in rows]
+
+    def ack(self, entry_ids: Sequence[int]) -> None:
+        if entry_ids:
+            # Мёртвые операции тех же треков устарели: requeue_dead не должен вернуть старый вектор
+            acked_tracks = select(VectorOutboxMetadata.track_id).where(VectorOutboxMetadata.id.in_(list(entry_ids)))
+            self.session.execute(
+                delete(VectorOutboxMetadata).where(
+                    VectorOutboxMetadata.dead_at.is_not(None), VectorOutboxMetadata.track_id.in_(acked_tracks)
+                )
+            )
+            self.session.execute(delete(VectorOutboxMetadata).where(VectorOutboxMetadata.id.in_(list(entry_ids))))
+        self.session.commit()
+
+    def retry(self, entry_ids: Sequence[int], error: str, delay_seconds: float) -> None:
+        if entry_ids:
+            self.session.execute(
+                update(VectorOutboxMetadata)
+                .where(VectorOutboxMetadata.id.in_(list(entry_ids)))
+                .values(
+                    attempts=VectorOutboxMetadata.attempts + 1,
+                    available_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+                    last_error=error[:MAX_ERROR_LENGTH],
+                )
+            )
+        self.session.commit()
+
+    def mark_dead(self, entry_ids: Sequence[int], error: str) -> None:
+        if entry_ids:
+            self.session.execute(
+                update(VectorOutboxMetadata)
+                .where(VectorOutboxMetadata.id.in_(list(entry_ids)))
+                .values(
+                    attempts=VectorOutboxMetadata.attempts + 1,
+                    dead_at=datetime.utcnow(),
+                    last_error=error[:MAX_ERROR_LENGTH],
+                )
+            )
+        self.session.commit()
+
+    def pending(self) -> int:
+        stmt = select(func.count()).select_from(VectorOutboxMetadata).where(VectorOutboxMetadata.dead_at.is_(None))
+        return self.session.exec(stmt).one()
+
+    def dead(self) -> int:
+        stmt = select(func.count()).select_from(VectorOutboxMetadata).where(VectorOutboxMetadata.dead_at.is_not(None))
+        return self.session.exec(stmt).one()
+
+    def requeue_dead(self) -> int:
+        """Мёртвые операции трека, у которого с тех пор появилась новая, устарели и удаляются."""
+
+        newer = aliased(VectorOutboxMetadata)
+        self.session.execute(
+            delete(VectorOutboxMetadata).where(
+                VectorOutboxMetadata.dead_at.is_not(None),
+                select(newer.id)
+                .where(newer.track_id == VectorOutboxMetadata.track_id, newer.dead_at.is_(None))
+                .exists(),
+            )
+        )
+        result = self.session.execute(
+            update(VectorOutboxMetadata)
+            .where(VectorOutboxMetadata.dead_at.is_not(None))
+            .values(dead_at=None, attempts=0, available_at=datetime.utcnow())
+        )
+        self.session.commit()
+        return result.rowcount
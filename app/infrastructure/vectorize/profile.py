@@ -0,0 +1,70 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.domain.ports.track import UserProfileBuilder
+
+
+class KMeansProfileBuilder(UserProfileBuilder):
+    """
+    Многоцентроидный профиль пользователя: сферический k-means (по косинусу)
+    над векторами его треков. Один центр на «режим» тренировок — например,
+    короткие будничные пробежки и длинные трейлы по выходным.
+    """
+
+    def __init__(
+        self, max_clusters: int = 3, min_tracks_per_cluster: int = 3, max_iterations: int = 25, seed: int = 0
+    ):
+        self.max_clusters = max_clusters
+        self.min_tracks_per_cluster = min_tracks_per_cluster
+        self.max_iterations = max_iterations
+        self.seed = seed
+
+    def build(self, vectors: Sequence[List[float]]) -> List[Tuple[List[float], float]]:
+        """Возвращает центры кластеров и их доли среди треков пользователя."""
+        if not vectors:
+            return []
+        x = np.asarray(vectors, dtype=np.float64)
+        x = x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+        k = max(1, min(self.max_clusters, len(x) // self.min_tracks_per_cluster))
+        if k == 1:
+            return [(x.mean(axis=0).tolist(), 1.0)]
+
+        rng = np.random.default_rng(self.seed)
+        centroids = self._init_plus_plus(x, k, rng)
+        for _ in range(self.max_iterations):
+            labels = np.argmax(x @ centroids.T, axis=1)
+            updated = np.stack([x[labels == j].mean(axis=0) if np.any(labels == j) else centroids[j] for j in range(k)])
+            updated /= np.maximum(np.linalg.norm(updated, axis=1, keepdims=True), 1e-12)
+            converged = np.allclose(updated, centroids)
+            centroids = updated
+            if converged:
+                break
+
+        labels = np.argmax(x @ centroids.T, axis=1)
+        weights = np.bincount(labels, minlength=k) / len(x)
+        return [(centroids[j].tolist(), float(weights[j])) for j in range(k) if weights[j] > 0]
+
+    @staticmethod
+    def _init_plus_plus(x: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+        """k-means++: следующий центр выбирается с вероятностью ∝ квадрату косинусного расстояния."""
+        centroids = [x[rng.integers(len(x))]]
+        for _ in range(1, k):
+            distances = 1.0 - np.max(x @ np.stack(centroids).T, axis=1)
+            weights = np.clip(distances, 0.0, None) ** 2
+            total = weights.sum()
+            index = rng.choice(len(x), p=weights / total) if total > 0 else rng.integers(len(x))
+            centroids.append(x[index])
+        return np.stack(centroids)
+
+
+def profile_builder_from_settings() -> Optional[KMeansProfileBuilder]:
+    """Построитель профиля по настройкам; None — классический средний вектор."""
+    if settings.PROFILE_MAX_CENTROIDS <= 1:
+        return None
+    return KMeansProfileBuilder(
+        max_clusters=settings.PROFILE_MAX_CENTROIDS,
+        min_tracks_per_cluster=settings.PROFILE_MIN_TRACKS_PER_CENTROID,
+    )
@@ -1,8 +1,13 @@
 import math
-from typing import Any, List, Mapping
+from typing import Any, List, Mapping, Sequence
+
+import numpy as np
 
 from app.domain.ports.track import TrackVectorizer
 
+ROUTE_CURVATURE_SCALARS = {"straight": 0.0, "mixed": 0.5, "curvy": 1.0}
+TERRAIN_CATEGORY_SCALARS = {"flat": 0.0, "rolling": 0.5, "hilly": 1.0}
+
 
 class HandcraftedTrackVectorizer(TrackVectorizer):
     """
@@ -50,8 +55,8 @@ class HandcraftedTrackVectorizer(TrackVectorizer):
 
         route_curvature_category = features.get("route_curvature_category")
         terrain_category = features.get("terrain_category")
-        route_curvature_scalar = {"straight": 0.0, "mixed": 0.5, "curvy": 1.0}.get(route_curvature_category, 0.5)
-        terrain_category_scalar = {"flat": 0.0, "rolling": 0.5, "hilly": 1.0}.get(terrain_category, 0.5)
+        route_curvature_scalar = ROUTE_CURVATURE_SCALARS.get(route_curvature_category, 0.5)
+        terrain_category_scalar = TERRAIN_CATEGORY_SCALARS.get(terrain_category, 0.5)
 
         return [
             normalized_total_distance_kilometers,
@@ -68,3 +73,44 @@ class HandcraftedTrackVectorizer(TrackVectorizer):
             route_curvature_scalar,
             terrain_category_scalar,
         ]
+
+    def vectorize_many(self, features_list: Sequence[Mapping[str, Any]]) -> List[List[float]]:
+        """
+        Пакетная векторизация: те же признаки, что и в vectorize, но колонками NumPy
+        вместо поэлементных вызовов math — для массовых пересчётов профилей.
+        """
+        if not features_list:
+            return []
+
+        def column(key: str) -> np.ndarray:
+            return np.array(
+                [np.nan if f.get(key) is None else float(f.get(key)) for f in features_list], dtype=np.float64
+            )
+
+        def normalize_to_unit_interval(values: np.ndarray, min_value: float, max_value: float) -> np.ndarray:
+            clipped = np.clip(values, min_value, max_value)
+            return np.nan_to_num((clipped - min_value) / (max_value - min_value + 1e-9), nan=0.0)
+
+        hour_angle_radians = 2.0 * np.pi * np.nan_to_num(column("start_hour_of_day_utc")) / 24.0
+        day_angle_radians = 2.0 * np.pi * np.nan_to_num(column("day_of_week_index")) / 7.0
+        start_latitude_radians = np.radians(np.nan_to_num(column("start_latitude_deg")))
+        start_longitude_radians = np.radians(np.nan_to_num(column("start_longitude_deg")))
+
+        matrix = np.column_stack(
+            [
+                normalize_to_unit_interval(column("total_distance_kilometers"), 0.0, 30.0),
+                normalize_to_unit_interval(column("elevation_gain_per_kilometer"), 0.0, 60.0),
+                normalize_to_unit_interval(column("path_sinuosity_ratio"), 1.0, 3.0),
+                np.sin(hour_angle_radians),
+                np.cos(hour_angle_radians),
+                np.sin(day_angle_radians),
+                np.cos(day_angle_radians),
+                np.sin(start_latitude_radians),
+                np.cos(start_latitude_radians),
+                np.sin(start_longitude_radians),
+                np.cos(start_longitude_radians),
+                [ROUTE_CURVATURE_SCALARS.get(f.get("route_curvature_category"), 0.5) for f in features_list],
+                [TERRAIN_CATEGORY_SCALARS.get(f.get("terrain_category"), 0.5) for f in features_list],
+            ]
+        )
+        return matrix.tolist()
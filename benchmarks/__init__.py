@@ -0,0 +1,4 @@
+"""Benchmarks: offline measurements of index/ingest/bot performance.
+
+Run from the repository root, e.g. ``python -m benchmarks.quantization``.
+"""
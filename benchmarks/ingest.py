@@ -0,0 +1,208 @@
+"""Micro and macro benchmarks for the ingest pipeline.
+
+Micro: ``parse_gpx``, ``extract_track_features_from_gpx``,
+``_elevation_gain_loss_gpx`` (on a pre-parsed track) and
+``HandcraftedTrackVectorizer.vectorize``. Macro: ``IngestTrackUseCase`` end to
+end with in-memory ports (see ``benchmarks.fakes``). Only GPX is parsed in this
+tree; ``--formats tcx fit`` times detection, limit checks and storage alone, and
+those cases are saved as ``IngestTrackUseCase.<fmt>.parse_skipped``.
+
+Inputs come from ``benchmarks.track_files``: 1k…1M points, single and multiple
+segments, missing elevation and GPS jitter, all deterministic. The upload limits
+(``TRACK_MAX_POINTS``, ``TRACK_MAX_FILE_BYTES``) are raised for the run so the
+largest sizes are measured instead of rejected.
+
+Every run is saved as ``<output-dir>/<git-sha>.json``. With ``--baseline`` (or
+``--compare-latest``) medians are compared against an earlier run and the
+process exits with code 1 when any case is slower than ``--threshold``.
+
+Usage:
+    python -m benchmarks.ingest [--sizes 1000 10000 100000] [--repeat 5] [--compare-latest]
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import gpxpy
+import numpy as np
+
+from app.application.track import IngestTrackCommand, IngestTrackUseCase
+from app.config import settings
+from app.domain.models.track import TrackFormat
+from app.infrastructure.parsers.gpx_parser import (
+    _elevation_gain_loss_gpx,
+    extract_track_features_from_gpx,
+    parse_gpx,
+)
+from app.infrastructure.parsers.parser_impl import TrackFeatureExtractorImpl, TrackParserImpl
+from app.infrastructure.repos.track_repo_sql import SimpleFormatDetector, UUIDGen
+from app.infrastructure.vectorize.track import HandcraftedTrackVectorizer
+from benchmarks.fakes import InMemoryTrackFeaturesRepository, InMemoryTrackMetadataRepository, InMemoryTrackStorage
+from benchmarks.track_files import TrackSpec, track_file
+
+VECTORIZE_CALLS = 1000
+# Форматы, которые TrackParserImpl разбирает; остальные проходят только детект, лимиты и хранилище
+PARSED_FORMATS = {TrackFormat.GPX.value}
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "repeat": repeat}
+
+
+def ingest_use_case() -> IngestTrackUseCase:
+    return IngestTrackUseCase(
+        storage=InMemoryTrackStorage(),
+        id_gen=UUIDGen(),
+        detector=SimpleFormatDetector(),
+        parser=TrackParserImpl(),
+        meta_repo=InMemoryTrackMetadataRepository(),
+        feature_extractor=TrackFeatureExtractorImpl(),
+        features_repo=InMemoryTrackFeaturesRepository(),
+    )
+
+
+def allow_track(points: int, size: int) -> None:
+    """Лимиты загрузок пользователей не должны отсекать большие размеры бенчмарка."""
+    settings.TRACK_MAX_POINTS = max(settings.TRACK_MAX_POINTS, points)
+    settings.TRACK_MAX_FILE_BYTES = max(settings.TRACK_MAX_FILE_BYTES, size)
+
+
+def specs(sizes: List[int]) -> List[TrackSpec]:
+    result = []
+    for points in sizes:
+        result.append(TrackSpec(points))
+        result.append(TrackSpec(points, segments=5, missing_elevation=0.3, jitter_meters=3.0, seed=1))
+    return result
+
+
+def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    vectorizer = HandcraftedTrackVectorizer()
+
+    def record(name: str, spec: TrackSpec, fn: Callable[[], Any], per_call: int = 1) -> None:
+        repeat = args.repeat if spec.points <= 100_000 else 1
+        stats = timed(fn, repeat)
+        if per_call > 1:
+            stats = {**stats, "median_s": stats["median_s"] / per_call, "min_s": stats["min_s"] / per_call}
+        else:
+            stats["points_per_s"] = spec.points / stats["median_s"]
+        results[f"{name}[{spec.label}]"] = stats
+        print(f"{name:<40} {spec.label:<36} {stats['median_s'] * 1000:>10.3f} ms")
+
+    for spec in specs(args.sizes):
+        gpx = track_file(spec, "gpx")
+        parsed = gpxpy.parse(gpx.decode("utf-8"))
+        features = extract_track_features_from_gpx(gpx)
+
+        record("parse_gpx", spec, lambda: parse_gpx(gpx))
+        record("extract_track_features_from_gpx", spec, lambda: extract_track_features_from_gpx(gpx))
+        record("_elevation_gain_loss_gpx", spec, lambda: _elevation_gain_loss_gpx(parsed))
+        record(
+            "vectorize",
+            spec,
+            lambda: [vectorizer.vectorize(features) for _ in range(VECTORIZE_CALLS)],
+            per_call=VECTORIZE_CALLS,
+        )
+
+        for fmt in args.formats:
+            blob = gpx if fmt == "gpx" else track_file(spec, fmt)
+            allow_track(spec.points, len(blob))
+            use_case = ingest_use_case()
+            command = IngestTrackCommand(user_id=1, filename=f"bench.{fmt}", blob=blob, source="bench")
+            name = f"IngestTrackUseCase.{fmt}" if fmt in PARSED_FORMATS else f"IngestTrackUseCase.{fmt}.parse_skipped"
+            record(name, spec, lambda: use_case.execute(command))
+    return results
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "gpxpy": getattr(gpxpy, "__version__", "unknown"),
+        "numpy": np.__version__,
+    }
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """Список регрессий: медиана выросла больше чем на threshold относительно базового прогона."""
+    regressions = []
+    print(f"\n{'case':<70} {'baseline ms':>12} {'current ms':>11} {'ratio':>7}")
+    for name, stats in current.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = stats["median_s"] / base["median_s"]
+        flag = "  REGRESSION" if ratio > 1.0 + threshold else ""
+        print(f"{name:<70} {base['median_s'] * 1000:>12.3f} {stats['median_s'] * 1000:>11.3f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def latest_result(output_dir: str, exclude: str) -> Optional[str]:
+    candidates = [p for p in glob.glob(os.path.join(output_dir, "*.json")) if os.path.abspath(p) != exclude]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ingest")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=["gpx"],
+        choices=["gpx", "tcx", "fit"],
+        help="tcx/fit не разбираются: их замер — без парсинга (parse_skipped)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output-dir", default=os.path.join("benchmarks", "results"))
+    parser.add_argument("--baseline", default=None, help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--compare-latest", action="store_true", help="сравнить с самым свежим сохранённым прогоном")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление медианы (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    revision = git_revision()
+    output = os.path.abspath(os.path.join(args.output_dir, f"{revision}.json"))
+    baseline_path = args.baseline or (latest_result(args.output_dir, output) if args.compare_latest else None)
+
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"revision": revision, "environment": environment(), "results": results}, f, indent=2)
+    print(f"\nsaved: {output}")
+
+    if baseline:
+        print(f"baseline: {baseline_path} ({baseline.get('revision')})")
+        if compare(results, baseline["results"], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
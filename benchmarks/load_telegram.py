@@ -0,0 +1,348 @@
+"""End-to-end load test: synthetic Telegram updates replayed against the bot handlers.
+
+``handle_document`` and ``handle_recommend`` from ``app.adapters.telegram_bot``
+are called directly with fake ``Update``/``Document``/bot objects, so the whole
+handler path runs (sessions, use cases, repositories, vector index) without
+Telegram. Local stand-ins:
+
+- database: SQLite in a temporary directory (default) or ``--database-url``,
+  e.g. the Postgres from docker-compose; tables are created with ``create_all``;
+- vector index: Qdrant client in ``:memory:`` mode, fed by the vector outbox
+  drainer thread as in the bot;
+- file download: an in-process fake with optional ``--download-latency-ms``;
+- background tasks (uploads queued by admission control) are awaited at the end
+  of each level, so ``handle_document`` latency of a queued upload covers only
+  the "queued" reply while ``ingest``/``features+index`` cover the work itself.
+
+Concurrency is ramped through ``--levels``; every level issues ``--requests``
+updates with ``--upload-share`` of them being uploads, plus ``--burst`` uploads
+from a single user at the start of the level. For each level the
+harness reports throughput (uploads/min, /recommend per second) and
+p50/p95/p99 latency per handler and per stage (download, ingest, features,
+recommend, reply).
+
+Usage:
+    python -m benchmarks.load_telegram --levels 1 2 4 8 16 --requests 200 [--json out.json]
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.track_files import TrackSpec, synthetic_segments, to_gpx
+
+CITIES = [(55.75, 37.62), (59.94, 30.31), (56.84, 60.61)]
+
+
+class StageTimings:
+    """Длительности по стадиям; стадия — обёрнутая функция или метод."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def wrap_sync(self, stage: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+
+        return wrapper
+
+    def wrap_async(self, stage: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+
+        return wrapper
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for stage, values in sorted(self.samples.items()):
+            ms = np.asarray(values) * 1000.0
+            result[stage] = {
+                "count": len(values),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+            }
+        return result
+
+
+@dataclass
+class FakeUser:
+    id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = "Bench"
+    last_name: Optional[str] = None
+    is_bot: bool = False
+    language_code: Optional[str] = "ru"
+
+
+@dataclass
+class FakeDocument:
+    file_id: str
+    file_name: str
+    file_size: Optional[int] = None
+
+
+@dataclass
+class FakeMessage:
+    document: Optional[FakeDocument] = None
+    media_group_id: Optional[str] = None
+    replies: List[str] = field(default_factory=list)
+
+    async def reply_text(self, text: str, **kwargs) -> None:
+        self.replies.append(text)
+
+
+@dataclass
+class FakeUpdate:
+    effective_user: FakeUser
+    message: FakeMessage
+
+
+class FakeFile:
+    def __init__(self, blob: bytes, latency: float):
+        self.blob = blob
+        self.latency = latency
+
+    async def download_as_bytearray(self) -> bytearray:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return bytearray(self.blob)
+
+    async def download_to_drive(self, custom_path: str) -> Path:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = Path(custom_path)
+        path.write_bytes(self.blob)
+        return path
+
+
+class FakeBot:
+    """Подменяет Telegram Bot API: файлы отдаются из памяти по file_id."""
+
+    def __init__(self, files: Dict[str, bytes], latency: float):
+        self.files = files
+        self.latency = latency
+
+    async def get_file(self, file_id: str) -> FakeFile:
+        return FakeFile(self.files[file_id], self.latency)
+
+
+class FakeApplication:
+    """Фоновые задачи обработчиков (очередь допуска) — дожидаемся их в конце уровня."""
+
+    def __init__(self):
+        self.tasks: List[asyncio.Task] = []
+
+    def create_task(self, coroutine, update=None) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.append(task)
+        return task
+
+    async def drain(self) -> None:
+        while self.tasks:
+            tasks, self.tasks = self.tasks, []
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@dataclass
+class FakeContext:
+    bot: FakeBot
+    application: FakeApplication = field(default_factory=FakeApplication)
+
+
+def build_files(count: int, points: int, seed: int) -> Dict[str, bytes]:
+    files = {}
+    for i in range(count):
+        lat, lon = CITIES[i % len(CITIES)]
+        spec = TrackSpec(points=points, segments=1 + i % 3, jitter_meters=2.0, seed=seed + i)
+        files[f"file-{i}"] = to_gpx(synthetic_segments(spec, lat=lat + (i % 7) * 0.01, lon=lon))
+    return files
+
+
+def configure_environment(args: argparse.Namespace) -> str:
+    """Настраивает окружение до импорта приложения: settings читаются при импорте."""
+    workdir = tempfile.mkdtemp(prefix="run366-load-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["RECOMMEND_SEARCH_MODE"] = args.recommend_mode
+    # Исходные файлы пишутся в RAW_STORAGE_DIR (./data/uploads) — уводим загрузки во временный каталог
+    os.chdir(workdir)
+    return workdir
+
+
+async def run_level(
+    handlers: Dict[str, Callable],
+    timings: StageTimings,
+    context: FakeContext,
+    file_ids: List[str],
+    users: List[FakeUser],
+    concurrency: int,
+    args: argparse.Namespace,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    counts: Dict[str, int] = defaultdict(int)
+    errors: Dict[str, int] = defaultdict(int)
+
+    async def one(kind: str, user: FakeUser, file_id: Optional[str]) -> None:
+        async with semaphore:
+            document = (
+                FakeDocument(file_id=file_id, file_name=f"{file_id}.gpx", file_size=len(context.bot.files[file_id]))
+                if file_id
+                else None
+            )
+            update = FakeUpdate(effective_user=user, message=FakeMessage(document=document))
+            try:
+                await handlers[kind](update, context)
+                counts[kind] += 1
+            except Exception as e:
+                errors[f"{kind}: {type(e).__name__}"] += 1
+
+    jobs = []
+    # Пачка загрузок одного пользователя в начале уровня: проверка, что /recommend остальных не голодает
+    for i in range(args.burst):
+        jobs.append(one("handle_document", users[0], file_ids[i % len(file_ids)]))
+    for _ in range(args.requests):
+        user = rng.choice(users)
+        if rng.random() < args.upload_share:
+            jobs.append(one("handle_document", user, rng.choice(file_ids)))
+        else:
+            jobs.append(one("handle_recommend", user, None))
+
+    started = time.perf_counter()
+    await asyncio.gather(*jobs)
+    await context.application.drain()
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "uploads_per_min": counts["handle_document"] / elapsed * 60.0,
+        "recommends_per_s": counts["handle_recommend"] / elapsed,
+        "errors": dict(errors),
+        "stages": timings.summary(),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    configure_environment(args)
+
+    from qdrant_client import QdrantClient
+    from sqlmodel import SQLModel
+
+    from app.adapters import telegram_bot
+    from app.adapters.container import container
+    from app.adapters.outbox_drainer import start_background_drainer
+    from app.application import track as track_use_cases
+    from app.infrastructure.db import postgres, qdrant
+    from app.infrastructure.db.models import (  # noqa: F401 — регистрация таблиц в metadata
+        best_effort_metadata,
+        ingest_job_metadata,
+        recommendation_metadata,
+        stats_metadata,
+        track_metadata,
+        training_metadata,
+        user_metadata,
+        vector_outbox_metadata,
+    )
+
+    container.qdrant_client = QdrantClient(":memory:")
+    qdrant.init_qdrant(container.qdrant_client)
+    SQLModel.metadata.create_all(postgres.get_engine())
+    # Как в боте (post_init): точки из vector_outbox уходят в индекс фоновым потоком
+    start_background_drainer()
+
+    timings = StageTimings()
+    handlers = {
+        "handle_document": timings.wrap_async("handle_document", telegram_bot.handle_document),
+        "handle_recommend": timings.wrap_async("handle_recommend", telegram_bot.handle_recommend),
+    }
+    FakeFile.download_as_bytearray = timings.wrap_async("download", FakeFile.download_as_bytearray)
+    FakeFile.download_to_drive = timings.wrap_async("download", FakeFile.download_to_drive)
+    FakeMessage.reply_text = timings.wrap_async("reply", FakeMessage.reply_text)
+    for cls, method, stage in (
+        (track_use_cases.IngestTrackUseCase, "execute", "ingest"),
+        (track_use_cases.ComputeAndIndexTrackFeaturesUseCase, "execute", "features+index"),
+        (track_use_cases.RecommendRoutesUseCase, "execute", "recommend"),
+    ):
+        setattr(cls, method, timings.wrap_sync(stage, getattr(cls, method)))
+
+    rng = random.Random(args.seed)
+    files = build_files(args.files, args.points, args.seed)
+    context = FakeContext(bot=FakeBot(files, args.download_latency_ms / 1000.0))
+    users = [FakeUser(id=100_000 + i, username=f"bench{i}") for i in range(args.users)]
+    file_ids = list(files)
+
+    # Прогрев: у каждого пользователя есть треки, иначе /recommend отвечает пустым профилем
+    for i, user in enumerate(users):
+        for j in range(args.warmup_tracks):
+            document = FakeDocument(file_id=file_ids[(i + j) % len(file_ids)], file_name="warmup.gpx")
+            await handlers["handle_document"](FakeUpdate(user, FakeMessage(document=document)), context)
+
+    levels = []
+    for concurrency in args.levels:
+        timings.samples.clear()
+        level = await run_level(handlers, timings, context, file_ids, users, concurrency, args, rng)
+        levels.append(level)
+        print_level(level)
+    return levels
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    print(
+        f"\nconcurrency={level['concurrency']}: {level['uploads_per_min']:.1f} uploads/min, "
+        f"{level['recommends_per_s']:.2f} recommends/s, errors={level['errors'] or 0}"
+    )
+    print(f"  {'stage':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, s in level["stages"].items():
+        print(f"  {stage:<18} {s['count']:>6} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_telegram")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=100, help="обновлений на каждый уровень")
+    parser.add_argument("--upload-share", type=float, default=0.2)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--warmup-tracks", type=int, default=3)
+    parser.add_argument("--files", type=int, default=30)
+    parser.add_argument("--points", type=int, default=3000, help="точек в каждом синтетическом GPX")
+    parser.add_argument("--burst", type=int, default=0, help="загрузок одного пользователя в начале уровня")
+    parser.add_argument("--download-latency-ms", type=float, default=0.0)
+    parser.add_argument("--database-url", default=None, help="по умолчанию SQLite во временном каталоге")
+    parser.add_argument("--recommend-mode", default="vector", choices=["vector", "hybrid"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args(argv)
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    levels = asyncio.run(run(args))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
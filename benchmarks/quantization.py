@@ -0,0 +1,183 @@
+"""Memory and recall of Qdrant quantization modes for the track collection.
+
+For every mode (float32 / int8 scalar / product) the benchmark reports the
+estimated RAM per million points and recall@k against exact search:
+
+- memory follows Qdrant's storage layout: original float32 vectors (in RAM or
+  on disk), the quantized copy (``always_ram``) and the HNSW level-0 graph;
+- recall is measured offline by reproducing the quantization in NumPy (the
+  embedded ``:memory:`` client ignores quantization), with optional rescoring of
+  ``top_k * oversampling`` candidates by the original vectors;
+- ``--qdrant-url`` additionally loads the points into a real server with each
+  config and compares its answers to ``exact=True`` search.
+
+Usage:
+    python -m benchmarks.quantization [--points N] [--queries Q] [--top-k K] [--json out.json]
+"""
+
+import argparse
+import json
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import exact_top_k, recall_at_k, synthetic_vectors
+
+MILLION = 1_000_000
+PRODUCT_FLOATS_PER_BYTE = {"x4": 1, "x8": 2, "x16": 4, "x32": 8, "x64": 16}
+
+
+def estimate_memory_per_million(
+    dim: int, quantization: str, on_disk: bool, m: int = 16, product_compression: str = "x16"
+) -> Dict[str, float]:
+    """Оценка занимаемой памяти на 1M точек, MiB."""
+    original = MILLION * dim * 4
+    if quantization == "scalar":
+        quantized = MILLION * dim
+    elif quantization == "product":
+        quantized = MILLION * math.ceil(dim / PRODUCT_FLOATS_PER_BYTE[product_compression])
+    else:
+        quantized = 0
+    graph = MILLION * m * 2 * 4  # нулевой уровень HNSW: до 2m связей по 4 байта
+    ram = graph + quantized + (0 if on_disk else original)
+    mib = 1024.0 * 1024.0
+    return {"ram_mib": ram / mib, "disk_mib": (original + quantized) / mib, "graph_mib": graph / mib}
+
+
+def scalar_quantize(corpus: np.ndarray, quantile: float = 0.99) -> np.ndarray:
+    """int8 как в Qdrant: обрезка по квантилю и равномерная сетка на [-q, q]; возвращает деквантованные значения."""
+    bound = float(np.quantile(np.abs(corpus), quantile)) or 1.0
+    codes = np.round(np.clip(corpus, -bound, bound) / bound * 127.0).astype(np.int8)
+    return codes.astype(np.float32) * (bound / 127.0)
+
+
+def product_quantize(corpus: np.ndarray, floats_per_code: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """PQ: 256 центроидов на каждый подвектор из floats_per_code чисел; возвращает реконструкцию."""
+    rng = np.random.default_rng(seed)
+    n, dim = corpus.shape
+    padded = np.pad(corpus, ((0, 0), (0, -dim % floats_per_code)))
+    reconstructed = np.empty_like(padded)
+    for start in range(0, padded.shape[1], floats_per_code):
+        chunk = padded[:, start : start + floats_per_code]
+        centroids = chunk[rng.choice(n, size=min(256, n), replace=False)]
+        for _ in range(iterations):
+            distances = (chunk**2).sum(1)[:, None] - 2 * chunk @ centroids.T + (centroids**2).sum(1)[None, :]
+            labels = np.argmin(distances, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, chunk)
+            counts = np.bincount(labels, minlength=len(centroids))[:, None]
+            centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+        reconstructed[:, start : start + floats_per_code] = centroids[labels]
+    return reconstructed[:, :dim]
+
+
+def quantized_search(
+    corpus: np.ndarray,
+    approximate: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    rescore: bool,
+    oversampling: float,
+) -> np.ndarray:
+    """Поиск по квантованным векторам; при rescore — пересчёт кандидатов по оригиналам."""
+    candidates_k = max(top_k, int(math.ceil(top_k * oversampling))) if rescore else top_k
+    candidates = exact_top_k(approximate, queries, candidates_k)
+    if not rescore:
+        return candidates
+    exact_scores = np.einsum("qd,qcd->qc", queries, corpus[candidates])
+    order = np.argsort(-exact_scores, axis=1)[:, :top_k]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def qdrant_recall(
+    url: str, corpus: np.ndarray, queries: np.ndarray, top_k: int, quantization: str, args: argparse.Namespace
+) -> Optional[float]:
+    """recall@k реального сервера Qdrant с заданным квантованием относительно exact=True."""
+    from qdrant_client import QdrantClient, models
+
+    from app.config import settings
+    from app.infrastructure.db import qdrant
+
+    settings.QDRANT_QUANTIZATION = quantization
+    settings.QDRANT_SEARCH_OVERSAMPLING = args.oversampling
+    client = QdrantClient(location=url)
+    name = f"bench_quantization_{quantization}"
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(
+            size=corpus.shape[1], distance=models.Distance.COSINE, hnsw_config=qdrant.hnsw_config(), on_disk=True
+        ),
+        quantization_config=qdrant.quantization_config(),
+    )
+    client.upload_collection(name, vectors=corpus, ids=range(len(corpus)), batch_size=1024, wait=True)
+    found, truth = [], []
+    for q in queries:
+        approx = client.query_points(name, query=q.tolist(), limit=top_k, search_params=qdrant.search_params())
+        exact = client.query_points(name, query=q.tolist(), limit=top_k, search_params=models.SearchParams(exact=True))
+        found.append([p.id for p in approx.points])
+        truth.append([p.id for p in exact.points])
+    client.delete_collection(name)
+    return recall_at_k(np.asarray(found), np.asarray(truth))
+
+
+def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    corpus = synthetic_vectors(args.points, seed=args.seed)
+    queries = synthetic_vectors(args.queries, seed=args.seed + 1)
+    truth = exact_top_k(corpus, queries, args.top_k)
+    dim = corpus.shape[1]
+
+    approximations = {
+        "none": corpus,
+        "scalar": scalar_quantize(corpus),
+        "product": product_quantize(corpus, PRODUCT_FLOATS_PER_BYTE[args.product_compression], seed=args.seed),
+    }
+    rows = []
+    for quantization, approximate in approximations.items():
+        for on_disk in (False, True) if quantization != "none" else (False,):
+            memory = estimate_memory_per_million(dim, quantization, on_disk, args.hnsw_m, args.product_compression)
+            row = {"quantization": quantization, "on_disk": on_disk, **memory}
+            if quantization == "none":
+                row["recall"] = row["recall_rescored"] = 1.0
+            else:
+                plain = quantized_search(corpus, approximate, queries, args.top_k, False, 1.0)
+                rescored = quantized_search(corpus, approximate, queries, args.top_k, True, args.oversampling)
+                row["recall"] = recall_at_k(plain, truth)
+                row["recall_rescored"] = recall_at_k(rescored, truth)
+            if args.qdrant_url and not on_disk:
+                row["recall_qdrant"] = qdrant_recall(args.qdrant_url, corpus, queries, args.top_k, quantization, args)
+            rows.append(row)
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.quantization")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--product-compression", default="x16", choices=sorted(PRODUCT_FLOATS_PER_BYTE))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--qdrant-url", default=None, help="также измерить recall на живом сервере Qdrant")
+    parser.add_argument("--json", default=None, help="сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args)
+    print(
+        f"{'quantization':<12} {'on_disk':<8} {'RAM/1M, MiB':>12} {'disk/1M, MiB':>13} "
+        f"{'recall@' + str(args.top_k):>10} {'rescored':>9}"
+    )
+    for r in rows:
+        print(
+            f"{r['quantization']:<12} {str(r['on_disk']):<8} {r['ram_mib']:>12.1f} {r['disk_mib']:>13.1f} "
+            f"{r['recall']:>10.3f} {r['recall_rescored']:>9.3f}"
+            + (f"  qdrant={r['recall_qdrant']:.3f}" if "recall_qdrant" in r else "")
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
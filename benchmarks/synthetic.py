@@ -0,0 +1,63 @@
+"""Synthetic track features and vectors for benchmarks.
+
+Tracks are clustered around a handful of "home" cities so that the vector
+distribution resembles real users rather than uniform noise.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.infrastructure.vectorize.track import (
+    ROUTE_CURVATURE_SCALARS,
+    TERRAIN_CATEGORY_SCALARS,
+    HandcraftedTrackVectorizer,
+)
+
+CITIES = [(55.75, 37.62), (59.94, 30.31), (56.84, 60.61), (43.60, 39.73), (54.99, 73.37), (45.04, 38.98)]
+
+
+def synthetic_features(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    cities = rng.integers(len(CITIES), size=n)
+    curvatures = list(ROUTE_CURVATURE_SCALARS)
+    terrains = list(TERRAIN_CATEGORY_SCALARS)
+    features = []
+    for i in range(n):
+        lat, lon = CITIES[cities[i]]
+        distance = float(np.clip(rng.lognormal(2.1, 0.5), 1.0, 60.0))
+        features.append(
+            {
+                "total_distance_kilometers": distance,
+                "elevation_gain_per_kilometer": float(abs(rng.normal(12.0, 10.0))),
+                "path_sinuosity_ratio": float(1.0 + abs(rng.normal(0.3, 0.3))),
+                "start_hour_of_day_utc": int(rng.choice([5, 6, 7, 8, 17, 18, 19]) + rng.integers(-1, 2)) % 24,
+                "day_of_week_index": int(rng.integers(7)),
+                "start_latitude_deg": lat + float(rng.normal(0.0, 0.05)),
+                "start_longitude_deg": lon + float(rng.normal(0.0, 0.08)),
+                "route_curvature_category": curvatures[rng.integers(len(curvatures))],
+                "terrain_category": terrains[rng.integers(len(terrains))],
+            }
+        )
+    return features
+
+
+def synthetic_vectors(n: int, seed: int = 0) -> np.ndarray:
+    """L2-нормированные векторы (как их видит косинусная метрика Qdrant)."""
+    vectors = np.asarray(HandcraftedTrackVectorizer().vectorize_many(synthetic_features(n, seed)), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Точный top-k по скалярному произведению — эталон для recall@k."""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, kth=min(k, corpus.shape[0] - 1), axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f[:k]) & set(t)) for f, t in zip(found, truth))
+    return hits / float(truth.size)
@@ -0,0 +1,152 @@
+"""Deterministic synthetic GPX/TCX/FIT files for ingest benchmarks.
+
+A track is a random walk at running pace sampled every second, split into
+segments, with optional GPS jitter and gaps in elevation. The same seed always
+yields byte-identical files, so timings are comparable across commits.
+"""
+
+import math
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+Point = Tuple[float, float, Optional[float], datetime]
+
+START_TIME = datetime(2025, 6, 1, 5, 30, tzinfo=timezone.utc)
+METERS_PER_DEGREE = 111_320.0
+
+
+@dataclass(frozen=True)
+class TrackSpec:
+    points: int
+    segments: int = 1
+    missing_elevation: float = 0.0
+    jitter_meters: float = 0.0
+    seed: int = 0
+
+    @property
+    def label(self) -> str:
+        return f"{self.points}pts-{self.segments}seg-ele{self.missing_elevation:g}-jit{self.jitter_meters:g}"
+
+
+def synthetic_segments(spec: TrackSpec, lat: float = 55.75, lon: float = 37.62) -> List[List[Point]]:
+    rng = np.random.default_rng(spec.seed)
+    n = spec.points
+    heading = np.cumsum(rng.normal(0.0, 0.08, n))
+    step = np.clip(rng.normal(3.0, 0.4, n), 0.5, None)
+    north = np.cumsum(step * np.cos(heading))
+    east = np.cumsum(step * np.sin(heading))
+    if spec.jitter_meters:
+        north += rng.normal(0.0, spec.jitter_meters, n)
+        east += rng.normal(0.0, spec.jitter_meters, n)
+    lats = lat + north / METERS_PER_DEGREE
+    lons = lon + east / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+    elevations = 150.0 + 25.0 * np.sin(np.arange(n) / 400.0) + rng.normal(0.0, 0.3, n)
+    missing = rng.random(n) < spec.missing_elevation
+
+    points = [
+        (
+            float(lats[i]),
+            float(lons[i]),
+            None if missing[i] else float(elevations[i]),
+            START_TIME + timedelta(seconds=i),
+        )
+        for i in range(n)
+    ]
+    bounds = np.linspace(0, n, spec.segments + 1, dtype=int)
+    return [points[bounds[i] : bounds[i + 1]] for i in range(spec.segments)]
+
+
+def _iso(t: datetime) -> str:
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def to_gpx(segments: List[List[Point]]) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="run366-bench" xmlns="http://www.topografix.com/GPX/1/1">\n'
+        "<trk><name>bench</name>\n"
+    ]
+    for segment in segments:
+        parts.append("<trkseg>\n")
+        for lat, lon, ele, t in segment:
+            ele_tag = f"<ele>{ele:.1f}</ele>" if ele is not None else ""
+            parts.append(f'<trkpt lat="{lat:.7f}" lon="{lon:.7f}">{ele_tag}<time>{_iso(t)}</time></trkpt>\n')
+        parts.append("</trkseg>\n")
+    parts.append("</trk>\n</gpx>\n")
+    return "".join(parts).encode("utf-8")
+
+
+def to_tcx(segments: List[List[Point]]) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">\n'
+        f'<Activities><Activity Sport="Running"><Id>{_iso(START_TIME)}</Id>\n'
+    ]
+    for segment in segments:
+        if not segment:
+            continue
+        parts.append(f'<Lap StartTime="{_iso(segment[0][3])}"><Track>\n')
+        for lat, lon, ele, t in segment:
+            ele_tag = f"<AltitudeMeters>{ele:.1f}</AltitudeMeters>" if ele is not None else ""
+            parts.append(
+                f"<Trackpoint><Time>{_iso(t)}</Time><Position><LatitudeDegrees>{lat:.7f}</LatitudeDegrees>"
+                f"<LongitudeDegrees>{lon:.7f}</LongitudeDegrees></Position>{ele_tag}</Trackpoint>\n"
+            )
+        parts.append("</Track></Lap>\n")
+    parts.append("</Activity></Activities>\n</TrainingCenterDatabase>\n")
+    return "".join(parts).encode("utf-8")
+
+
+FIT_EPOCH = datetime(1989, 12, 31, tzinfo=timezone.utc)
+_FIT_CRC_TABLE = (
+    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+)  # fmt: skip
+
+
+def _fit_crc(data: bytes, crc: int = 0) -> int:
+    for byte in data:
+        tmp = _FIT_CRC_TABLE[crc & 0xF]
+        crc = ((crc >> 4) & 0x0FFF) ^ tmp ^ _FIT_CRC_TABLE[byte & 0xF]
+        tmp = _FIT_CRC_TABLE[crc & 0xF]
+        crc = ((crc >> 4) & 0x0FFF) ^ tmp ^ _FIT_CRC_TABLE[(byte >> 4) & 0xF]
+    return crc
+
+
+def _fit_definition(local: int, global_num: int, fields: List[Tuple[int, int, int]]) -> bytes:
+    header = struct.pack("<BBBHB", 0x40 | local, 0, 0, global_num, len(fields))
+    return header + b"".join(struct.pack("<BBB", *f) for f in fields)
+
+
+def _fit_time(t: datetime) -> int:
+    return int((t - FIT_EPOCH).total_seconds())
+
+
+def to_fit(segments: List[List[Point]]) -> bytes:
+    """Минимальный корректный FIT: file_id + record на каждую точку (широта/долгота в semicircles)."""
+    semicircles = 2**31 / 180.0
+
+    body = [
+        _fit_definition(0, 0, [(0, 1, 0x00), (1, 2, 0x84), (4, 4, 0x86)]),
+        struct.pack("<BBHI", 0, 4, 255, _fit_time(START_TIME)),
+        _fit_definition(1, 20, [(253, 4, 0x86), (0, 4, 0x85), (1, 4, 0x85), (2, 2, 0x84)]),
+    ]
+    record = struct.Struct("<BIiiH")
+    for segment in segments:
+        for lat, lon, ele, t in segment:
+            altitude = 0xFFFF if ele is None else int(round((ele + 500.0) * 5.0))
+            body.append(record.pack(1, _fit_time(t), int(lat * semicircles), int(lon * semicircles), altitude))
+    data = b"".join(body)
+
+    header = struct.pack("<BBHI4s", 14, 0x20, 2132, len(data), b".FIT")
+    header += struct.pack("<H", _fit_crc(header))
+    return header + data + struct.pack("<H", _fit_crc(header + data))
+
+
+def track_file(spec: TrackSpec, fmt: str) -> bytes:
+    segments = synthetic_segments(spec)
+    return {"gpx": to_gpx, "tcx": to_tcx, "fit": to_fit}[fmt](segments)
@@ -0,0 +1,204 @@
+"""Recall/latency benchmark for TrackVectorIndex backends.
+
+The corpus is built from track features (synthetic or loaded from a JSON/JSONL
+dump of ``track_features`` rows) through ``HandcraftedTrackVectorizer``; exact
+top-k from NumPy is the ground truth. Every backend receives the same queries:
+
+- ``memory``        — embedded ``TrackVectorIndexInMemory``;
+- ``qdrant-local``  — Qdrant client in ``:memory:`` mode;
+- ``qdrant``        — live server (``--qdrant-url``), one collection per
+  HNSW ``m`` × ``ef_construct`` × quantization, queried with each ``ef``.
+
+Reported per configuration: recall@k, p50/p95/p99 single-query latency, QPS for
+single and batched queries. Results are printed as a table and optionally saved
+as JSON.
+
+Usage:
+    python -m benchmarks.vector_search --points 50000 --queries 500 \\
+        --qdrant-url http://localhost:6333 --hnsw-m 8 16 32 --ef 32 64 128
+"""
+
+import argparse
+import json
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+from app.infrastructure.repos.track_repo_memory import TrackVectorIndexInMemory
+from app.infrastructure.repos.track_repo_qdrant import TrackVectorIndexQdrant
+from app.infrastructure.vectorize.track import HandcraftedTrackVectorizer
+from benchmarks.synthetic import exact_top_k, recall_at_k, synthetic_features, synthetic_vectors
+
+
+def load_features(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def corpus_and_queries(args: argparse.Namespace) -> Tuple[np.ndarray, np.ndarray]:
+    if not args.features:
+        return synthetic_vectors(args.points, seed=args.seed), synthetic_vectors(args.queries, seed=args.seed + 1)
+    vectorizer = HandcraftedTrackVectorizer()
+    corpus = np.asarray(vectorizer.vectorize_many(load_features(args.features)), dtype=np.float32)
+    corpus /= np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+    queries = np.asarray(vectorizer.vectorize_many(synthetic_features(args.queries, args.seed + 1)), dtype=np.float32)
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+    return corpus, queries
+
+
+def point_ids(n: int) -> List[str]:
+    return [str(uuid.uuid5(uuid.NAMESPACE_URL, f"bench-track-{i}")) for i in range(n)]
+
+
+def measure(index, queries: np.ndarray, ids: List[str], top_k: int, batch_size: int) -> Dict[str, float]:
+    position = {track_id: i for i, track_id in enumerate(ids)}
+    latencies, found = [], []
+    for q in queries:
+        started = time.perf_counter()
+        hits = index.search(q.tolist(), top_k=top_k)
+        latencies.append(time.perf_counter() - started)
+        found.append([position[str(h["track_id"])] for h in hits] + [-1] * (top_k - len(hits)))
+
+    started = time.perf_counter()
+    for start in range(0, len(queries), batch_size):
+        index.search_batch([q.tolist() for q in queries[start : start + batch_size]], top_k=top_k)
+    batch_elapsed = time.perf_counter() - started
+
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "found": np.asarray(found),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "qps": len(queries) / float(np.sum(latencies)),
+        "batch_qps": len(queries) / batch_elapsed,
+    }
+
+
+def qdrant_configs(args: argparse.Namespace) -> Iterator[Tuple[Dict[str, Any], Optional[models.QuantizationConfig]]]:
+    for quantization in args.quantization:
+        if quantization == "scalar":
+            config = models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        elif quantization == "product":
+            config = models.ProductQuantization(
+                product=models.ProductQuantizationConfig(compression=models.CompressionRatio.X16, always_ram=True)
+            )
+        else:
+            config = None
+        for m in args.hnsw_m:
+            for ef_construct in args.ef_construct:
+                yield {"m": m, "ef_construct": ef_construct, "quantization": quantization}, config
+
+
+def build_qdrant(
+    client: QdrantClient,
+    name: str,
+    corpus: np.ndarray,
+    ids: List[str],
+    hnsw: Dict[str, Any],
+    quantization: Optional[models.QuantizationConfig],
+) -> None:
+    client.recreate_collection(
+        collection_name=name,
+        vectors_config=models.VectorParams(
+            size=corpus.shape[1],
+            distance=models.Distance.COSINE,
+            hnsw_config=models.HnswConfigDiff(m=hnsw["m"], ef_construct=hnsw["ef_construct"], full_scan_threshold=10),
+        ),
+        quantization_config=quantization,
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1000),
+    )
+    client.upload_collection(name, vectors=corpus, ids=ids, batch_size=1024, wait=True)
+    # Дожидаемся построения HNSW, иначе меряем полный перебор
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+
+def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    corpus, queries = corpus_and_queries(args)
+    ids = point_ids(len(corpus))
+    truth = exact_top_k(corpus, queries, args.top_k)
+    rows = []
+
+    def record(backend: str, config: Dict[str, Any], index) -> None:
+        result = measure(index, queries, ids, args.top_k, args.batch_size)
+        found = result.pop("found")
+        rows.append({"backend": backend, **config, "recall": recall_at_k(found, truth), **result})
+
+    if "memory" in args.backends:
+        index = TrackVectorIndexInMemory(corpus.shape[1])
+        index.upsert_many([(track_id, vector, {}) for track_id, vector in zip(ids, corpus)])
+        record("memory", {}, index)
+
+    if "qdrant-local" in args.backends:
+        client = QdrantClient(":memory:")
+        build_qdrant(client, "bench_vector_search", corpus, ids, {"m": 16, "ef_construct": 100}, None)
+        record("qdrant-local", {}, TrackVectorIndexQdrant(collection_name="bench_vector_search", client=client))
+
+    if "qdrant" in args.backends and args.qdrant_url:
+        client = QdrantClient(location=args.qdrant_url)
+        for hnsw, quantization in qdrant_configs(args):
+            name = "bench_vector_search"
+            build_qdrant(client, name, corpus, ids, hnsw, quantization)
+            for ef in args.ef:
+                params = models.SearchParams(
+                    hnsw_ef=ef,
+                    quantization=models.QuantizationSearchParams(rescore=True, oversampling=args.oversampling)
+                    if quantization
+                    else None,
+                )
+                index = TrackVectorIndexQdrant(collection_name=name, client=client, search_params=params)
+                record("qdrant", {**hnsw, "ef": ef}, index)
+            client.delete_collection(name)
+    return rows
+
+
+def print_table(rows: List[Dict[str, Any]], top_k: int) -> None:
+    header = (
+        f"{'backend':<13} {'m':>3} {'ef_c':>5} {'ef':>4} {'quant':<8} {'recall@' + str(top_k):>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'QPS':>8} {'batch QPS':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['backend']:<13} {r.get('m', ''):>3} {r.get('ef_construct', ''):>5} {r.get('ef', ''):>4} "
+            f"{r.get('quantization', ''):<8} {r['recall']:>9.3f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+            f"{r['p99_ms']:>8.2f} {r['qps']:>8.0f} {r['batch_qps']:>10.0f}"
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.vector_search")
+    parser.add_argument("--points", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--features", default=None, help="JSON/JSONL с признаками треков вместо синтетики")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", nargs="+", default=["memory", "qdrant-local", "qdrant"])
+    parser.add_argument("--qdrant-url", default=None)
+    parser.add_argument("--hnsw-m", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construct", type=int, nargs="+", default=[100])
+    parser.add_argument("--ef", type=int, nargs="+", default=[64])
+    parser.add_argument("--quantization", nargs="+", default=["none"], choices=["none", "scalar", "product"])
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--json", default=None, help="сохранить результаты в JSON")
+    args = parser.parse_args(argv)
+
+    rows = run(args)
+    print_table(rows, args.top_k)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,16 @@ from sqlalchemy import engine_from_config, pool
 from sqlmodel import SQLModel
 
 from app.config import settings
-from app.infrastructure.db.models import track_metadata, user_metadata
+from app.infrastructure.db.models import (
+    best_effort_metadata,
+    ingest_job_metadata,
+    recommendation_metadata,
+    stats_metadata,
+    track_metadata,
+    training_metadata,
+    user_metadata,
+    vector_outbox_metadata,
+)
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,37 @@
+"""add user_recommendations mode and scope
+
+Revision ID: 3b7d1f0a9c42
+Revises: e9a4c2d7f615
+Create Date: 2025-11-26 09:41:07.203614
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7d1f0a9c42"
+down_revision: Union[str, Sequence[str], None] = "e9a4c2d7f615"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user_recommendations",
+        sa.Column("mode", sqlmodel.sql.sqltypes.AutoString(), nullable=False, server_default="vector"),
+    )
+    op.add_column(
+        "user_recommendations",
+        sa.Column("include_other_users", sa.Boolean(), nullable=False, server_default=sa.true()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("user_recommendations", "include_other_users")
+    op.drop_column("user_recommendations", "mode")
@@ -0,0 +1,63 @@
+"""create best_efforts/personal_records
+
+Revision ID: 4a7e2c91d3b5
+Revises: 330843e641f3
+Create Date: 2025-11-08 12:10:41.518203
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4a7e2c91d3b5"
+down_revision: Union[str, Sequence[str], None] = "330843e641f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "best_efforts",
+        sa.Column("track_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("distance_label", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("distance_meters", sa.Float(), nullable=False),
+        sa.Column("elapsed_seconds", sa.Float(), nullable=False),
+        sa.Column("start_offset_meters", sa.Float(), nullable=True),
+        sa.Column("start_datetime_utc", sa.DateTime(), nullable=True),
+        sa.Column("computed_at_utc", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["track_id"], ["tracks.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("track_id", "distance_label"),
+    )
+    op.create_index(
+        "ix_best_efforts_user_label_elapsed",
+        "best_efforts",
+        ["user_id", "distance_label", "elapsed_seconds"],
+        unique=False,
+    )
+    op.create_table(
+        "personal_records",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("distance_label", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("track_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("distance_meters", sa.Float(), nullable=False),
+        sa.Column("elapsed_seconds", sa.Float(), nullable=False),
+        sa.Column("start_datetime_utc", sa.DateTime(), nullable=True),
+        sa.Column("updated_at_utc", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["track_id"], ["tracks.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "distance_label"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("personal_records")
+    op.drop_index("ix_best_efforts_user_label_elapsed", table_name="best_efforts")
+    op.drop_table("best_efforts")
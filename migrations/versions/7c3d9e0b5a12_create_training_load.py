@@ -0,0 +1,52 @@
+"""create training_load_days/track_training_loads
+
+Revision ID: 7c3d9e0b5a12
+Revises: 4a7e2c91d3b5
+Create Date: 2025-11-09 18:42:07.204511
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3d9e0b5a12"
+down_revision: Union[str, Sequence[str], None] = "4a7e2c91d3b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "training_load_days",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("load", sa.Float(), nullable=False),
+        sa.Column("acute_load", sa.Float(), nullable=False),
+        sa.Column("chronic_load", sa.Float(), nullable=False),
+        sa.Column("updated_at_utc", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "day"),
+    )
+    op.create_table(
+        "track_training_loads",
+        sa.Column("track_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("load", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["track_id"], ["tracks.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("track_id"),
+    )
+    op.create_index(op.f("ix_track_training_loads_user_id"), "track_training_loads", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_track_training_loads_user_id"), table_name="track_training_loads")
+    op.drop_table("track_training_loads")
+    op.drop_table("training_load_days")
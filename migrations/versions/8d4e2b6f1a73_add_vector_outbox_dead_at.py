@@ -0,0 +1,28 @@
+"""add vector_outbox dead_at
+
+Revision ID: 8d4e2b6f1a73
+Revises: 3b7d1f0a9c42
+Create Date: 2025-11-27 14:12:38.551902
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d4e2b6f1a73"
+down_revision: Union[str, Sequence[str], None] = "3b7d1f0a9c42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("vector_outbox", sa.Column("dead_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("vector_outbox", "dead_at")
@@ -0,0 +1,51 @@
+"""create volume_weekly/volume_monthly
+
+Revision ID: b1e8f4a2c6d7
+Revises: 7c3d9e0b5a12
+Create Date: 2025-11-11 10:05:33.871290
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b1e8f4a2c6d7"
+down_revision: Union[str, Sequence[str], None] = "7c3d9e0b5a12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "volume_weekly",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("iso_week", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("distance_kilometers", sa.Float(), nullable=False),
+        sa.Column("moving_duration_seconds", sa.Integer(), nullable=False),
+        sa.Column("elevation_gain_meters", sa.Float(), nullable=False),
+        sa.Column("activity_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "iso_week"),
+    )
+    op.create_table(
+        "volume_monthly",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("month", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("distance_kilometers", sa.Float(), nullable=False),
+        sa.Column("moving_duration_seconds", sa.Integer(), nullable=False),
+        sa.Column("elevation_gain_meters", sa.Float(), nullable=False),
+        sa.Column("activity_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "month"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("volume_monthly")
+    op.drop_table("volume_weekly")
@@ -0,0 +1,45 @@
+"""create vector_outbox
+
+Revision ID: c6f1a9d2b874
+Revises: a3d8f1c6e047
+Create Date: 2025-11-21 16:03:09.772415
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c6f1a9d2b874"
+down_revision: Union[str, Sequence[str], None] = "a3d8f1c6e047"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "vector_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("track_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("op", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("vector", sa.JSON(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_vector_outbox_track_id"), "vector_outbox", ["track_id"], unique=False)
+    op.create_index(op.f("ix_vector_outbox_available_at"), "vector_outbox", ["available_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_vector_outbox_available_at"), table_name="vector_outbox")
+    op.drop_index(op.f("ix_vector_outbox_track_id"), table_name="vector_outbox")
+    op.drop_table("vector_outbox")
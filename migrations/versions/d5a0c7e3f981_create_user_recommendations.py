@@ -0,0 +1,44 @@
+"""create user_recommendations
+
+Revision ID: d5a0c7e3f981
+Revises: b1e8f4a2c6d7
+Create Date: 2025-11-13 21:37:52.640118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a0c7e3f981"
+down_revision: Union[str, Sequence[str], None] = "b1e8f4a2c6d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_recommendations",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("track_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.Column("computed_at_utc", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "rank"),
+    )
+    op.create_index(
+        op.f("ix_user_recommendations_generation"), "user_recommendations", ["generation"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_user_recommendations_generation"), table_name="user_recommendations")
+    op.drop_table("user_recommendations")
@@ -0,0 +1,32 @@
+"""index track_features.total_distance_kilometers
+
+Revision ID: e2f6b9d14c08
+Revises: d5a0c7e3f981
+Create Date: 2025-11-15 16:20:09.118734
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2f6b9d14c08"
+down_revision: Union[str, Sequence[str], None] = "d5a0c7e3f981"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_track_features_total_distance_kilometers"),
+        "track_features",
+        ["total_distance_kilometers"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_track_features_total_distance_kilometers"), table_name="track_features")
@@ -0,0 +1,28 @@
+"""add track_features feature_versions
+
+Revision ID: e9a4c2d7f615
+Revises: c6f1a9d2b874
+Create Date: 2025-11-24 10:12:41.508316
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e9a4c2d7f615"
+down_revision: Union[str, Sequence[str], None] = "c6f1a9d2b874"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("track_features", sa.Column("feature_versions", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("track_features", "feature_versions")
@@ -0,0 +1,38 @@
+"""add track_features route fingerprint
+
+Revision ID: f7c2a5e8b390
+Revises: e2f6b9d14c08
+Create Date: 2025-11-17 11:48:26.305917
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c2a5e8b390"
+down_revision: Union[str, Sequence[str], None] = "e2f6b9d14c08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("track_features", sa.Column("route_fingerprint", sa.JSON(), nullable=True))
+    op.add_column(
+        "track_features",
+        sa.Column("route_cluster_key", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_track_features_route_cluster_key"), "track_features", ["route_cluster_key"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_track_features_route_cluster_key"), table_name="track_features")
+    op.drop_column("track_features", "route_cluster_key")
+    op.drop_column("track_features", "route_fingerprint")
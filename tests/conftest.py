@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+# Таблицы регистрируются в metadata при импорте моделей
+from app.infrastructure.db.models import (  # noqa: F401
+    best_effort_metadata,
+    ingest_job_metadata,
+    recommendation_metadata,
+    stats_metadata,
+    track_metadata,
+    training_metadata,
+    user_metadata,
+    vector_outbox_metadata,
+)
+from benchmarks.track_files import TrackSpec, track_file
+
+
+@pytest.fixture
+def session():
+    """SQLite в памяти: одно соединение на тест, схема — из моделей."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        yield s
+    engine.dispose()
+
+
+@pytest.fixture
+def make_track():
+    """Детерминированный синтетический трек: make_track(seed, points=200, fmt="gpx") -> байты файла."""
+
+    def make(seed: int = 0, points: int = 200, fmt: str = "gpx") -> bytes:
+        return track_file(TrackSpec(points, seed=seed), fmt)
+
+    return make
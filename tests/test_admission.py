@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.adapters.admission import AdmissionController, AdmissionRejected
+
+
+async def _admission_order(controller: AdmissionController, users: list) -> list:
+    """Заявки ставятся по порядку users; каждая держит слот один шаг цикла. Возвращает порядок допуска."""
+    order = []
+
+    async def job(user_id: int, n: int) -> None:
+        async with controller.slot(tickets[n]):
+            order.append((user_id, n))
+            await asyncio.sleep(0)
+
+    tickets = [controller.enqueue(user_id) for user_id in users]
+    await asyncio.gather(*(job(user_id, n) for n, user_id in enumerate(users)))
+    return order
+
+
+def test_round_robin_across_users():
+    controller = AdmissionController(max_in_flight=1, per_user=1, max_queue=100)
+    # Пользователь 1 прислал пачку раньше остальных — но не занимает очередь целиком
+    order = asyncio.run(_admission_order(controller, [1, 1, 1, 1, 2, 3, 2]))
+    assert [user_id for user_id, _ in order] == [1, 1, 2, 3, 1, 2, 1]
+    # Заявки одного пользователя — в порядке поступления
+    assert [n for user_id, n in order if user_id == 1] == [0, 1, 2, 3]
+    assert controller.in_flight == 0 and controller.queued == 0
+
+
+def test_per_user_limit_leaves_room_for_others():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=3, per_user=2, max_queue=10)
+        first = [controller.enqueue(1) for _ in range(3)]
+        assert [t.future is None for t in first] == [True, True, False]
+        other = controller.enqueue(2)
+        assert other.future is None and controller.in_flight == 3
+        controller.release(first[0])
+        await asyncio.wait_for(controller.wait(first[2]), 1)
+        assert controller.in_flight == 3 and controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, per_user=1, max_queue=2)
+        controller.enqueue(1)
+        controller.enqueue(1)
+        controller.enqueue(2)
+        with pytest.raises(AdmissionRejected):
+            controller.enqueue(3)
+        assert controller.queued == 2
+
+    asyncio.run(scenario())
+
+
+def test_position_counts_other_users_turns():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, per_user=1, max_queue=10)
+        controller.enqueue(1)
+        assert [controller.enqueue(1).position for _ in range(3)] == [1, 2, 3]
+        # Вторая заявка пользователя 2 пропустит вперёд только две заявки пользователя 1
+        assert [controller.enqueue(2).position for _ in range(2)] == [2, 4]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, per_user=1, max_queue=10)
+        running = controller.enqueue(1)
+        waiting = controller.enqueue(2)
+        task = asyncio.create_task(controller.wait(waiting))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert controller.queued == 0
+
+        # Слот выдан, но ожидающий отменён до пробуждения — слот переходит дальше
+        granted = controller.enqueue(3)
+        after = controller.enqueue(4)
+        task = asyncio.create_task(controller.wait(granted))
+        await asyncio.sleep(0)
+        controller.release(running)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.wait_for(controller.wait(after), 1)
+        assert controller.in_flight == 1 and controller._running == {4: 1}
+
+    asyncio.run(scenario())
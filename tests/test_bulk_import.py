@@ -0,0 +1,128 @@
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.application.bulk_import import ImportTracksCommand, ImportTracksUseCase
+from app.infrastructure.db.models.track_metadata import TrackFeaturesMetadata, TrackMetadata
+from app.infrastructure.imports import JsonFileImportCheckpoint
+from app.infrastructure.parsers.pool import ProcessPoolTrackAnalyzer
+from app.infrastructure.repos.track_repo_sql import (
+    ContentHashIdGen,
+    LocalFSStorage,
+    TrackFeaturesRepoSQL,
+    TrackMetadataRepoSQL,
+)
+from app.infrastructure.repos.vector_outbox_repo_sql import VectorOutboxSQL
+from app.infrastructure.vectorize.track import HandcraftedTrackVectorizer
+
+USER_ID = 1
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _files(make_track, count: int, fail_at=None):
+    """(имя, содержимое) как из архива; fail_at — импорт обрывается на этом файле."""
+    for n in range(count):
+        if n == fail_at:
+            raise Interrupted(n)
+        yield f"activities/{n}.gpx", make_track(seed=n, points=100)
+
+
+def _count(session, model) -> int:
+    return session.exec(select(func.count()).select_from(model)).one()
+
+
+@pytest.fixture
+def import_tracks(session, tmp_path):
+    def make(checkpoint=None, batch_size=2):
+        return ImportTracksUseCase(
+            storage=LocalFSStorage(str(tmp_path / "uploads")),
+            id_gen=ContentHashIdGen(),
+            analyzer=ProcessPoolTrackAnalyzer(workers=1),
+            meta_repo=TrackMetadataRepoSQL(session),
+            features_repo=TrackFeaturesRepoSQL(session),
+            track_vectorizer=HandcraftedTrackVectorizer(),
+            checkpoint=checkpoint,
+            batch_size=batch_size,
+            vector_outbox=VectorOutboxSQL(session),
+        )
+
+    return make
+
+
+def test_resume_skips_checkpointed_files(session, tmp_path, import_tracks, make_track):
+    checkpoint_path = str(tmp_path / "import.progress.json")
+
+    with pytest.raises(Interrupted):
+        import_tracks(JsonFileImportCheckpoint(checkpoint_path)).execute(
+            ImportTracksCommand(USER_ID, _files(make_track, 5, fail_at=3))
+        )
+    # Первая пачка записана и отмечена; начатая вторая не дошла до commit
+    assert _count(session, TrackMetadata) == 2
+    assert JsonFileImportCheckpoint(checkpoint_path).done() == {"activities/0.gpx", "activities/1.gpx"}
+
+    progress = import_tracks(JsonFileImportCheckpoint(checkpoint_path)).execute(
+        ImportTracksCommand(USER_ID, _files(make_track, 5))
+    )
+
+    assert (progress.processed, progress.imported, progress.duplicates, progress.rejected) == (3, 3, 0, 0)
+    assert _count(session, TrackMetadata) == 5
+    assert _count(session, TrackFeaturesMetadata) == 5
+    assert VectorOutboxSQL(session).pending() == 5
+
+
+def test_batch_committed_before_checkpoint_is_not_written_twice(session, tmp_path, import_tracks, make_track):
+    class FlakyCheckpoint(JsonFileImportCheckpoint):
+        failed = False
+
+        def mark_done(self, names):
+            if not FlakyCheckpoint.failed:
+                FlakyCheckpoint.failed = True
+                raise Interrupted("crash after commit")
+            super().mark_done(names)
+
+    checkpoint_path = str(tmp_path / "import.progress.json")
+    with pytest.raises(Interrupted):
+        import_tracks(FlakyCheckpoint(checkpoint_path)).execute(ImportTracksCommand(USER_ID, _files(make_track, 4)))
+    assert _count(session, TrackMetadata) == 2
+
+    progress = import_tracks(FlakyCheckpoint(checkpoint_path)).execute(
+        ImportTracksCommand(USER_ID, _files(make_track, 4))
+    )
+
+    # Пачка уже в базе, но не в чекпоинте: повтор узнаёт треки по содержимому
+    assert (progress.processed, progress.imported, progress.duplicates) == (4, 2, 2)
+    assert _count(session, TrackMetadata) == 4
+    assert VectorOutboxSQL(session).pending() == 4
+
+
+def test_duplicates_within_batch_across_batches_and_imports(session, import_tracks, make_track):
+    files = [
+        ("a.gpx", make_track(seed=1)),
+        ("copy-of-a.gpx", make_track(seed=1)),
+        ("b.gpx", make_track(seed=2)),
+        ("later-copy-of-a.gpx", make_track(seed=1)),
+    ]
+
+    first = import_tracks(batch_size=3).execute(ImportTracksCommand(USER_ID, files))
+    second = import_tracks(batch_size=3).execute(ImportTracksCommand(USER_ID, files[:1]))
+
+    assert (first.imported, first.duplicates) == (2, 2)
+    assert (second.imported, second.duplicates) == (0, 1)
+    assert _count(session, TrackMetadata) == 2
+
+
+def test_rejected_files_are_reported_and_do_not_stop_import(session, import_tracks, make_track):
+    files = [
+        ("huge.gpx", None),
+        ("notes.gpx", b"%PDF-1.4 not a track"),
+        ("ok.gpx", make_track(seed=1)),
+    ]
+
+    progress = import_tracks().execute(ImportTracksCommand(USER_ID, files))
+
+    assert (progress.processed, progress.imported, progress.rejected) == (3, 1, 2)
+    assert [name for name, _ in progress.errors] == ["huge.gpx", "notes.gpx"]
+    assert _count(session, TrackMetadata) == 1
@@ -0,0 +1,98 @@
+import pytest
+
+from app.domain.models.track import TrackFormat
+from app.infrastructure.parsers.gpx_parser import LEGACY_FEATURE_VERSIONS, extract_track_features_from_gpx, gpx_features
+from app.infrastructure.parsers.parser_impl import TrackFeatureExtractorImpl
+from app.infrastructure.parsers.registry import FeatureRegistry
+
+
+@pytest.fixture
+def registry():
+    """base <- derived <- top; other независим. calls — сколько раз считался каждый узел."""
+    reg = FeatureRegistry()
+    reg.calls = {}
+
+    def counted(name, fn):
+        def wrapper(ctx):
+            reg.calls[name] = reg.calls.get(name, 0) + 1
+            return fn(ctx)
+
+        return wrapper
+
+    reg.intermediate("doubled")(counted("doubled", lambda ctx: ctx.track * 2))
+    reg.provider("base", version=1, outputs=("a", "b"), depends=("doubled",))(
+        counted("base", lambda ctx: {"a": ctx["doubled"], "b": ctx["doubled"] + 1})
+    )
+    reg.provider("derived", version=2, outputs=("c",), depends=("base", "doubled"))(
+        counted("derived", lambda ctx: {"c": ctx["base"]["a"] * 10})
+    )
+    reg.provider("top", version=1, outputs=("d",), depends=("derived",))(
+        counted("top", lambda ctx: {"d": ctx["derived"]["c"] + 1})
+    )
+    reg.provider("other", version=1, outputs=("e",))(counted("other", lambda ctx: {"e": -ctx.track}))
+    return reg
+
+
+def test_up_to_date_versions_are_not_stale(registry):
+    assert registry.stale(registry.versions()) == []
+
+
+def test_stale_propagates_to_dependents_only(registry):
+    versions = {**registry.versions(), "base": 0}
+    assert registry.stale(versions) == ["base", "derived", "top"]
+
+    versions = {**registry.versions(), "derived": 1}
+    assert registry.stale(versions) == ["derived", "top"]
+
+
+def test_missing_version_is_stale(registry):
+    versions = registry.versions()
+    del versions["other"]
+    assert registry.stale(versions) == ["other"]
+
+
+def test_evaluates_only_requested_providers_and_dependencies_once(registry):
+    result = registry.evaluate(3, ["d"])
+
+    assert result["d"] == 61
+    assert "a" not in result and "c" not in result and "e" not in result
+    # Версии — только провайдеров, чьи признаки в ответе целиком
+    assert result["feature_versions"] == {"top": 1}
+    assert registry.calls == {"doubled": 1, "base": 1, "derived": 1, "top": 1}
+
+
+def test_partial_provider_outputs_do_not_record_version(registry):
+    result = registry.evaluate(3, ["a"])
+    assert result["a"] == 6 and "b" not in result
+    assert result["feature_versions"] == {}
+
+
+def test_all_features_by_default(registry):
+    result = registry.evaluate(1)
+    assert {k: result[k] for k in "abcde"} == {"a": 2, "b": 3, "c": 20, "d": 21, "e": -1}
+    assert result["feature_versions"] == registry.versions()
+
+
+def test_duplicate_feature_and_unknown_feature_are_errors(registry):
+    with pytest.raises(ValueError):
+        registry.provider("again", version=1, outputs=("a",))(lambda ctx: {"a": 0})
+    with pytest.raises(KeyError):
+        registry.evaluate(1, ["nope"])
+
+
+def test_gpx_registry_recomputes_only_stale_features(make_track):
+    extractor = TrackFeatureExtractorImpl()
+    assert extractor.stale_features(TrackFormat.GPX, gpx_features.versions()) == []
+    # Строки до реестра — версии монолита; провайдеры новее него устарели
+    legacy_stale = extractor.stale_features(TrackFormat.GPX, None)
+    assert legacy_stale == gpx_features.outputs_of(gpx_features.stale(LEGACY_FEATURE_VERSIONS))
+    assert extractor.stale_features(TrackFormat.FIT, None) == []
+
+    bumped = {**gpx_features.versions(), "elevation": 0}
+    stale = extractor.stale_features(TrackFormat.GPX, bumped)
+    assert "total_elevation_gain_meters" in stale
+    assert "route_fingerprint" not in stale
+
+    partial = extract_track_features_from_gpx(make_track(), stale)
+    assert set(partial) - {"feature_versions", "features_version", "computed_at_utc", "source_format"} == set(stale)
+    assert "elevation" in partial["feature_versions"]
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.application.ingest_jobs import ProcessIngestJobsUseCase
+from app.infrastructure.db.models.ingest_job_metadata import IngestJobMetadata
+from app.infrastructure.repos.ingest_job_repo_sql import IngestJobQueueSQL
+
+
+@pytest.fixture
+def queue(session):
+    return IngestJobQueueSQL(session)
+
+
+def _enqueue(queue, job_id: str, max_attempts: int = 3) -> str:
+    return queue.enqueue(
+        {
+            "id": job_id,
+            "track_id": f"track-{job_id}",
+            "user_id": 1,
+            "filename": f"{job_id}.gpx",
+            "format": "gpx",
+            "max_attempts": max_attempts,
+        }
+    )
+
+
+def _expire_lock(session, job_id: str) -> None:
+    """Воркер, захвативший задачу, упал: захват истёк."""
+    row = session.get(IngestJobMetadata, job_id)
+    row.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+
+def _make_available(session, job_id: str) -> None:
+    row = session.get(IngestJobMetadata, job_id)
+    row.available_at = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+
+def test_claim_takes_each_job_once_in_order(queue):
+    for job_id in ("a", "b", "c"):
+        _enqueue(queue, job_id)
+
+    first = queue.claim("w1", 2, 60)
+    assert [job["id"] for job in first] == ["a", "b"]
+    assert all(job["status"] == "running" and job["attempts"] == 1 for job in first)
+    assert [job["id"] for job in queue.claim("w2", 5, 60)] == ["c"]
+    assert queue.claim("w3", 5, 60) == []
+    assert queue.counts() == {"running": 3}
+
+
+def test_complete_only_by_lock_holder(queue, session):
+    _enqueue(queue, "a")
+    queue.claim("w1", 1, 60)
+    _expire_lock(session, "a")
+    queue.claim("w2", 1, 60)
+
+    # Первый воркер опоздал: задача уже у второго
+    assert not queue.complete("a", "w1")
+    assert queue.fail("a", "w1", "boom", 5) is None
+    assert queue.complete("a", "w2")
+    assert queue.counts() == {"done": 1}
+
+
+def test_retry_is_delayed_then_dead_after_max_attempts(queue, session):
+    _enqueue(queue, "a", max_attempts=2)
+
+    queue.claim("w1", 1, 60)
+    assert queue.fail("a", "w1", "db down", 30) == "queued"
+    assert queue.claim("w1", 1, 60) == []  # ещё не подошло время повтора
+
+    _make_available(session, "a")
+    [job] = queue.claim("w1", 1, 60)
+    assert job["attempts"] == 2
+    assert queue.fail("a", "w1", "db down again", 30) == "dead"
+    row = session.get(IngestJobMetadata, "a")
+    assert row.last_error == "db down again" and row.locked_by is None
+
+
+def test_permanent_error_goes_dead_at_once(queue):
+    _enqueue(queue, "a", max_attempts=5)
+    queue.claim("w1", 1, 60)
+    assert queue.fail("a", "w1", "not a track", None) == "dead"
+
+
+def test_expired_lock_is_reclaimed_until_attempts_run_out(queue, session):
+    _enqueue(queue, "a", max_attempts=2)
+    queue.claim("w1", 1, 60)
+    _expire_lock(session, "a")
+    [job] = queue.claim("w2", 1, 60)
+    assert job["attempts"] == 2 and job["locked_by"] == "w2"
+
+    _expire_lock(session, "a")
+    assert queue.claim("w3", 1, 60) == []
+    row = session.get(IngestJobMetadata, "a")
+    assert row.status == "dead" and "visibility timeout" in row.last_error
+
+
+def test_requeue_dead_resets_attempts(queue, session):
+    _enqueue(queue, "a", max_attempts=1)
+    queue.claim("w1", 1, 60)
+    queue.fail("a", "w1", "boom", None)
+
+    assert queue.requeue_dead() == 1
+    [job] = queue.claim("w1", 1, 60)
+    assert job["attempts"] == 1
+
+
+def test_use_case_separates_permanent_and_transient_failures(queue):
+    for job_id in ("ok", "bad", "flaky"):
+        _enqueue(queue, job_id)
+
+    def handler(job):
+        if job["id"] == "bad":
+            raise ValueError("Ожидаю GPX/FIT/TCX")
+        if job["id"] == "flaky":
+            raise ConnectionError("qdrant unavailable")
+        return {"id": job["track_id"]}
+
+    outcomes = ProcessIngestJobsUseCase(queue, handler, "w1", batch_size=5, retry_base_seconds=10).execute()
+
+    assert {o.job["id"]: o.status for o in outcomes} == {"ok": "done", "bad": "dead", "flaky": "queued"}
+    assert {o.job["id"]: o.error for o in outcomes}["flaky"] == "ConnectionError: qdrant unavailable"
+    assert queue.counts() == {"done": 1, "dead": 1, "queued": 1}
@@ -0,0 +1,114 @@
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.domain.models.track import Track, TrackFormat
+from app.infrastructure.compression import Codec, GzipCodec
+from app.infrastructure.raw_packs import PACKS_DIR
+from app.infrastructure.repos.track_repo_sql import LocalFSStorage
+
+DAY = 24 * 3600
+
+
+def _track(n: int, user_id: int = 1) -> Track:
+    return Track(
+        id=f"{n:032x}",
+        user_id=user_id,
+        filename=f"run{n}.gpx",
+        format=TrackFormat.GPX,
+        source="test",
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def _save_old(storage: LocalFSStorage, track: Track, content: bytes, age_seconds: float = 2 * DAY) -> None:
+    path = storage.save_raw(track, content)
+    past = time.time() - age_seconds
+    os.utime(path, (past, past))
+
+
+def _loose_dirs(base) -> list:
+    return sorted(p.name for user in base.iterdir() if user.name != PACKS_DIR for p in user.iterdir())
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalFSStorage(str(tmp_path / "uploads"), GzipCodec())
+
+
+def test_compaction_packs_old_files_and_keeps_them_readable(storage, make_track):
+    tracks = {_track(n, user_id=n % 2 + 1): make_track(seed=n) for n in range(4)}
+    for track, content in tracks.items():
+        _save_old(storage, track, content)
+    fresh = _track(99)
+    storage.save_raw(fresh, make_track(seed=99))
+
+    report = storage.compact(older_than_seconds=DAY, max_pack_bytes=1 << 30)
+
+    assert (report.packed, report.packs, report.skipped) == (4, 1, 0)
+    # Каталоги упакованных треков удалены, свежая загрузка осталась свободным файлом
+    assert _loose_dirs(storage.base_dir) == [fresh.id]
+    for track, content in tracks.items():
+        assert storage.exists(track.id)
+        assert storage.load_raw(track) == content
+    assert storage.load_raw(fresh) == make_track(seed=99)
+
+
+def test_compaction_is_idempotent(storage, make_track):
+    _save_old(storage, _track(1), make_track(seed=1))
+    storage.compact(DAY, 1 << 30)
+
+    report = storage.compact(DAY, 1 << 30)
+    assert (report.packed, report.packs) == (0, 0)
+
+
+def test_pack_size_limit_splits_packs(storage, make_track):
+    for n in range(3):
+        _save_old(storage, _track(n), make_track(seed=n, points=2000))
+    size = max(len(GzipCodec().compress(make_track(seed=n, points=2000))) for n in range(3))
+
+    report = storage.compact(DAY, max_pack_bytes=size + 1)
+
+    assert (report.packed, report.packs) == (3, 3)
+    assert [storage.load_raw(_track(n)) for n in range(3)] == [make_track(seed=n, points=2000) for n in range(3)]
+
+
+def test_uncompressed_legacy_files_are_compressed_on_the_way(tmp_path, make_track):
+    base = str(tmp_path / "uploads")
+    _save_old(LocalFSStorage(base, Codec()), _track(1), make_track(seed=1))
+    storage = LocalFSStorage(base, GzipCodec())
+
+    report = storage.compact(DAY, 1 << 30)
+
+    assert report.bytes_packed < len(make_track(seed=1))
+    assert storage.load_raw(_track(1)) == make_track(seed=1)
+
+
+def test_crash_before_loose_files_removed_is_recovered(storage, make_track):
+    track = _track(1)
+    _save_old(storage, track, make_track(seed=1))
+    track_dir = storage.base_dir / "1" / track.id
+    backup = storage.base_dir.parent / "backup"
+    shutil.copytree(track_dir, backup)
+    storage.compact(DAY, 1 << 30)
+    # Запуск упал после публикации индекса, но до удаления свободного файла
+    shutil.copytree(backup, track_dir)
+
+    report = storage.compact(DAY, 1 << 30)
+
+    assert (report.packed, report.already_packed) == (0, 1)
+    assert not track_dir.exists()
+    assert storage.load_raw(track) == make_track(seed=1)
+
+
+def test_dry_run_changes_nothing(storage, make_track):
+    _save_old(storage, _track(1), make_track(seed=1))
+
+    report = storage.compact(DAY, 1 << 30, dry_run=True)
+
+    assert report.packed == 1
+    assert _loose_dirs(storage.base_dir) == [_track(1).id]
+    assert not (storage.base_dir / PACKS_DIR).exists()
@@ -0,0 +1,87 @@
+import gzip
+import io
+
+import pytest
+
+from app.domain.models.track import FORMAT_SNIFF_MAX_BYTES, TrackFormat, TrackRejectedError
+from app.infrastructure.parsers.sniff import SNIFF_BYTES, check_track_limits, detect_format, is_gzip, read_limited
+
+
+def _head(blob: bytes) -> bytes:
+    # Детектор получает столько байт, сколько дают ему сценарии загрузки
+    return blob[:FORMAT_SNIFF_MAX_BYTES]
+
+
+@pytest.mark.parametrize("fmt", ["gpx", "tcx", "fit"])
+def test_detects_by_content_not_extension(make_track, fmt):
+    assert detect_format("activity.bin", _head(make_track(fmt=fmt))) == TrackFormat(fmt)
+    assert detect_format("activity.gpx", _head(make_track(fmt=fmt))) == TrackFormat(fmt)
+
+
+@pytest.mark.parametrize(
+    "prolog",
+    [
+        b" " * (SNIFF_BYTES * 4),
+        b"\n\t" * SNIFF_BYTES,
+        b"<!-- " + b"x" * (SNIFF_BYTES * 6) + b" -->\n",
+    ],
+    ids=["spaces", "newlines", "comment"],
+)
+def test_root_after_prolog_longer_than_first_look(make_track, prolog):
+    assert detect_format("activity.bin", _head(prolog + make_track())) == TrackFormat.GPX
+
+
+def test_prolog_beyond_cap_falls_back_to_extension(make_track):
+    blob = b" " * (FORMAT_SNIFF_MAX_BYTES + 1) + make_track()
+    assert detect_format("activity.gpx", _head(blob)) == TrackFormat.GPX
+    assert detect_format("activity.bin", _head(blob)) is None
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [b"", b"%PDF-1.4\n" + b"x" * 1000, b" " * 600 + b"<html><body/></html>", gzip.compress(b"<gpx></gpx>")],
+    ids=["empty", "pdf", "html", "gzip"],
+)
+def test_rejects_non_tracks_even_with_track_extension(blob):
+    assert detect_format("activity.gpx", _head(blob)) is None
+
+
+def test_is_gzip():
+    assert is_gzip(gzip.compress(b"data"))
+    assert not is_gzip(b"<gpx/>")
+
+
+def test_limits_reject_truncated_document(make_track):
+    blob = make_track()
+    with pytest.raises(TrackRejectedError) as e:
+        check_track_limits(TrackFormat.GPX, blob[: len(blob) // 2], 10**9, 10**6)
+    assert e.value.reason == "truncated"
+
+
+def test_limits_reject_truncated_fit(make_track):
+    blob = make_track(fmt="fit")
+    check_track_limits(TrackFormat.FIT, blob, 10**9, 10**6)
+    with pytest.raises(TrackRejectedError) as e:
+        check_track_limits(TrackFormat.FIT, blob[:-10], 10**9, 10**6)
+    assert e.value.reason == "truncated"
+
+
+def test_limits_count_points(make_track):
+    blob = make_track(points=300)
+    check_track_limits(TrackFormat.GPX, blob, 10**9, 300)
+    with pytest.raises(TrackRejectedError) as e:
+        check_track_limits(TrackFormat.GPX, memoryview(blob), 10**9, 299)
+    assert e.value.reason == "points"
+
+
+def test_limits_reject_size(make_track):
+    blob = make_track()
+    with pytest.raises(TrackRejectedError) as e:
+        check_track_limits(TrackFormat.GPX, blob, len(blob) - 1, 10**6)
+    assert e.value.reason == "size"
+
+
+def test_read_limited_stops_after_limit():
+    assert read_limited(io.BytesIO(b"x" * 10), 10) == b"x" * 10
+    with pytest.raises(TrackRejectedError):
+        read_limited(io.BytesIO(b"x" * 11), 10)
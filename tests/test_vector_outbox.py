@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.application.vector_outbox import DrainVectorOutboxUseCase
+from app.infrastructure.db.models.vector_outbox_metadata import VectorOutboxMetadata
+from app.infrastructure.repos.vector_outbox_repo_sql import VectorOutboxSQL
+
+
+class FakeIndex:
+    """Векторный индекс в словаре; upsert_many с точкой из poison падает целиком, как пакетный запрос."""
+
+    def __init__(self, poison=()):
+        self.points = {}
+        self.poison = set(poison)
+        self.calls = 0
+
+    def upsert_many(self, points):
+        self.calls += 1
+        if any(track_id in self.poison for track_id, _, _ in points):
+            raise RuntimeError("bad point")
+        self.points.update({track_id: vector for track_id, vector, _ in points})
+
+
+@pytest.fixture
+def outbox(session):
+    return VectorOutboxSQL(session)
+
+
+def _add(outbox, session, *points):
+    outbox.add_upserts([(track_id, [value], {}) for track_id, value in points])
+    session.commit()
+
+
+def _drain(outbox, index, **kwargs):
+    kwargs = {"retry_base_seconds": 0, "retry_max_seconds": 0, **kwargs}
+    return DrainVectorOutboxUseCase(outbox, index, **kwargs)
+
+
+def test_claim_returns_whole_tracks_from_their_earliest_entry(outbox, session):
+    _add(outbox, session, ("t1", 1.0), ("t2", 2.0), ("t1", 1.1), ("t3", 3.0), ("t1", 1.2))
+
+    claimed = outbox.claim(limit=1)
+    # Голова t1 и все последующие операции t1, по порядку записи
+    assert [(e["track_id"], e["vector"]) for e in claimed] == [("t1", [1.0]), ("t1", [1.1]), ("t1", [1.2])]
+
+
+def test_delayed_head_blocks_later_entries_of_its_track(outbox, session):
+    _add(outbox, session, ("t1", 1.0), ("t2", 2.0))
+    [head] = outbox.claim(limit=1)
+    outbox.retry([head["id"]], "index down", delay_seconds=600)
+    _add(outbox, session, ("t1", 1.1))
+
+    # Новая операция t1 не уходит раньше отложенной старой — иначе старый вектор лёг бы поверх нового
+    assert [e["track_id"] for e in outbox.claim(limit=10)] == ["t2"]
+
+
+def test_drain_delivers_last_vector_per_track(outbox, session):
+    _add(outbox, session, ("t1", 1.0), ("t2", 2.0), ("t1", 1.1))
+    index = FakeIndex()
+
+    assert _drain(outbox, index).execute() == 3
+    assert index.points == {"t1": [1.1], "t2": [2.0]}
+    assert outbox.pending() == 0
+
+
+def test_failed_batch_is_retried_with_backoff(outbox, session):
+    _add(outbox, session, ("t1", 1.0))
+    drain = _drain(outbox, FakeIndex(poison={"t1"}), retry_base_seconds=10, retry_max_seconds=100)
+
+    assert drain.execute() == 0
+    row = session.get(VectorOutboxMetadata, 1)
+    assert row.attempts == 1 and row.dead_at is None and "bad point" in row.last_error
+    assert row.available_at > datetime.utcnow() + timedelta(seconds=5)
+    assert outbox.claim(limit=10) == []
+
+
+def test_poison_track_goes_dead_without_blocking_batch(outbox, session):
+    _add(outbox, session, ("t1", 1.0), ("bad", 0.0), ("t2", 2.0))
+    index = FakeIndex(poison={"bad"})
+    drain = _drain(outbox, index, max_attempts=3)
+
+    assert [drain.execute() for _ in range(3)] == [0, 0, 2]
+    assert index.points == {"t1": [1.0], "t2": [2.0]}
+    assert outbox.pending() == 0 and outbox.dead() == 1
+    # Мёртвая операция больше не захватывается
+    calls = index.calls
+    assert drain.execute() == 0 and index.calls == calls
+
+
+def test_dead_entry_does_not_block_newer_entries_of_its_track(outbox, session):
+    _add(outbox, session, ("t1", 1.0))
+    index = FakeIndex(poison={"t1"})
+    drain = _drain(outbox, index, max_attempts=1)
+    drain.execute()
+    assert outbox.dead() == 1
+
+    index.poison.clear()
+    _add(outbox, session, ("t1", 1.1))
+    assert drain.execute() == 1
+    assert index.points == {"t1": [1.1]}
+    # Доставлен более новый вектор — мёртвая старая операция устарела и не вернётся при requeue
+    assert outbox.dead() == 0
+    assert outbox.requeue_dead() == 0
+
+
+def test_requeue_dead(outbox, session):
+    _add(outbox, session, ("t1", 1.0), ("t2", 2.0))
+    index = FakeIndex(poison={"t1", "t2"})
+    drain = _drain(outbox, index, max_attempts=1)
+    drain.execute()
+    assert outbox.dead() == 2
+
+    # Для t2 с тех пор записана новая операция: мёртвая удаляется, а не возвращается в очередь
+    index.poison.clear()
+    _add(outbox, session, ("t2", 2.1))
+    assert outbox.requeue_dead() == 1
+    assert outbox.dead() == 0 and outbox.pending() == 2
+
+    assert drain.execute() == 2
+    assert index.points == {"t1": [1.0], "t2": [2.1]}